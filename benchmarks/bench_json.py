@@ -0,0 +1,65 @@
+import json
+import time
+from io import BytesIO
+
+from framework.request import Request
+from framework.response import JSONResponse
+from framework.serializers import available_backends, get_backend
+
+SIZES = {'1KB': 1024, '100KB': 100 * 1024, '10MB': 10 * 1024 * 1024}
+
+
+def make_payload(size):
+    item = {'id': 1, 'name': 'Alice', 'email': 'alice@example.com', 'tags': ['a', 'b'], 'active': True}
+    item_size = len(json.dumps(item))
+    return [dict(item, id=i) for i in range(max(1, size // item_size))]
+
+
+def throughput(func, size, min_time=0.5):
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return runs * size / elapsed / 1024 / 1024
+
+
+def legacy_decode(body):
+    return json.loads(body.decode('utf-8'))
+
+
+def legacy_encode(data):
+    return json.dumps(data).encode('utf-8')
+
+
+def bench_request(body, loads):
+    def run():
+        environ = {'CONTENT_LENGTH': str(len(body)), 'wsgi.input': BytesIO(body)}
+        loads(Request(environ))
+    return run
+
+
+def main():
+    print(f"{'backend':>10} {'payload':>8} {'decode MB/s':>12} {'encode MB/s':>12}")
+    for label, size in SIZES.items():
+        data = make_payload(size)
+        body = json.dumps(data).encode('utf-8')
+        decode = throughput(bench_request(body, lambda request: legacy_decode(request.body)), len(body))
+        encode = throughput(lambda: legacy_encode(data), len(body))
+        print(f"{'legacy':>10} {label:>8} {decode:>12.1f} {encode:>12.1f}")
+        for name in available_backends():
+            backend = get_backend(name)
+
+            def loads(request, backend=backend):
+                request.json_backend = backend
+                return request.json()
+
+            decode = throughput(bench_request(body, loads), len(body))
+            encode = throughput(lambda: JSONResponse(data, backend=backend), len(body))
+            print(f'{name:>10} {label:>8} {decode:>12.1f} {encode:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import timeit
+import tracemalloc
+from io import BytesIO
+
+from framework.request import Request
+from benchmarks.eager_request import EagerRequest
+
+
+def make_environ(header_count=20):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': '/health',
+        'QUERY_STRING': 'verbose=1&format=json',
+        'CONTENT_LENGTH': '0',
+        'wsgi.input': BytesIO(b''),
+    }
+    for i in range(header_count):
+        environ[f'HTTP_X_CUSTOM_HEADER_{i}'] = f'value-{i}'
+    return environ
+
+
+def allocated_bytes(cls, environ, number=1000):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    keep = [cls(environ) for _ in range(number)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    del keep
+    return sum(stat.size_diff for stat in stats) / number
+
+
+def main(number=100000):
+    environ = make_environ()
+    print(f"{'':>24} {'construct':>12} {'+ headers':>12} {'bytes/req':>10}")
+    for cls in (EagerRequest, Request):
+        construct = timeit.timeit(lambda: cls(environ), number=number) / number * 1e9
+        with_headers = timeit.timeit(lambda: cls(environ).headers, number=number) / number * 1e9
+        size = allocated_bytes(cls, environ)
+        print(f'{cls.__name__:>24} {construct:>10.0f}ns {with_headers:>10.0f}ns {size:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
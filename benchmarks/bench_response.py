@@ -0,0 +1,35 @@
+import timeit
+import tracemalloc
+
+from framework.response import Response
+from benchmarks.uncached_response import UncachedResponse
+
+
+def hello_world(cls):
+    response = cls(body='Hello, World!')
+    return response.status_line(), response.headers_list(), response.body
+
+
+def allocations(cls, number=1000):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    keep = [hello_world(cls) for _ in range(number)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    del keep
+    blocks = sum(stat.count_diff for stat in stats) / number
+    size = sum(stat.size_diff for stat in stats) / number
+    return blocks, size
+
+
+def main(number=200000):
+    print(f"{'':>18} {'time':>10} {'blocks':>8} {'bytes':>8}")
+    for cls in (UncachedResponse, Response):
+        seconds = timeit.timeit(lambda: hello_world(cls), number=number) / number * 1e9
+        blocks, size = allocations(cls)
+        print(f'{cls.__name__:>18} {seconds:>8.0f}ns {blocks:>8.1f} {size:>8.0f}')
+
+
+if __name__ == '__main__':
+    main()
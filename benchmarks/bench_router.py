@@ -0,0 +1,46 @@
+import timeit
+
+from framework.router import Router
+
+
+def handler(request, **params):
+    pass
+
+
+def build_router(count):
+    router = Router()
+    for i in range(count):
+        router.add_route(f'/static/{i}/page', 'GET', handler)
+        router.add_route(f'/api/v{i}/users/<int:id>', 'GET', handler)
+        router.add_route(f'/api/v{i}/files/<path:rest>', 'GET', handler)
+    # иначе первый замер включит ленивую сборку таблиц
+    router.freeze()
+    return router
+
+
+def bench(count, number=100000):
+    router = build_router(count)
+    last = count - 1
+    cases = {
+        'static': f'/static/{last}/page',
+        'int param': f'/api/v{last}/users/42',
+        'path param': f'/api/v{last}/files/a/b/c.txt',
+        'miss': '/nothing/here',
+    }
+    results = {}
+    for name, path in cases.items():
+        seconds = timeit.timeit(lambda: router.match(path, 'GET'), number=number)
+        results[name] = seconds / number * 1e9
+    return results
+
+
+def main():
+    counts = [10, 100, 1000, 10000]
+    print(f"{'routes':>8} " + ' '.join(f'{name:>12}' for name in ('static', 'int param', 'path param', 'miss')))
+    for count in counts:
+        results = bench(count)
+        print(f'{count:>8} ' + ' '.join(f'{ns:>10.0f}ns' for ns in results.values()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import http.client
+import io
+import threading
+import time
+from contextlib import redirect_stderr, redirect_stdout
+
+from framework.app import App
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def build_app():
+    app = App()
+
+    @app.route('/hello')
+    def hello(request):
+        return 'Hello, World!'
+
+    @app.route('/users/<int:user_id>')
+    def user(request, user_id):
+        return {'id': user_id, 'name': 'Alice'}
+
+    return app
+
+
+def start_server(app, host='127.0.0.1', **options):
+    thread = threading.Thread(target=app.run, kwargs=dict(host=host, port=0, **options), daemon=True)
+    thread.start()
+    while app.server is None:
+        time.sleep(0.01)
+    return thread
+
+
+def client(host, port, paths, deadline, latencies, errors):
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                if response.will_close:
+                    connection.close()
+            except (OSError, http.client.HTTPException):
+                errors.append(path)
+                connection.close()
+                continue
+            latencies.append(time.perf_counter() - start)
+    finally:
+        connection.close()
+
+
+def run_load(app=None, paths=('/hello', '/users/42'), concurrency=8, duration=3.0, **server_options):
+    app = app or build_app()
+    # access log сервера искажает замеры, поэтому глушим его
+    with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+        start_server(app, **server_options)
+        host, port = app.server.server_address[:2]
+        latencies, errors = [], []
+        deadline = time.perf_counter() + duration
+        clients = [
+            threading.Thread(target=client, args=(host, port, paths, deadline, latencies, errors))
+            for _ in range(concurrency)
+        ]
+        started = time.perf_counter()
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        app.server.shutdown()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    result = run_load()
+    print(f"{'requests':>10} {'errors':>8} {'rps':>10} {'p50':>10} {'p99':>10}")
+    print(f"{result['requests']:>10} {result['errors']:>8} {result['rps']:>10.0f} "
+          f"{result['p50_ms']:>8.2f}ms {result['p99_ms']:>8.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
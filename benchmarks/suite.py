@@ -0,0 +1,177 @@
+import argparse
+import gc
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+from io import BytesIO
+
+from benchmarks.load import build_app, run_load
+from framework.request import Request
+from framework.response import Response
+from framework.router import Router
+
+# Для каждой метрики: True — больше лучше, False — меньше лучше
+METRICS = {'ns': False, 'peak_bytes': False, 'rps': True, 'p50_ms': False, 'p99_ms': False}
+
+
+def make_environ(path='/hello', method='GET', header_count=10):
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': 'page=1&sort=name',
+        'CONTENT_LENGTH': '0',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '8000',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.input': BytesIO(b''),
+        'wsgi.url_scheme': 'http',
+    }
+    for i in range(header_count):
+        environ[f'HTTP_X_HEADER_{i}'] = f'value-{i}'
+    return environ
+
+
+def build_router(count=100):
+    router = Router()
+    for i in range(count):
+        router.add_route(f'/static/{i}/page', 'GET', None)
+        router.add_route(f'/api/v{i}/users/<int:id>', 'GET', None)
+    return router
+
+
+def start_response(status, headers, exc_info=None):
+    pass
+
+
+def micro_cases():
+    router = build_router()
+    environ = make_environ()
+    app = build_app()
+    app_environ = make_environ('/users/42')
+
+    def app_call():
+        app_environ['wsgi.input'].seek(0)
+        return app(app_environ, start_response)
+
+    def response_headers():
+        response = Response(body='Hello, World!')
+        return response.status_line(), response.headers_list()
+
+    return {
+        'router.match static': lambda: router.match('/static/99/page', 'GET'),
+        'router.match dynamic': lambda: router.match('/api/v99/users/42', 'GET'),
+        'router.match miss': lambda: router.match('/nothing/here', 'GET'),
+        'Request.__init__': lambda: Request(environ),
+        'Request headers+query': lambda: (Request(environ).headers, Request(environ).query),
+        'Response.headers_list': response_headers,
+        'App.__call__': app_call,
+    }
+
+
+def measure_time(func, repeat=5, min_time=0.2):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def measure_allocations(func, number=1000):
+    # пик памяти внутри каждого вызова: учитывает и временные объекты, освобождённые до возврата
+    func()
+    gc.collect()
+    tracemalloc.start()
+    total = 0
+    try:
+        for _ in range(number):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            func()
+            total += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+    return total / number
+
+
+def run_micro(names=None):
+    results = {}
+    for name, func in micro_cases().items():
+        if names and not any(part in name for part in names):
+            continue
+        results[name] = {'ns': measure_time(func), 'peak_bytes': measure_allocations(func)}
+    return results
+
+
+def compare(results, baseline, threshold=0.10):
+    rows = []
+    for name, metrics in results.items():
+        old = baseline.get('results', {}).get(name)
+        if old is None:
+            continue
+        for metric, value in metrics.items():
+            if metric not in METRICS or metric not in old or not old[metric]:
+                continue
+            change = (value - old[metric]) / old[metric]
+            worse = -change if METRICS[metric] else change
+            rows.append((name, metric, old[metric], value, change, worse > threshold))
+    return rows
+
+
+def environment():
+    return {'python': sys.version.split()[0], 'implementation': platform.python_implementation(),
+            'machine': platform.machine()}
+
+
+def report(results):
+    print(f"{'benchmark':<26} {'ns/op':>10} {'peak B':>8} {'rps':>10} {'p50':>10} {'p99':>10}")
+    for name, metrics in results.items():
+        cells = [
+            f"{metrics['ns']:>8.0f}ns" if 'ns' in metrics else f"{'':>10}",
+            f"{metrics['peak_bytes']:>8.0f}" if 'peak_bytes' in metrics else f"{'':>8}",
+            f"{metrics['rps']:>10.0f}" if 'rps' in metrics else f"{'':>10}",
+            f"{metrics['p50_ms']:>8.2f}ms" if 'p50_ms' in metrics else f"{'':>10}",
+            f"{metrics['p99_ms']:>8.2f}ms" if 'p99_ms' in metrics else f"{'':>10}",
+        ]
+        print(f'{name:<26} ' + ' '.join(cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Framework hot path benchmarks')
+    parser.add_argument('--filter', nargs='*', help='run only micro benchmarks whose name contains one of these')
+    parser.add_argument('--load', action='store_true', help='also run the end-to-end loopback load test')
+    parser.add_argument('--duration', type=float, default=3.0, help='load test duration in seconds')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=None, help='server thread pool size for the load test')
+    parser.add_argument('--save', metavar='PATH', help='write results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare against a saved JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed regression, 0.10 = 10%%')
+    args = parser.parse_args(argv)
+
+    results = run_micro(args.filter)
+    if args.load:
+        load = run_load(concurrency=args.concurrency, duration=args.duration, threads=args.threads)
+        results['load'] = {name: load[name] for name in ('rps', 'p50_ms', 'p99_ms')}
+    report(results)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        print(f'Saved baseline to {args.save}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        print()
+        print(f"{'benchmark':<26} {'metric':>8} {'baseline':>10} {'current':>10} {'change':>8}")
+        for name, metric, old, new, change, regressed in rows:
+            mark = '  REGRESSION' if regressed else ''
+            print(f'{name:<26} {metric:>8} {old:>10.2f} {new:>10.2f} {change:>+7.1%}{mark}')
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
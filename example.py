@@ -1,6 +1,4 @@
-import json
-from urllib.parse import parse_qs
-from framework import App, Response
+from framework import App, JSONResponse, Response
 
 users = [
     {'id': 1, 'name': 'Alice', 'email': 'alice@example.com'},
@@ -10,6 +8,12 @@ users = [
 
 app = App()
 
+
+# запись в журнал не нужна клиенту, поэтому выполняется после отправки ответа
+def audit(event, payload):
+    print(f'[audit] {event}: {payload}')
+
+
 # обычный GET
 @app.route('/')
 def index(request):
@@ -45,17 +49,14 @@ def hello(request):
     return Response(body=html)
 
 
-# GET с ответом в формате JSON, поддерживает фильтрацию
-@app.route('/users', methods=['GET'])
+# GET с ответом в формате JSON, поддерживает фильтрацию; ответ кешируется на 30 секунд
+@app.route('/users', methods=['GET'], cache=30)
 def get_users(request):
     search = request.query.get('search', '')
     result = users
     if search:
         result = [u for u in users if search.lower() in u['name'].lower()]
-    return Response(
-        body=json.dumps(result),
-        headers={'Content-Type': 'application/json'}
-    )
+    return JSONResponse(result)
 
 # Метод POST с параметрами в формате json, и формирование ответа в том же формате
 @app.route('/users', methods=['POST'])
@@ -72,18 +73,12 @@ def create_user(request):
             'email': email
         }
         users.append(new_user)
+        app.cache.clear()
+        request.add_background_task(audit, 'user created', new_user)
 
-        return Response(
-            body=json.dumps({'message': 'User created', 'user': new_user}),
-            status=201,
-            headers={'Content-Type': 'application/json'}
-        )
+        return JSONResponse({'message': 'User created', 'user': new_user}, status=201)
     except Exception as e:
-        return Response(
-            body=json.dumps({'error': str(e)}),
-            status=400,
-            headers={'Content-Type': 'application/json'}
-        )
+        return JSONResponse({'error': str(e)}, status=400)
 
 
 # GET запрос, отображающий форму для заполнения
@@ -113,11 +108,10 @@ def show_form(request):
 def handle_form(request):
     global users
     try:
-        body = request.body.decode() if request.body else ''
-        data = parse_qs(body)
+        data = request.form()
 
-        name = data.get('name', [''])[0]
-        email = data.get('email', [''])[0]
+        name = data.get('name', '')
+        email = data.get('email', '')
 
         if not name or not email:
             if not name or not email:
@@ -146,6 +140,7 @@ def handle_form(request):
         new_id = max([u['id'] for u in users], default=0) + 1
         new_user = {'id': new_id, 'name': name, 'email': email}
         users.append(new_user)
+        app.cache.clear()
         return Response(body=html)
 
     except Exception as e:
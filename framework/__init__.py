@@ -1,6 +1,9 @@
 from .app import App
+from .exceptions import HTTPError
+from .middleware import Middleware
 from .request import Request
-from .response import Response
+from .response import FileResponse, JSONResponse, Response, StreamingJSONResponse, StreamingResponse
 from .router import Router
 
-__all__ = ['App', 'Request', 'Response', 'Router']
+__all__ = ['App', 'HTTPError', 'Middleware', 'Request', 'Response', 'StreamingResponse', 'FileResponse',
+           'JSONResponse', 'StreamingJSONResponse', 'Router']
@@ -0,0 +1,251 @@
+import asyncio
+from urllib.parse import unquote
+
+from .http import (
+    LAST_CHUNK, MAX_HEAD_SIZE, ProtocolError, encode_chunk, error_response, parse_head, response_head,
+)
+from .response import STATUS_CODES
+
+
+class _Exchange:
+    def __init__(self, server, reader, writer, method, version, headers):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.method = method
+        self.version = version
+        self.headers_sent = False
+        self.request_complete = False
+        self.finished = False
+        self.chunked_body = False
+        self.remaining = 0
+        self.status = None
+        self.response_headers = None
+        self.chunked_response = False
+        self.transfer_encoding = ''
+        self.disconnected = asyncio.get_running_loop().create_future()
+
+        connection = ''
+        for name, value in headers:
+            lowered = name.lower()
+            if lowered == 'content-length':
+                try:
+                    self.remaining = int(value)
+                except ValueError:
+                    raise ProtocolError(f'Invalid Content-Length: {value!r}')
+                if self.remaining < 0:
+                    raise ProtocolError(f'Invalid Content-Length: {value!r}')
+            elif lowered == 'transfer-encoding':
+                self.transfer_encoding = value.strip().lower()
+                self.chunked_body = self.transfer_encoding == 'chunked'
+            elif lowered == 'connection':
+                connection = value.lower()
+        if version == 'HTTP/1.1':
+            self.keep_alive = 'close' not in connection
+        else:
+            self.keep_alive = 'keep-alive' in connection
+
+    @property
+    def body_consumed(self):
+        return not self.chunked_body and self.remaining == 0
+
+    async def receive(self):
+        if self.request_complete:
+            await self.disconnected
+            return {'type': 'http.disconnect'}
+        if self.body_consumed:
+            self.request_complete = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        try:
+            if self.chunked_body:
+                body = await self._read_chunk()
+            else:
+                body = await self.reader.read(min(self.remaining, self.server.read_size))
+                if not body:
+                    raise ConnectionResetError()
+                self.remaining -= len(body)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            self.keep_alive = False
+            return {'type': 'http.disconnect'}
+        self.request_complete = self.body_consumed
+        return {'type': 'http.request', 'body': body, 'more_body': not self.request_complete}
+
+    async def _read_chunk(self):
+        line = await self.reader.readuntil(b'\r\n')
+        size = int(line.split(b';', 1)[0], 16)
+        if size == 0:
+            while await self.reader.readuntil(b'\r\n') != b'\r\n':
+                pass
+            self.chunked_body = False
+            self.remaining = 0
+            return b''
+        data = await self.reader.readexactly(size + 2)
+        return data[:-2]
+
+    async def send(self, message):
+        kind = message['type']
+        if kind == 'http.response.start':
+            self.status = message['status']
+            self.response_headers = [
+                (name.decode('latin-1'), value.decode('latin-1')) for name, value in message.get('headers', ())
+            ]
+            has_length = any(name.lower() == 'content-length' for name, _ in self.response_headers)
+            if not has_length and self.status not in (204, 304) and self.method != 'HEAD':
+                if self.version == 'HTTP/1.1':
+                    self.chunked_response = True
+                else:
+                    self.keep_alive = False
+            return
+
+        if kind != 'http.response.body' or self.finished:
+            return
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        data = b''
+        if not self.headers_sent:
+            data = self._head(more_body)
+            self.headers_sent = True
+        if self.method != 'HEAD' and self.status not in (204, 304):
+            if self.chunked_response:
+                if body:
+                    data += encode_chunk(body)
+                if not more_body:
+                    data += LAST_CHUNK
+            else:
+                data += body
+        if data:
+            self.writer.write(data)
+            await self.writer.drain()
+        if not more_body:
+            self.finished = True
+
+    def _head(self, more_body):
+        keep_alive = self.keep_alive and not self.server.closing and (self.body_consumed or not more_body)
+        self.keep_alive = keep_alive
+        status = f'{self.status} {_reason(self.status)}'
+        return response_head(self.version, status, self.response_headers, keep_alive, self.chunked_response)
+
+
+def _reason(status):
+    return STATUS_CODES.get(status, 'Unknown')
+
+
+class AsyncServer:
+    read_size = 64 * 1024
+
+    def __init__(self, app, host='127.0.0.1', port=8000, keep_alive_timeout=5.0, sock=None,
+                 max_head_size=MAX_HEAD_SIZE, backlog=2048):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.keep_alive_timeout = keep_alive_timeout
+        self.sock = sock
+        self.max_head_size = max_head_size
+        self.backlog = backlog
+        self.closing = False
+        self.server = None
+        self.connections = 0
+        self._idle = set()
+
+    async def start(self):
+        asgi = getattr(self.app, 'asgi', self.app)
+        self._asgi = asgi
+        if self.sock is not None:
+            self.server = await asyncio.start_server(
+                self._handle_connection, sock=self.sock, limit=self.max_head_size, backlog=self.backlog,
+            )
+        else:
+            self.server = await asyncio.start_server(
+                self._handle_connection, self.host, self.port, limit=self.max_head_size, backlog=self.backlog,
+            )
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self, timeout=None):
+        self.closing = True
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for writer in list(self._idle):
+            writer.close()
+        if timeout is None:
+            return
+        deadline = asyncio.get_running_loop().time() + timeout
+        while self.connections and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.05)
+
+    async def _handle_connection(self, reader, writer):
+        self.connections += 1
+        try:
+            while not self.closing:
+                self._idle.add(writer)
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.keep_alive_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(error_response('431 Request Header Fields Too Large'))
+                    break
+                finally:
+                    self._idle.discard(writer)
+                head = head.lstrip(b'\r\n')
+                if not head:
+                    continue
+                try:
+                    keep_alive = await self._handle_request(reader, writer, head[:-4])
+                except ProtocolError:
+                    writer.write(error_response('400 Bad Request'))
+                    break
+                if not keep_alive:
+                    break
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _handle_request(self, reader, writer, head):
+        method, target, version, headers = parse_head(head)
+        exchange = _Exchange(self, reader, writer, method, version, headers)
+        if exchange.transfer_encoding and not exchange.chunked_body:
+            # как и синхронный сервер, кроме chunked ничего не декодируем
+            writer.write(error_response('501 Not Implemented', version))
+            return False
+        path, _, query = target.partition('?')
+        peer = writer.get_extra_info('peername')
+        sock = writer.get_extra_info('sockname')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0', 'spec_version': '2.3'},
+            'http_version': version[5:],
+            'method': method,
+            'scheme': 'http',
+            'path': unquote(path),
+            'raw_path': path.encode('latin-1'),
+            'query_string': query.encode('latin-1'),
+            'root_path': '',
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+            'client': tuple(peer[:2]) if isinstance(peer, tuple) else None,
+            'server': tuple(sock[:2]) if isinstance(sock, tuple) else None,
+        }
+        try:
+            await self._asgi(scope, exchange.receive, exchange.send)
+        except Exception:
+            if not exchange.headers_sent:
+                writer.write(error_response('500 Internal Server Error', version))
+            return False
+        finally:
+            if not exchange.disconnected.done():
+                exchange.disconnected.set_result(None)
+
+        if not exchange.finished:
+            if not exchange.headers_sent:
+                writer.write(error_response('500 Internal Server Error', version))
+            return False
+        return exchange.keep_alive and exchange.body_consumed
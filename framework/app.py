@@ -1,47 +1,610 @@
+import asyncio
+import inspect
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import partial
+from io import BytesIO
+from time import perf_counter
 from wsgiref.simple_server import make_server
 
-from .request import Request
-from .response import Response
+from .aioserver import AsyncServer
+from .asgi import ReceiveStream, serve_asgi
+from .background import TaskIterable, TaskQueue
+from .cache import CacheMiddleware, ResponseCache
+from .compression import Compressor
+from .exceptions import GatewayTimeout, HTTPError, RequestEntityTooLarge
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, UNMATCHED, Metrics, render_background, render_pools
+from .middleware import compile_chain, compile_chain_async
+from .prefork import Arbiter
+from .ratelimit import LoadShedder
+from .request import EMPTY_PARAMS, Request
+from .resources import Resources
+from .response import HeadResponse, JSONResponse, Response, StreamingResponse
 from .router import Router
+from .serializers import get_backend
+from .server import HTTPServer, ThreadPoolHTTPServer
+from .static import StaticFiles
+from .threadpool import ThreadPoolWSGIServer
+from .tracing import Sampler, Tracer
+
+
+def _release_abandoned(pool, future):
+    if not future.cancelled() and future.exception() is None:
+        pool.release(future.result())
 
 
 class App:
-    def __init__(self):
+    def __init__(self, max_body_size=None, cache_entries=1024, cache_max_bytes=64 * 1024 * 1024,
+                 json_backend=None, timeout=None, timeout_workers=32):
         self.router = Router()
+        self.max_body_size = max_body_size
+        self.timeout = timeout
+        self.timeout_workers = timeout_workers
+        self.timeouts = {}
+        self.json = get_backend(json_backend)
+        self.cache = ResponseCache(cache_entries, cache_max_bytes)
+        self.middleware = []
+        self.compressor = None
+        self.metrics = None
+        self.tracer = None
+        self.sampler = None
+        self.shedder = None
+        self.resources = Resources()
+        self.background = TaskQueue()
+        self.started = False
+        self.server = None
+        self.warm_up_on_startup = False
+        self.warm_up_paths = None
+        self._startup_hooks = []
+        self._shutdown_hooks = []
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._startup_lock = threading.Lock()
+        self._startup_pending = True
+        self._compiled = False
+        self._fallback = None
+        self._fallback_async = None
 
-    def route(self, path, methods=None):
+    def route(self, path, methods=None, cache=None, vary=(), middleware=(), resources=(), timeout=None):
         if methods is None:
             methods = ['GET']
 
         def decorator(handler):
-            self.router.add_route(path, methods, handler)
+            self.router.add_route(
+                path, methods, handler, cache=cache, vary=tuple(vary), middleware=tuple(middleware),
+                resources=tuple(resources), timeout=timeout,
+            )
+            self._compiled = False
             return handler
 
         return decorator
 
+    def on_startup(self, hook):
+        self._startup_hooks.append(hook)
+        return hook
+
+    def on_shutdown(self, hook):
+        self._shutdown_hooks.append(hook)
+        return hook
+
+    def resource(self, name, factory, **options):
+        return self.resources.register(name, factory, **options)
+
+    def startup(self):
+        if self.started:
+            return
+        for hook in self._startup_hooks:
+            result = hook()
+            if inspect.isawaitable(result):
+                asyncio.run(result)
+        self.started = True
+        self._startup_pending = False
+        if self.warm_up_on_startup:
+            self.warm_up(self.warm_up_paths)
+
+    def shutdown(self):
+        if not self.started:
+            return
+        self.started = False
+        try:
+            for hook in reversed(self._shutdown_hooks):
+                result = hook()
+                if inspect.isawaitable(result):
+                    asyncio.run(result)
+        finally:
+            self.background.close()
+            self._close_executor()
+            self.resources.close()
+            self._flush_metrics()
+
+    async def startup_async(self):
+        if self.started:
+            return
+        for hook in self._startup_hooks:
+            result = hook()
+            if inspect.isawaitable(result):
+                await result
+        self.started = True
+        self._startup_pending = False
+        if self.warm_up_on_startup:
+            await asyncio.get_running_loop().run_in_executor(None, self.warm_up, self.warm_up_paths)
+
+    async def shutdown_async(self):
+        if not self.started:
+            return
+        self.started = False
+        try:
+            for hook in reversed(self._shutdown_hooks):
+                result = hook()
+                if inspect.isawaitable(result):
+                    await result
+        finally:
+            await asyncio.get_running_loop().run_in_executor(None, self.background.close)
+            self._close_executor()
+            self.resources.close()
+            self._flush_metrics()
+
+    def _flush_metrics(self):
+        # воркер, ушедший по max_requests, не должен унести запросы после последнего периодического сброса
+        if self.metrics is not None and self.metrics.directory is not None:
+            self.metrics.flush()
+
+    def static(self, prefix, directory, **options):
+        files = StaticFiles(directory, **options)
+        self.router.add_route(prefix.rstrip('/') + '/<path:filename>', ['GET'], files)
+        self._compiled = False
+        return files
+
+    def use(self, middleware):
+        self.middleware.append(middleware)
+        self._compiled = False
+        return middleware
+
+    def enable_compression(self, **options):
+        self.compressor = self.use(Compressor(**options))
+        return self.compressor
+
+    def enable_metrics(self, path='/metrics', **options):
+        self.metrics = Metrics(**options)
+        if path is not None:
+            self.router.add_route(path, ['GET'], self._metrics_endpoint)
+            self._compiled = False
+        return self.metrics
+
+    def enable_load_shedding(self, max_in_flight=None, max_queue_latency=None, retry_after=1):
+        self.shedder = LoadShedder(max_in_flight, max_queue_latency, retry_after)
+        return self.shedder
+
+    def enable_background_tasks(self, **options):
+        self.background = TaskQueue(**options)
+        return self.background
+
+    def enable_warm_up(self, paths=None):
+        self.warm_up_on_startup = True
+        self.warm_up_paths = paths
+
+    def enable_tracing(self, threshold=0.5, sample_signal=None, sample_seconds=10.0, sample_interval=0.005,
+                       profile_dir=None):
+        self.tracer = Tracer(threshold)
+        if sample_signal is not None:
+            self.sampler = Sampler(sample_interval, profile_dir)
+            self.sampler.install(sample_signal, sample_seconds)
+        return self.tracer
+
+    def _metrics_endpoint(self, request):
+        body = [
+            self.metrics.render(),
+            render_pools(self.resources.stats(), self.metrics.prefix),
+            render_background(self.background.stats(), self.metrics.prefix),
+        ]
+        return Response(body, headers={'Content-Type': METRICS_CONTENT_TYPE})
+
+    def compile(self):
+        self.router.freeze()
+        for table in self.router.tables():
+            for route in table:
+                self._compile_route(route)
+        self._fallback = compile_chain(self.middleware, self._unmatched)
+        self._fallback_async = compile_chain_async(self.middleware, self._unmatched_async)
+        self._compiled = True
+
+    def _compile_route(self, route):
+        layers = list(self.middleware)
+        layers.extend(route.options.get('middleware', ()))
+        if route.options.get('cache') is not None:
+            layers.append(CacheMiddleware(self.cache, route.options['cache'], route.options['vary']))
+        names = route.options.get('resources', ())
+        if names:
+            pools = tuple(self._pool(name) for name in names)
+            endpoint = partial(self._invoke_with_resources, route, pools)
+            endpoint_async = partial(self._invoke_async_with_resources, route, pools)
+        else:
+            endpoint = partial(self._invoke, route)
+            endpoint_async = partial(self._invoke_async, route)
+        timeout = self._route_timeout(route)
+        if timeout:
+            endpoint_async = partial(self._invoke_async_with_deadline, endpoint_async, route, timeout)
+            if route.is_async:
+                endpoint = partial(self._run_coroutine, endpoint_async)
+            else:
+                endpoint = partial(self._invoke_with_deadline, endpoint, route, timeout)
+        route.chain = compile_chain(layers, endpoint)
+        route.chain_async = compile_chain_async(layers, endpoint_async)
+        if route.automatic and route.method == 'HEAD':
+            route.chain = partial(self._strip_body, route.chain)
+            route.chain_async = partial(self._strip_body_async, route.chain_async)
+
+    def _route_timeout(self, route):
+        timeout = route.options.get('timeout')
+        if timeout is None:
+            # автоматические OPTIONS и 405 отвечают сразу, дедлайн им не нужен
+            timeout = 0 if route.automatic and route.method != 'HEAD' else self.timeout
+        return timeout or None
+
+    def _strip_body(self, chain, request):
+        return HeadResponse(chain(request))
+
+    async def _strip_body_async(self, chain, request):
+        return HeadResponse(await chain(request))
+
+    def routes(self):
+        if not (self._compiled and self.router.frozen):
+            self.compile()
+        routes = []
+        for table in self.router.tables():
+            for route in table.routes.values():
+                handler = route.handler
+                routes.append({
+                    'pattern': route.pattern,
+                    'method': route.method,
+                    'handler': getattr(handler, '__qualname__', type(handler).__qualname__),
+                    'module': getattr(handler, '__module__', None),
+                    'params': list(route.param_names),
+                    'async': route.is_async,
+                    'automatic': route.automatic,
+                    'allow': table.allow,
+                    'cache': route.options.get('cache'),
+                    'timeout': self._route_timeout(route),
+                    'resources': list(route.options.get('resources', ())),
+                    'middleware': len(self.middleware) + len(route.options.get('middleware', ())),
+                })
+        routes.sort(key=lambda info: (info['pattern'], info['method']))
+        return routes
+
+    def warm_up(self, paths=None):
+        self.compile()
+        if paths is None:
+            paths = [
+                route.pattern for table in self.router.tables() for route in table.routes.values()
+                if route.method == 'GET' and not route.param_names and not route.options.get('resources')
+            ]
+        # прогревочные запросы пишем во временные метрики, чтобы не портить настоящие
+        metrics = self.metrics
+        if metrics is not None:
+            self.metrics = Metrics(metrics.buckets, prefix=metrics.prefix)
+        results = {}
+        try:
+            for path in paths:
+                environ = {
+                    'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SERVER_NAME': 'warm-up',
+                    'SERVER_PORT': '0', 'SERVER_PROTOCOL': 'HTTP/1.1', 'REMOTE_ADDR': '127.0.0.1',
+                    'wsgi.input': BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+                }
+                status = []
+                iterable = self(environ, lambda line, headers, exc_info=None: status.append(int(line[:3])))
+                try:
+                    for _ in iterable:
+                        pass
+                finally:
+                    close = getattr(iterable, 'close', None)
+                    if close is not None:
+                        close()
+                results[path] = status[0] if status else None
+        finally:
+            self.metrics = metrics
+        return results
+
+    def _startup_once(self):
+        # голый WSGI-сервер (gunicorn, uwsgi) startup() сам не вызывает: делаем это на первом запросе
+        with self._startup_lock:
+            if self._startup_pending:
+                self.startup()
+
     def __call__(self, environ, start_response):
-        request = Request(environ)
+        if self._startup_pending:
+            self._startup_once()
+        if self.shedder is not None:
+            return self._call_shedding(environ, start_response)
+        if self.tracer is not None:
+            return self._call_traced(environ, start_response)
+        request = Request(environ, self.max_body_size, self.json)
+        response = self.handle(request)
+        if request.tasks is None:
+            return response(environ, start_response)
+        return TaskIterable(response(environ, start_response), request.tasks, self.background)
 
-        handler = self.router.resolve(request.path, request.method)
+    def _call_shedding(self, environ, start_response):
+        rejected = self.shedder.enter(environ)
+        if rejected is not None:
+            return rejected(environ, start_response)
+        try:
+            if self.tracer is not None:
+                return self._call_traced(environ, start_response)
+            request = Request(environ, self.max_body_size, self.json)
+            response = self.handle(request)
+            if request.tasks is None:
+                return response(environ, start_response)
+            return TaskIterable(response(environ, start_response), request.tasks, self.background)
+        finally:
+            self.shedder.leave()
 
-        if handler is None:
-            response = Response(body='404 Not Found', status=404)
+    def _call_traced(self, environ, start_response):
+        trace = self.tracer.start()
+        request = Request(environ, self.max_body_size, self.json)
+        trace.mark('parse')
+        response = self.handle(request, trace)
+        iterable = response(environ, start_response)
+        trace.mark('serialize')
+        self.tracer.finish(request, response, trace)
+        if request.tasks is None:
+            return iterable
+        return TaskIterable(iterable, request.tasks, self.background)
+
+    def handle(self, request, trace=None):
+        if self.metrics is None:
+            return self._handle(request, trace)
+        self.metrics.started()
+        start = perf_counter()
+        response = self._handle(request, trace)
+        self._record(request, response, perf_counter() - start)
+        return response
+
+    async def handle_async(self, request, trace=None):
+        if self.metrics is None:
+            return await self._handle_async(request, trace)
+        self.metrics.started()
+        start = perf_counter()
+        response = await self._handle_async(request, trace)
+        self._record(request, response, perf_counter() - start)
+        return response
+
+    def _record(self, request, response, duration):
+        length = response.headers.get('Content-Length')
+        if length is not None:
+            bytes_out = int(length)
         else:
-            try:
-                response = handler(request)
-                if not isinstance(response, Response):
-                    response = Response(body=response)
-            except Exception as e:
-                error_body = f'500 Internal Server Error: {str(e)}'
-                response = Response(body=error_body, status=500)
-
-        status_line = response.status_line()
-        headers_list = response.headers_list()
-        start_response(status_line, headers_list)
-
-        return [response.body]
-
-    def run(self, host='127.0.0.1', port=8000):
-        with make_server(host, port, self) as httpd:
+            bytes_out = 0
+            if isinstance(response, StreamingResponse):
+                response.body = self.metrics.count_body(response.body)
+        route = request.route
+        self.metrics.observe(
+            UNMATCHED if route is None else route.pattern, request.method, response.status, duration,
+            request.content_length, bytes_out,
+        )
+
+    def _handle(self, request, trace=None):
+        if not (self._compiled and self.router.frozen):
+            self.compile()
+        route = self._match(request)
+        if trace is not None:
+            trace.mark('route')
+        chain = self._fallback if route is None else route.chain
+        try:
+            response = chain(request)
+        except Exception as e:
+            response = self._error_response(e)
+        if trace is not None:
+            trace.mark('handler')
+        return response
+
+    async def _handle_async(self, request, trace=None):
+        if not (self._compiled and self.router.frozen):
+            self.compile()
+        route = self._match(request)
+        if trace is not None:
+            trace.mark('route')
+        chain = self._fallback_async if route is None else route.chain_async
+        try:
+            response = await chain(request)
+        except Exception as e:
+            response = self._error_response(e)
+        if trace is not None:
+            trace.mark('handler')
+        return response
+
+    def _match(self, request):
+        if self.max_body_size is not None and request.content_length > self.max_body_size:
+            return None
+        match = self.router.dispatch(request.path, request.method)
+        if match is None:
+            return None
+        route, params = match
+        request.path_params = params
+        request.route = route
+        return route
+
+    def _unmatched(self, request):
+        if self.max_body_size is not None and request.content_length > self.max_body_size:
+            return RequestEntityTooLarge().to_response()
+        return Response(body='404 Not Found', status=404)
+
+    async def _unmatched_async(self, request):
+        return self._unmatched(request)
+
+    def _pool(self, name):
+        if name not in self.resources:
+            raise ValueError(f'Unknown resource: {name}')
+        return name, self.resources[name]
+
+    def _invoke(self, route, request, resources=EMPTY_PARAMS):
+        try:
+            if route.is_async:
+                result = asyncio.run(route.handler(request, **request.path_params, **resources))
+            else:
+                result = route.handler(request, **request.path_params, **resources)
+        except Exception as e:
+            return self._error_response(e)
+        return self._make_response(result, request)
+
+    async def _invoke_async(self, route, request, resources=EMPTY_PARAMS):
+        if not route.is_async:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._invoke, route, request, resources)
+        try:
+            stream = request.environ.get('wsgi.input')
+            if type(stream) is ReceiveStream:
+                # async-обработчик читает тело прямо в цикле событий, блокироваться там нельзя: спулим заранее
+                await stream.spool()
+            result = await route.handler(request, **request.path_params, **resources)
+        except Exception as e:
+            return self._error_response(e)
+        return self._make_response(result, request)
+
+    def _invoke_with_resources(self, route, pools, request):
+        acquired = {}
+        try:
+            for name, pool in pools:
+                acquired[name] = pool.acquire()
+            return self._invoke(route, request, acquired)
+        finally:
+            for name, pool in pools:
+                if name in acquired:
+                    pool.release(acquired[name])
+
+    async def _invoke_async_with_resources(self, route, pools, request):
+        if not route.is_async:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._invoke_with_resources, route, pools, request)
+        acquired = {}
+        try:
+            for name, pool in pools:
+                acquired[name] = await self._acquire_async(pool)
+            return await self._invoke_async(route, request, acquired)
+        finally:
+            for name, pool in pools:
+                if name in acquired:
+                    pool.release(acquired[name])
+
+    async def _acquire_async(self, pool):
+        future = asyncio.get_running_loop().run_in_executor(None, pool.acquire)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # поток всё равно получит ресурс: по дедлайну его надо вернуть в пул, иначе слот утечёт
+            future.add_done_callback(partial(_release_abandoned, pool))
+            raise
+
+    def _handler_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.timeout_workers, thread_name_prefix='handler')
+            return self._executor
+
+    def _close_executor(self):
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _invoke_with_deadline(self, endpoint, route, timeout, request):
+        request.deadline = time.monotonic() + timeout
+        future = self._handler_executor().submit(endpoint, request)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            if not future.cancel():
+                # брошенный обработчик ещё может читать wsgi.input: соединение нельзя дочитывать и переиспользовать
+                request.environ['framework.abandoned'] = True
+            return self._timed_out(route)
+
+    async def _invoke_async_with_deadline(self, endpoint, route, timeout, request):
+        request.deadline = time.monotonic() + timeout
+        try:
+            return await asyncio.wait_for(endpoint(request), timeout)
+        except asyncio.TimeoutError:
+            return self._timed_out(route)
+
+    def _run_coroutine(self, endpoint, request):
+        return asyncio.run(endpoint(request))
+
+    def _timed_out(self, route):
+        with self._executor_lock:
+            self.timeouts[route.pattern] = self.timeouts.get(route.pattern, 0) + 1
+        if self.metrics is not None:
+            self.metrics.timed_out(route.pattern)
+        return GatewayTimeout().to_response()
+
+    def _make_response(self, result, request=None):
+        if isinstance(result, Response):
+            if result.tasks is not None and request is not None:
+                # задачи переносим в запрос: middleware может подменить ответ, а кэш - переиспользовать его
+                if request.tasks is None:
+                    request.tasks = []
+                request.tasks.extend(result.tasks)
+                result.tasks = None
+            return result
+        if isinstance(result, (dict, list)):
+            return JSONResponse(result, backend=self.json)
+        return Response(body=result)
+
+    def _error_response(self, error):
+        if isinstance(error, HTTPError):
+            return error.to_response()
+        error_body = f'500 Internal Server Error: {str(error)}'
+        return Response(body=error_body, status=500)
+
+    async def asgi(self, scope, receive, send):
+        await serve_asgi(self, scope, receive, send)
+
+    def run(self, host='127.0.0.1', port=8000, server='http', workers=None, max_requests=0, timeout=30,
+            threads=None, queue_size=None, connection_timeout=None, keep_alive_timeout=5.0):
+        pool = None
+        if threads:
+            pool = {'threads': threads, 'queue_size': queue_size, 'connection_timeout': connection_timeout}
+        # таблицы маршрутов собираем до fork, чтобы воркеры получили их готовыми
+        self.compile()
+
+        if workers:
+            if self.metrics is not None and self.metrics.directory is None:
+                self.metrics.directory = tempfile.mkdtemp(prefix='framework-metrics-')
+            print(f"Working on http://{host}:{port}/ with {workers} workers")
+            Arbiter(
+                self, host, port, workers, server=server, max_requests=max_requests, timeout=timeout, threads=pool,
+                keep_alive_timeout=keep_alive_timeout,
+            ).run()
+            return
+        if server == 'asyncio':
             print(f"Working on http://{host}:{port}/")
-            httpd.serve_forever()
+            asyncio.run(self._serve_async(host, port, keep_alive_timeout))
+            return
+        if server == 'http':
+            if pool is not None:
+                httpd = ThreadPoolHTTPServer((host, port), self, keep_alive_timeout=keep_alive_timeout, **pool)
+            else:
+                httpd = HTTPServer((host, port), self, keep_alive_timeout=keep_alive_timeout)
+        elif server == 'wsgiref':
+            if pool is not None:
+                httpd = ThreadPoolWSGIServer((host, port), **pool)
+                httpd.set_app(self)
+            else:
+                httpd = make_server(host, port, self)
+        else:
+            raise ValueError(f'Unknown server: {server}')
+        self.server = httpd
+        self.startup()
+        try:
+            with httpd:
+                print(f"Working on http://{host}:{port}/")
+                httpd.serve_forever()
+        finally:
+            self.shutdown()
+
+    async def _serve_async(self, host, port, keep_alive_timeout=5.0):
+        await self.startup_async()
+        try:
+            await AsyncServer(self, host, port, keep_alive_timeout=keep_alive_timeout).serve_forever()
+        finally:
+            await self.shutdown_async()
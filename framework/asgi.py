@@ -0,0 +1,225 @@
+import asyncio
+from tempfile import SpooledTemporaryFile
+from urllib.parse import quote
+
+from .exceptions import BadRequest, RequestEntityTooLarge
+from .http import build_environ
+from .multipart import SPOOL_SIZE
+from .request import Request
+
+_DONE = object()
+
+
+def environ_from_scope(scope, wsgi_input):
+    raw_path = scope.get('raw_path') or quote(scope['path']).encode('latin-1')
+    target = raw_path.decode('latin-1')
+    query = scope.get('query_string', b'')
+    if query:
+        target += '?' + query.decode('latin-1')
+    headers = [(name.decode('latin-1'), value.decode('latin-1')) for name, value in scope.get('headers', ())]
+    environ = build_environ(
+        scope.get('method', 'GET'), target, 'HTTP/' + scope.get('http_version', '1.1'), headers, wsgi_input,
+        scope.get('server') or ('localhost', 80), scope.get('client'), multithread=True,
+    )
+    environ['SCRIPT_NAME'] = scope.get('root_path', '')
+    environ['wsgi.url_scheme'] = scope.get('scheme', 'http')
+    environ['asgi.scope'] = scope
+    return environ
+
+
+class ReceiveStream:
+    def __init__(self, receive, loop, limit=None, spool_size=SPOOL_SIZE):
+        self.receive = receive
+        self.loop = loop
+        self.limit = limit
+        self.spool_size = spool_size
+        self.size = 0
+        self.done = False
+        self.disconnected = False
+        self.closed = False
+        self.file = None
+        self.buffer = bytearray()
+
+    async def _next(self):
+        if self.closed:
+            raise BadRequest('Request is already finished')
+        message = await self.receive()
+        if message['type'] == 'http.disconnect':
+            self.done = self.disconnected = True
+            raise BadRequest('Client disconnected')
+        chunk = message.get('body', b'')
+        self.size += len(chunk)
+        if self.limit is not None and self.size > self.limit:
+            self.done = True
+            raise RequestEntityTooLarge()
+        if not message.get('more_body', False):
+            self.done = True
+        return chunk
+
+    def _pull(self):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            raise RuntimeError('Request body must be spooled before it is read from the event loop')
+        # синхронный обработчик живёт в потоке пула: тянем сообщения из цикла по мере чтения
+        self.buffer += asyncio.run_coroutine_threadsafe(self._next(), self.loop).result()
+
+    async def spool(self):
+        if self.file is not None:
+            return
+        file = SpooledTemporaryFile(max_size=self.spool_size)
+        file.write(self.buffer)
+        self.buffer.clear()
+        while not self.done:
+            file.write(await self._next())
+        file.seek(0)
+        self.file = file
+
+    def read(self, size=-1):
+        if self.file is not None:
+            return self.file.read(size)
+        if size is None or size < 0:
+            while not self.done:
+                self._pull()
+            size = len(self.buffer)
+        else:
+            while len(self.buffer) < size and not self.done:
+                self._pull()
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def readline(self, size=-1):
+        if self.file is not None:
+            return self.file.readline(size)
+        start = 0
+        while True:
+            end = self.buffer.find(b'\n', start)
+            if end >= 0:
+                end += 1
+                break
+            if self.done or 0 <= size <= len(self.buffer):
+                end = len(self.buffer)
+                break
+            start = len(self.buffer)
+            self._pull()
+        if 0 <= size < end:
+            end = size
+        data = bytes(self.buffer[:end])
+        del self.buffer[:end]
+        return data
+
+    def close(self):
+        self.closed = True
+        if self.file is not None:
+            self.file.close()
+
+
+async def iterate(iterable):
+    if isinstance(iterable, (list, tuple)):
+        for chunk in iterable:
+            yield chunk
+        return
+    loop = asyncio.get_running_loop()
+    iterator = iter(iterable)
+    while True:
+        chunk = await loop.run_in_executor(None, next, iterator, _DONE)
+        if chunk is _DONE:
+            return
+        yield chunk
+
+
+async def send_response(response, environ, send):
+    started = []
+
+    def start_response(status, headers, exc_info=None):
+        started[:] = [status, headers]
+
+    iterable = response(environ, start_response)
+    try:
+        status, headers = started
+        await send({
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(name.lower().encode('latin-1'), str(value).encode('latin-1')) for name, value in headers],
+        })
+        async for chunk in iterate(iterable):
+            if chunk:
+                await send({'type': 'http.response.body', 'body': bytes(chunk), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    finally:
+        close = getattr(iterable, 'close', None)
+        if close is not None:
+            close()
+
+
+async def serve_lifespan(app, receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await app.startup_async()
+            except Exception as e:
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            try:
+                await app.shutdown_async()
+            except Exception as e:
+                await send({'type': 'lifespan.shutdown.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def serve_asgi(app, scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await serve_lifespan(app, receive, send)
+        return
+    if scope['type'] != 'http':
+        raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    trace = app.tracer.start() if app.tracer is not None else None
+    environ = environ_from_scope(scope, None)
+    if app.shedder is not None:
+        rejected = app.shedder.enter(environ)
+        if rejected is not None:
+            await send_response(rejected, environ, send)
+            return
+        try:
+            await _serve_http(app, environ, receive, send, trace)
+        finally:
+            app.shedder.leave()
+        return
+    await _serve_http(app, environ, receive, send, trace)
+
+
+async def _serve_http(app, environ, receive, send, trace):
+    request = Request(environ, app.max_body_size, app.json)
+    limit = app.max_body_size
+    if limit is not None and request.content_length > limit:
+        response = RequestEntityTooLarge().to_response()
+        stream = None
+    else:
+        # тело не буферизуем заранее: его читают по мере надобности прямо из receive()
+        stream = environ['wsgi.input'] = ReceiveStream(receive, asyncio.get_running_loop(), limit)
+        environ['wsgi.input_terminated'] = True
+        if trace is not None:
+            trace.mark('parse')
+        response = await app.handle_async(request, trace)
+        if stream.disconnected:
+            stream.close()
+            return
+    try:
+        await send_response(response, environ, send)
+    finally:
+        if stream is not None:
+            stream.close()
+    if request.tasks is not None:
+        app.background.submit_all(request.tasks)
+    if trace is not None:
+        trace.mark('send')
+        app.tracer.finish(request, response, trace)
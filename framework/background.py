@@ -0,0 +1,204 @@
+import asyncio
+import inspect
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger('framework.background')
+
+
+class BackgroundTask:
+    __slots__ = ('fn', 'args', 'kwargs', 'attempts', 'queued_at')
+
+    def __init__(self, fn, args=(), kwargs=None):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.attempts = 0
+        self.queued_at = None
+
+    def run(self):
+        result = self.fn(*self.args, **self.kwargs)
+        if inspect.isawaitable(result):
+            asyncio.run(result)
+
+    def __repr__(self):
+        return f'<BackgroundTask {getattr(self.fn, "__qualname__", self.fn)!r}>'
+
+
+class TaskQueue:
+    def __init__(self, workers=4, max_queue=1000, retries=0, retry_delay=0.1, drain_timeout=30.0,
+                 name='background'):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.drain_timeout = drain_timeout
+        self.name = name
+        self.closed = False
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.rejected = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self._queue = queue.Queue(max_queue)
+        self._threads = []
+        self._pending = 0
+        self._active = 0
+        self._cond = threading.Condition()
+
+    def _start(self):
+        # потоки поднимаем при первой задаче, чтобы приложение без фоновых задач ничего не платило
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'{self.name}-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def add(self, fn, *args, **kwargs):
+        return self.submit(BackgroundTask(fn, args, kwargs))
+
+    def submit(self, task):
+        with self._cond:
+            if self.closed:
+                self.rejected += 1
+                logger.warning('Background queue %r is closed, dropping %r', self.name, task)
+                return False
+            if not self._threads:
+                self._start()
+            task.queued_at = time.monotonic()
+            try:
+                self._queue.put_nowait(task)
+            except queue.Full:
+                self.rejected += 1
+                logger.warning('Background queue %r is full, dropping %r', self.name, task)
+                return False
+            self.submitted += 1
+            self._pending += 1
+        return True
+
+    def submit_all(self, tasks):
+        for task in tasks:
+            self.submit(task)
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            with self._cond:
+                self._active += 1
+            try:
+                task.attempts += 1
+                task.run()
+            except Exception:
+                if task.attempts <= self.retries and not self.closed:
+                    self._retry(task)
+                    continue
+                logger.exception('Background task %r failed after %d attempt(s)', task, task.attempts)
+                self._finish(task, failed=True)
+            else:
+                self._finish(task)
+
+    def _retry(self, task):
+        with self._cond:
+            self._active -= 1
+            self.retried += 1
+        delay = self.retry_delay * 2 ** (task.attempts - 1)
+        # повтор ставим по таймеру, чтобы не занимать воркер на время задержки
+        timer = threading.Timer(delay, self._requeue, (task,))
+        timer.daemon = True
+        timer.start()
+
+    def _requeue(self, task):
+        try:
+            self._queue.put_nowait(task)
+        except queue.Full:
+            logger.warning('Background queue %r is full, dropping retry of %r', self.name, task)
+            self._finish(task, failed=True, active=False)
+
+    def _finish(self, task, failed=False, active=True):
+        latency = time.monotonic() - task.queued_at
+        with self._cond:
+            if active:
+                self._active -= 1
+            self._pending -= 1
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+            self.latency_total += latency
+            if latency > self.latency_max:
+                self.latency_max = latency
+            self._cond.notify_all()
+
+    def drain(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=None):
+        timeout = self.drain_timeout if timeout is None else timeout
+        with self._cond:
+            self.closed = True
+        drained = self.drain(timeout)
+        if not drained:
+            logger.warning('Background queue %r closed with %d unfinished task(s)', self.name, self._pending)
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        if drained:
+            for thread in self._threads:
+                thread.join()
+        with self._cond:
+            self._threads = []
+            self.closed = False
+        return drained
+
+    def stats(self):
+        with self._cond:
+            finished = self.completed + self.failed
+            return {
+                'workers': self.workers,
+                'queue_depth': self._queue.qsize(),
+                'queue_size': self.max_queue,
+                'pending': self._pending,
+                'active': self._active,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'retried': self.retried,
+                'rejected': self.rejected,
+                'latency_avg': self.latency_total / finished if finished else 0.0,
+                'latency_max': self.latency_max,
+            }
+
+
+class TaskIterable:
+    __slots__ = ('iterable', 'tasks', 'task_queue')
+
+    def __init__(self, iterable, tasks, task_queue):
+        self.iterable = iterable
+        self.tasks = tasks
+        self.task_queue = task_queue
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def close(self):
+        # WSGI сервер вызывает close() после отправки тела: самое время для фоновых задач
+        try:
+            close = getattr(self.iterable, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self.task_queue.submit_all(self.tasks)
@@ -0,0 +1,209 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import parse_qsl
+
+from .middleware import Middleware
+from .response import FileResponse, Response, StreamingResponse
+
+CACHEABLE_METHODS = ('GET', 'HEAD')
+ENTRY_OVERHEAD = 256
+
+
+class CacheEntry:
+    __slots__ = ('response', 'etag', 'last_modified', 'modified_at', 'expires', 'size')
+
+    def __init__(self, response, etag, modified_at, expires):
+        self.response = response
+        self.etag = etag
+        self.modified_at = modified_at
+        self.last_modified = formatdate(modified_at, usegmt=True)
+        self.expires = expires
+        self.size = response.length + ENTRY_OVERHEAD
+
+
+class LRUCache:
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires <= now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, entry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = entry
+            self.size += entry.size
+            while len(self._data) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def _remove(self, key):
+        entry = self._data.pop(key)
+        self.size -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'bytes': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+def make_etag(*chunks):
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in chunks:
+        digest.update(chunk)
+    return '"' + digest.hexdigest() + '"'
+
+
+def etag_matches(header, etag):
+    if header.strip() == '*':
+        return True
+    weak = etag[2:] if etag.startswith('W/') else etag
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == weak:
+            return True
+    return False
+
+
+def not_modified(environ, entry):
+    if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return etag_matches(if_none_match, entry.etag)
+    if_modified_since = environ.get('HTTP_IF_MODIFIED_SINCE')
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(entry.modified_at) <= since
+    return False
+
+
+def not_modified_response(entry):
+    response = Response(status=304, headers={'ETag': entry.etag, 'Last-Modified': entry.last_modified})
+    del response.headers['Content-Type']
+    del response.headers['Content-Length']
+    cache_control = entry.response.headers.get('Cache-Control')
+    if cache_control is not None:
+        response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def is_cacheable(response):
+    if response.status != 200 or isinstance(response, (StreamingResponse, FileResponse)):
+        return False
+    headers = response.headers
+    if 'Set-Cookie' in headers:
+        return False
+    cache_control = headers.get('Cache-Control', '').lower()
+    return 'no-store' not in cache_control and 'private' not in cache_control
+
+
+class ResponseCache:
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        self.store = LRUCache(max_entries, max_bytes)
+
+    def key(self, request, vary):
+        environ = request.environ
+        query = environ.get('QUERY_STRING', '')
+        if query:
+            query = tuple(sorted(parse_qsl(query, keep_blank_values=True)))
+        method = request.method
+        if method == 'HEAD':
+            method = 'GET'
+        varying = tuple(environ.get('HTTP_' + name.upper().replace('-', '_')) for name in vary)
+        return method, request.path, query, varying
+
+    def lookup(self, request, vary=()):
+        if request.method not in CACHEABLE_METHODS:
+            return None
+        entry = self.store.get(self.key(request, vary), time.time())
+        if entry is None:
+            return None
+        if not_modified(request.environ, entry):
+            return not_modified_response(entry)
+        return entry.response
+
+    def save(self, request, response, ttl, vary=()):
+        if request.method not in CACHEABLE_METHODS or not is_cacheable(response):
+            return response
+        now = time.time()
+        headers = response.headers
+        etag = headers.get('ETag') or make_etag(*response.chunks())
+        entry = CacheEntry(response, etag, now, now + ttl)
+        headers['ETag'] = etag
+        headers['Last-Modified'] = entry.last_modified
+        if 'Cache-Control' not in headers:
+            headers['Cache-Control'] = f'max-age={int(ttl)}'
+        if vary:
+            headers['Vary'] = ', '.join(vary)
+        self.store.set(self.key(request, vary), entry)
+        if not_modified(request.environ, entry):
+            return not_modified_response(entry)
+        return response
+
+    def clear(self):
+        self.store.clear()
+
+    def stats(self):
+        return self.store.stats()
+
+
+class CacheMiddleware(Middleware):
+    def __init__(self, cache, ttl, vary=()):
+        self.cache = cache
+        self.ttl = ttl
+        self.vary = tuple(vary)
+
+    def before(self, request):
+        return self.cache.lookup(request, self.vary)
+
+    def after(self, request, response):
+        return self.cache.save(request, response, self.ttl, self.vary)
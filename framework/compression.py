@@ -0,0 +1,161 @@
+import zlib
+
+from .cache import LRUCache
+from .middleware import Middleware
+from .response import FileResponse, Response, StreamingResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/xhtml+xml',
+    'image/svg+xml',
+)
+COMPRESSIBLE_SUFFIXES = ('+json', '+xml')
+
+SKIP_STATUSES = (204, 206, 304)
+
+
+class CompressedEntry:
+    __slots__ = ('response', 'size', 'expires')
+
+    def __init__(self, response):
+        self.response = response
+        self.size = response.length
+        self.expires = float('inf')
+
+
+def parse_accept_encoding(header):
+    encodings = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[name] = quality
+    return encodings
+
+
+def is_compressible(content_type):
+    content_type = content_type.split(';', 1)[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or content_type.endswith(COMPRESSIBLE_SUFFIXES)
+
+
+def _add_vary(headers, value):
+    vary = headers.get('Vary')
+    if not vary:
+        headers['Vary'] = value
+    elif value.lower() not in (item.strip().lower() for item in vary.split(',')):
+        headers['Vary'] = f'{vary}, {value}'
+
+
+class Compressor(Middleware):
+    def __init__(self, min_size=500, level=6, cache_entries=256, cache_max_bytes=16 * 1024 * 1024):
+        self.min_size = min_size
+        self.level = level
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+        self.cache = LRUCache(cache_entries, cache_max_bytes)
+
+    def negotiate(self, header):
+        if not header:
+            return None
+        accepted = parse_accept_encoding(header)
+        best, best_quality = None, 0.0
+        for encoding in self.encodings:
+            quality = accepted.get(encoding, accepted.get('*', 0.0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, chunks, encoding):
+        if isinstance(chunks, (bytes, bytearray, memoryview)):
+            chunks = (chunks,)
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=min(self.level, 11))
+            process, finish = compressor.process, compressor.finish
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+            process, finish = compressor.compress, compressor.flush
+        compressed = [process(chunk) for chunk in chunks]
+        compressed.append(finish())
+        return compressed
+
+    def compress_stream(self, chunks, encoding):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=min(self.level, 11))
+            process, flush, finish = compressor.process, compressor.flush, compressor.finish
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+            process = compressor.compress
+            flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+            finish = compressor.flush
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                if chunk:
+                    data = process(chunk) + flush()
+                    if data:
+                        yield data
+            yield finish()
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    def apply(self, request, response):
+        if response.status in SKIP_STATUSES or isinstance(response, FileResponse):
+            return response
+        headers = response.headers
+        if 'Content-Encoding' in headers or not is_compressible(headers.get('Content-Type', '')):
+            return response
+
+        streaming = isinstance(response, StreamingResponse)
+        if not streaming and response.length < self.min_size:
+            return response
+
+        encoding = self.negotiate(request.environ.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            _add_vary(headers, 'Accept-Encoding')
+            return response
+
+        new_headers = dict(headers)
+        _add_vary(new_headers, 'Accept-Encoding')
+        new_headers['Content-Encoding'] = encoding
+        etag = new_headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            new_headers['ETag'] = 'W/' + etag
+
+        if streaming:
+            new_headers.pop('Content-Length', None)
+            return StreamingResponse(self.compress_stream(response.body, encoding), response.status, new_headers)
+
+        # ETag уникален только в пределах ресурса, поэтому в ключе ещё и путь
+        cache_key = (request.path, etag, encoding) if etag else None
+        if cache_key is not None:
+            entry = self.cache.get(cache_key, 0)
+            if entry is not None:
+                return entry.response
+        compressed = Response(self.compress(response.chunks(), encoding), response.status, new_headers)
+        if cache_key is not None:
+            self.cache.set(cache_key, CompressedEntry(compressed))
+        return compressed
+
+    def after(self, request, response):
+        return self.apply(request, response)
+
+    def stats(self):
+        return self.cache.stats()
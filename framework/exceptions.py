@@ -0,0 +1,42 @@
+from .response import Response
+
+
+class HTTPError(Exception):
+    status = 500
+    message = 'Internal Server Error'
+
+    def __init__(self, message=None, status=None, headers=None):
+        if status is not None:
+            self.status = status
+        if message is not None:
+            self.message = message
+        self.headers = headers or {}
+        super().__init__(self.message)
+
+    def to_response(self):
+        return Response(body=f'{self.status} {self.message}', status=self.status, headers=dict(self.headers))
+
+
+class BadRequest(HTTPError):
+    status = 400
+    message = 'Bad Request'
+
+
+class MethodNotAllowed(HTTPError):
+    status = 405
+    message = 'Method Not Allowed'
+
+
+class RequestEntityTooLarge(HTTPError):
+    status = 413
+    message = 'Content Too Large'
+
+
+class NotFound(HTTPError):
+    status = 404
+    message = 'Not Found'
+
+
+class GatewayTimeout(HTTPError):
+    status = 504
+    message = 'Gateway Timeout'
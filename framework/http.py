@@ -0,0 +1,104 @@
+import sys
+import time
+from email.utils import formatdate
+from urllib.parse import unquote
+
+MAX_HEAD_SIZE = 64 * 1024
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def parse_head(head):
+    lines = head.decode('latin-1').split('\r\n')
+    parts = lines[0].split(' ')
+    if len(parts) != 3:
+        raise ProtocolError(f'Malformed request line: {lines[0]!r}')
+    method, target, version = parts
+    if version not in ('HTTP/1.0', 'HTTP/1.1'):
+        raise ProtocolError(f'Unsupported protocol: {version!r}')
+
+    headers = []
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(':')
+        if not sep or not name or name != name.strip():
+            raise ProtocolError(f'Malformed header line: {line!r}')
+        headers.append((name, value.strip()))
+    return method, target, version, headers
+
+
+def build_environ(method, target, version, headers, wsgi_input, server_address, client_address,
+                  multithread=False, multiprocess=False):
+    path, _, query = target.partition('?')
+    environ = {
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': unquote(path, 'latin-1'),
+        'QUERY_STRING': query,
+        'SERVER_NAME': server_address[0],
+        'SERVER_PORT': str(server_address[1]),
+        'SERVER_PROTOCOL': version,
+        'REMOTE_ADDR': client_address[0] if client_address else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': wsgi_input,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': multithread,
+        'wsgi.multiprocess': multiprocess,
+        'wsgi.run_once': False,
+    }
+    for name, value in headers:
+        key = name.upper().replace('-', '_')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = 'HTTP_' + key
+        if key in environ:
+            environ[key] += ',' + value
+        else:
+            environ[key] = value
+    return environ
+
+
+def wants_keep_alive(environ):
+    connection = environ.get('HTTP_CONNECTION', '').lower()
+    if environ['SERVER_PROTOCOL'] == 'HTTP/1.1':
+        return 'close' not in connection
+    return 'keep-alive' in connection
+
+
+_date_cache = [0, '']
+
+
+def http_date():
+    now = int(time.time())
+    if _date_cache[0] != now:
+        _date_cache[0] = now
+        _date_cache[1] = formatdate(now, usegmt=True)
+    return _date_cache[1]
+
+
+def response_head(version, status, headers, keep_alive, chunked):
+    lines = [f'{version} {status}']
+    for name, value in headers:
+        lines.append(f'{name}: {value}')
+    lines.append(f'Date: {http_date()}')
+    if chunked:
+        lines.append('Transfer-Encoding: chunked')
+    lines.append('Connection: keep-alive' if keep_alive else 'Connection: close')
+    lines.append('\r\n')
+    return '\r\n'.join(lines).encode('latin-1')
+
+
+def encode_chunk(data):
+    return b'%x\r\n%s\r\n' % (len(data), data)
+
+
+LAST_CHUNK = b'0\r\n\r\n'
+
+
+def error_response(status, version='HTTP/1.1', headers=()):
+    body = status.encode('latin-1')
+    headers = [('Content-Type', 'text/plain; charset=utf-8'), ('Content-Length', str(len(body))), *headers]
+    return response_head(version, status, headers, False, False) + body
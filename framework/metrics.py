@@ -0,0 +1,253 @@
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left
+from time import monotonic
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED = '<unmatched>'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+logger = logging.getLogger('framework.metrics')
+
+
+class Metrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS, directory=None, flush_interval=1.0, prefix='framework'):
+        self.buckets = tuple(sorted(buckets))
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.series = {}
+            self.timeouts = {}
+            self.in_flight = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self._next_flush = 0.0
+
+    def started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def observe(self, route, method, status, duration, bytes_in=0, bytes_out=0):
+        index = bisect_left(self.buckets, duration)
+        with self.lock:
+            series = self.series.get((route, method))
+            if series is None:
+                series = self.series[(route, method)] = [[0] * (len(self.buckets) + 1), 0.0, {}]
+            series[0][index] += 1
+            series[1] += duration
+            statuses = series[2]
+            statuses[status] = statuses.get(status, 0) + 1
+            self.in_flight -= 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+        if self.directory is not None and monotonic() >= self._next_flush:
+            # сбрасывает один поток, остальные не ждут: метрики не должны тормозить и ронять запрос
+            if self._flush_lock.acquire(blocking=False):
+                try:
+                    if monotonic() >= self._next_flush:
+                        self._write()
+                except OSError:
+                    logger.warning('Failed to flush metrics to %r', self.directory, exc_info=True)
+                finally:
+                    self._flush_lock.release()
+
+    def timed_out(self, route):
+        with self.lock:
+            self.timeouts[route] = self.timeouts.get(route, 0) + 1
+
+    def add_bytes_out(self, size):
+        with self.lock:
+            self.bytes_out += size
+
+    def count_body(self, chunks):
+        size = 0
+        try:
+            for chunk in chunks:
+                size += len(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+                yield chunk
+        finally:
+            self.add_bytes_out(size)
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'buckets': list(self.buckets),
+                'requests': [
+                    [*key, status, count] for key, (_, _, statuses) in self.series.items()
+                    for status, count in statuses.items()
+                ],
+                'latency': [[*key, list(counts), total] for key, (counts, total, _) in self.series.items()],
+                'timeouts': [[route, count] for route, count in self.timeouts.items()],
+                'in_flight': self.in_flight,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+            }
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f'metrics-{pid}.json')
+
+    def flush(self):
+        with self._flush_lock:
+            self._write()
+
+    def _write(self):
+        self._next_flush = monotonic() + self.flush_interval
+        path = self._path(os.getpid())
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def collect(self):
+        if self.directory is None:
+            return self.snapshot()
+        own = self._path(os.getpid())
+        snapshots = [self.snapshot()]
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not (name.startswith('metrics-') and name.endswith('.json')) or path == own:
+                continue
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return merge(snapshots)
+
+    def render(self):
+        return render(self.collect(), self.prefix)
+
+
+def merge(snapshots):
+    requests = {}
+    latency = {}
+    timeouts = {}
+    result = {'buckets': None, 'in_flight': 0, 'bytes_in': 0, 'bytes_out': 0}
+    for snapshot in snapshots:
+        if result['buckets'] is None:
+            result['buckets'] = snapshot['buckets']
+        elif snapshot['buckets'] != result['buckets']:
+            continue
+        for route, method, status, count in snapshot['requests']:
+            key = (route, method, status)
+            requests[key] = requests.get(key, 0) + count
+        for route, method, counts, total in snapshot['latency']:
+            series = latency.get((route, method))
+            if series is None:
+                latency[(route, method)] = [list(counts), total]
+            else:
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+        for route, count in snapshot.get('timeouts', ()):
+            timeouts[route] = timeouts.get(route, 0) + count
+        for name in ('in_flight', 'bytes_in', 'bytes_out'):
+            result[name] += snapshot[name]
+    result['buckets'] = result['buckets'] or []
+    result['requests'] = [[*key, count] for key, count in requests.items()]
+    result['latency'] = [[route, method, counts, total] for (route, method), (counts, total) in latency.items()]
+    result['timeouts'] = [[route, count] for route, count in timeouts.items()]
+    return result
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def render(snapshot, prefix='framework'):
+    lines = [
+        f'# HELP {prefix}_requests_total Total number of HTTP requests.',
+        f'# TYPE {prefix}_requests_total counter',
+    ]
+    for route, method, status, count in sorted(snapshot['requests']):
+        lines.append(f'{prefix}_requests_total{_labels(route=route, method=method, status=status)} {count}')
+
+    name = f'{prefix}_request_duration_seconds'
+    lines.append(f'# HELP {name} Request handling latency in seconds.')
+    lines.append(f'# TYPE {name} histogram')
+    bounds = [repr(float(bound)) for bound in snapshot['buckets']] + ['+Inf']
+    for route, method, counts, total in sorted(snapshot['latency']):
+        cumulative = 0
+        for bound, count in zip(bounds, counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(route=route, method=method, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(route=route, method=method)} {total}')
+        lines.append(f'{name}_count{_labels(route=route, method=method)} {cumulative}')
+
+    lines.append(f'# HELP {prefix}_request_timeouts_total Requests that exceeded their deadline.')
+    lines.append(f'# TYPE {prefix}_request_timeouts_total counter')
+    for route, count in sorted(snapshot.get('timeouts', ())):
+        lines.append(f'{prefix}_request_timeouts_total{_labels(route=route)} {count}')
+
+    lines.extend([
+        f'# HELP {prefix}_requests_in_flight Requests currently being handled.',
+        f'# TYPE {prefix}_requests_in_flight gauge',
+        f'{prefix}_requests_in_flight {snapshot["in_flight"]}',
+        f'# HELP {prefix}_request_bytes_total Request body bytes received.',
+        f'# TYPE {prefix}_request_bytes_total counter',
+        f'{prefix}_request_bytes_total {snapshot["bytes_in"]}',
+        f'# HELP {prefix}_response_bytes_total Response body bytes sent.',
+        f'# TYPE {prefix}_response_bytes_total counter',
+        f'{prefix}_response_bytes_total {snapshot["bytes_out"]}',
+    ])
+    return '\n'.join(lines) + '\n'
+
+
+POOL_METRICS = (
+    ('size', 'pool_size', 'gauge', 'Maximum number of pooled resources.'),
+    ('in_use', 'pool_in_use', 'gauge', 'Resources currently checked out.'),
+    ('idle', 'pool_idle', 'gauge', 'Idle resources kept in the pool.'),
+    ('acquired', 'pool_acquired_total', 'counter', 'Successful acquisitions.'),
+    ('timeouts', 'pool_timeouts_total', 'counter', 'Acquisitions that timed out.'),
+    ('wait_seconds_total', 'pool_wait_seconds_total', 'counter', 'Total time spent waiting to acquire.'),
+    ('wait_seconds_max', 'pool_wait_seconds_max', 'gauge', 'Longest wait to acquire.'),
+)
+
+
+def render_pools(stats, prefix='framework'):
+    if not stats:
+        return ''
+    lines = []
+    for key, name, kind, description in POOL_METRICS:
+        lines.append(f'# HELP {prefix}_{name} {description}')
+        lines.append(f'# TYPE {prefix}_{name} {kind}')
+        for pool, values in sorted(stats.items()):
+            lines.append(f'{prefix}_{name}{_labels(pool=pool)} {values[key]}')
+    return '\n'.join(lines) + '\n'
+
+
+BACKGROUND_METRICS = (
+    ('queue_depth', 'background_queue_depth', 'gauge', 'Background tasks waiting in the queue.'),
+    ('active', 'background_active', 'gauge', 'Background tasks currently running.'),
+    ('completed', 'background_completed_total', 'counter', 'Background tasks finished successfully.'),
+    ('failed', 'background_failed_total', 'counter', 'Background tasks that failed after all retries.'),
+    ('retried', 'background_retried_total', 'counter', 'Background task retries.'),
+    ('rejected', 'background_rejected_total', 'counter', 'Background tasks dropped because the queue was full.'),
+    ('latency_avg', 'background_latency_seconds_avg', 'gauge', 'Average time from enqueue to completion.'),
+    ('latency_max', 'background_latency_seconds_max', 'gauge', 'Longest time from enqueue to completion.'),
+)
+
+
+def render_background(stats, prefix='framework'):
+    if not stats['submitted'] and not stats['rejected']:
+        return ''
+    lines = []
+    for key, name, kind, description in BACKGROUND_METRICS:
+        lines.append(f'# HELP {prefix}_{name} {description}')
+        lines.append(f'# TYPE {prefix}_{name} {kind}')
+        lines.append(f'{prefix}_{name} {stats[key]}')
+    return '\n'.join(lines) + '\n'
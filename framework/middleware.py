@@ -0,0 +1,81 @@
+class Middleware:
+    def before(self, request):
+        return None
+
+    def after(self, request, response):
+        return response
+
+
+def _hooks(middleware):
+    layers = []
+    for mw in middleware:
+        before = getattr(mw, 'before', None)
+        after = getattr(mw, 'after', None)
+        if isinstance(mw, Middleware):
+            if type(mw).before is Middleware.before:
+                before = None
+            if type(mw).after is Middleware.after:
+                after = None
+        layers.append((before, after))
+    return tuple(layers)
+
+
+def compile_chain(middleware, endpoint):
+    layers = _hooks(middleware)
+    if not layers:
+        return endpoint
+
+    if all(before is None for before, _ in layers):
+        afters = tuple(after for _, after in reversed(layers) if after is not None)
+
+        def chain(request):
+            response = endpoint(request)
+            for after in afters:
+                response = after(request, response)
+            return response
+
+        return chain
+
+    def chain(request):
+        entered = 0
+        for before, _ in layers:
+            if before is not None:
+                response = before(request)
+                if response is not None:
+                    break
+            entered += 1
+        else:
+            response = endpoint(request)
+        while entered:
+            entered -= 1
+            after = layers[entered][1]
+            if after is not None:
+                response = after(request, response)
+        return response
+
+    return chain
+
+
+def compile_chain_async(middleware, endpoint):
+    layers = _hooks(middleware)
+    if not layers:
+        return endpoint
+
+    async def chain(request):
+        entered = 0
+        for before, _ in layers:
+            if before is not None:
+                response = before(request)
+                if response is not None:
+                    break
+            entered += 1
+        else:
+            response = await endpoint(request)
+        while entered:
+            entered -= 1
+            after = layers[entered][1]
+            if after is not None:
+                response = after(request, response)
+        return response
+
+    return chain
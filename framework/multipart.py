@@ -0,0 +1,278 @@
+import re
+import shutil
+from tempfile import SpooledTemporaryFile
+from urllib.parse import unquote, unquote_to_bytes
+
+from .exceptions import BadRequest, RequestEntityTooLarge
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_SIZE = 1024 * 1024
+MAX_FIELD_SIZE = 1024 * 1024
+MAX_HEADER_SIZE = 16 * 1024
+MAX_PARTS = 1000
+
+_PARAM = re.compile(r';\s*([^\s;=]+)\s*(?:=\s*("(?:[^"\\]|\\.)*"|[^;]*))?')
+
+
+def parse_options_header(value):
+    if not value:
+        return '', {}
+    main, _, rest = value.partition(';')
+    params = {}
+    for name, raw in _PARAM.findall(';' + rest):
+        raw = raw.strip()
+        if raw[:1] == '"' and raw[-1:] == '"' and len(raw) > 1:
+            raw = re.sub(r'\\(.)', r'\1', raw[1:-1])
+        name = name.lower()
+        if name.endswith('*'):
+            # RFC 5987: filename*=UTF-8''%D1%84%D0%B0%D0%B9%D0%BB.txt
+            charset, _, encoded = raw.partition("''")
+            try:
+                raw = unquote(encoded, charset or 'utf-8', 'strict')
+            except (LookupError, UnicodeDecodeError):
+                continue
+            name = name[:-1]
+        elif name in params:
+            continue
+        params[name] = raw
+    return main.strip().lower(), params
+
+
+def add_value(target, name, value):
+    existing = target.get(name)
+    if existing is None:
+        target[name] = value
+    elif isinstance(existing, list):
+        existing.append(value)
+    else:
+        target[name] = [existing, value]
+
+
+class UploadedFile:
+    def __init__(self, name, filename, content_type, headers, spool_size=SPOOL_SIZE):
+        self.name = name
+        self.filename = filename
+        self.content_type = content_type
+        self.headers = headers
+        self.file = SpooledTemporaryFile(max_size=spool_size)
+        self.size = 0
+
+    def write(self, data):
+        self.file.write(data)
+        self.size += len(data)
+
+    def seek(self, offset, whence=0):
+        return self.file.seek(offset, whence)
+
+    def read(self, size=-1):
+        return self.file.read(size)
+
+    def save(self, path, chunk_size=CHUNK_SIZE):
+        self.file.seek(0)
+        with open(path, 'wb') as target:
+            shutil.copyfileobj(self.file, target, chunk_size)
+        self.file.seek(0)
+
+    def close(self):
+        self.file.close()
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.name!r} filename={self.filename!r} size={self.size}>'
+
+
+class Field:
+    __slots__ = ('name', 'headers', 'data')
+
+    def __init__(self, name, headers):
+        self.name = name
+        self.headers = headers
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+
+class MultipartParser:
+    def __init__(self, stream, boundary, chunk_size=CHUNK_SIZE, spool_size=SPOOL_SIZE,
+                 max_field_size=MAX_FIELD_SIZE, max_parts=MAX_PARTS, charset='utf-8'):
+        if not boundary or len(boundary) > 200:
+            raise BadRequest('Invalid multipart boundary')
+        self.stream = stream
+        self.delimiter = b'\r\n--' + boundary.encode('latin-1')
+        self.chunk_size = chunk_size
+        self.spool_size = spool_size
+        self.max_field_size = max_field_size
+        self.max_parts = max_parts
+        self.charset = charset
+        self.buffer = bytearray()
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer += chunk
+        return True
+
+    def _expect(self, size):
+        while len(self.buffer) < size:
+            if not self._fill():
+                raise BadRequest('Unexpected end of multipart body')
+
+    def _skip_preamble(self):
+        # первая граница идёт без ведущего CRLF, поэтому подставляем его сами
+        self.buffer[:0] = b'\r\n'
+        opening = self.delimiter
+        while True:
+            index = self.buffer.find(opening)
+            if index >= 0:
+                del self.buffer[:index + len(opening)]
+                return
+            del self.buffer[:max(0, len(self.buffer) - len(opening))]
+            if not self._fill():
+                raise BadRequest('Multipart boundary not found')
+
+    def _after_delimiter(self):
+        self._expect(2)
+        if self.buffer[:2] == b'--':
+            return False
+        # после границы допустимы пробелы (transport padding)
+        while True:
+            self._expect(2)
+            if self.buffer[:2] == b'\r\n':
+                del self.buffer[:2]
+                return True
+            if self.buffer[:1] not in (b' ', b'\t'):
+                raise BadRequest('Malformed multipart boundary')
+            del self.buffer[:1]
+
+    def _read_headers(self):
+        self._expect(2)
+        if self.buffer[:2] == b'\r\n':
+            del self.buffer[:2]
+            return {}
+        start = 0
+        while True:
+            end = self.buffer.find(b'\r\n\r\n', start)
+            if end >= 0:
+                break
+            if len(self.buffer) > MAX_HEADER_SIZE:
+                raise BadRequest('Multipart headers too large')
+            start = max(0, len(self.buffer) - 3)
+            if not self._fill():
+                raise BadRequest('Unexpected end of multipart headers')
+        raw = bytes(self.buffer[:end]).decode('utf-8', 'replace')
+        del self.buffer[:end + 4]
+        headers = {}
+        for line in raw.split('\r\n'):
+            name, sep, value = line.partition(':')
+            if not sep:
+                raise BadRequest('Malformed multipart header')
+            headers[name.strip().lower()] = value.strip()
+        return headers
+
+    def _read_body(self, target, limit):
+        delimiter = self.delimiter
+        keep = len(delimiter) - 1
+        size = 0
+        while True:
+            index = self.buffer.find(delimiter)
+            if index >= 0:
+                data, rest = self.buffer[:index], index + len(delimiter)
+            else:
+                data, rest = self.buffer[:max(0, len(self.buffer) - keep)], None
+            if data:
+                size += len(data)
+                if limit is not None and size > limit:
+                    raise RequestEntityTooLarge('Form field too large')
+                target.write(data)
+            if rest is not None:
+                del self.buffer[:rest]
+                return
+            del self.buffer[:len(data)]
+            if not self._fill():
+                raise BadRequest('Unexpected end of multipart body')
+
+    def __iter__(self):
+        self._skip_preamble()
+        parts = 0
+        while self._after_delimiter():
+            parts += 1
+            if parts > self.max_parts:
+                raise RequestEntityTooLarge('Too many form parts')
+            headers = self._read_headers()
+            disposition, params = parse_options_header(headers.get('content-disposition'))
+            if disposition != 'form-data' or 'name' not in params:
+                raise BadRequest('Multipart part without form-data name')
+            if 'filename' in params:
+                part = UploadedFile(
+                    params['name'], params['filename'], headers.get('content-type', 'application/octet-stream'),
+                    headers, self.spool_size,
+                )
+                self._read_body(part, None)
+                part.seek(0)
+            else:
+                part = Field(params['name'], headers)
+                self._read_body(part, self.max_field_size)
+            yield part
+
+    def parse(self):
+        form, files = {}, {}
+        for part in self:
+            if isinstance(part, UploadedFile):
+                add_value(files, part.name, part)
+                continue
+            _, params = parse_options_header(part.headers.get('content-type'))
+            try:
+                value = part.data.decode(params.get('charset', self.charset))
+            except (LookupError, UnicodeDecodeError):
+                raise BadRequest(f'Form field {part.name!r} is not {self.charset} encoded') from None
+            add_value(form, part.name, value)
+        return form, files
+
+
+def _decode_pair(pair, charset):
+    name, _, value = pair.partition(b'=')
+    try:
+        return (
+            unquote_to_bytes(name.replace(b'+', b' ')).decode(charset),
+            unquote_to_bytes(value.replace(b'+', b' ')).decode(charset),
+        )
+    except UnicodeDecodeError:
+        raise BadRequest(f'Form data is not {charset} encoded') from None
+
+
+def parse_urlencoded(stream, chunk_size=CHUNK_SIZE, max_field_size=MAX_FIELD_SIZE, max_parts=MAX_PARTS,
+                     charset='utf-8'):
+    form = {}
+    pending = bytearray()
+    parts = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        pending += chunk
+        pairs = pending.split(b'&')
+        pending = pairs.pop() if chunk else bytearray()
+        if len(pending) > max_field_size:
+            raise RequestEntityTooLarge('Form field too large')
+        for pair in pairs:
+            if not pair:
+                continue
+            parts += 1
+            if parts > max_parts:
+                raise RequestEntityTooLarge('Too many form fields')
+            add_value(form, *_decode_pair(bytes(pair), charset))
+        if not chunk:
+            return form
+
+
+def parse_form(stream, content_type, **options):
+    mimetype, params = parse_options_header(content_type)
+    if mimetype == 'multipart/form-data':
+        return MultipartParser(stream, params.get('boundary'), **options).parse()
+    if mimetype == 'application/x-www-form-urlencoded':
+        options.pop('spool_size', None)
+        return parse_urlencoded(stream, **options), {}
+    return {}, {}
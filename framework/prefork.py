@@ -0,0 +1,341 @@
+import asyncio
+import errno
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from .aioserver import AsyncServer
+from .server import HTTPServer, ThreadPoolHTTPServer
+from .threadpool import PoolRequestHandler, ThreadPoolMixIn
+
+logger = logging.getLogger('framework.prefork')
+
+
+def create_socket(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, 'SO_REUSEPORT'):
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        except OSError:
+            pass
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class SharedSocketWSGIServer(WSGIServer):
+    def __init__(self, sock, handler_class=WSGIRequestHandler):
+        super().__init__(sock.getsockname()[:2], handler_class, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.socket.setblocking(False)
+        self.server_name = socket.getfqdn(self.server_address[0])
+        self.server_port = self.server_address[1]
+        self.setup_environ()
+        self.service_hook = None
+
+    def get_request(self):
+        conn, address = self.socket.accept()
+        conn.setblocking(True)
+        return conn, address
+
+    def service_actions(self):
+        if self.service_hook is not None:
+            self.service_hook()
+
+
+class SharedSocketThreadPoolServer(ThreadPoolMixIn, SharedSocketWSGIServer):
+    pass
+
+
+def serve_wsgiref(app, sock, worker):
+    if worker.threads:
+        server = SharedSocketThreadPoolServer(sock, PoolRequestHandler)
+        server.configure_pool(**worker.threads)
+        server.start_pool()
+    else:
+        server = SharedSocketWSGIServer(sock)
+    server.set_app(app)
+    server.service_hook = worker.notify
+
+    def stop():
+        worker.stopping.wait()
+        server.shutdown()
+
+    threading.Thread(target=stop, daemon=True).start()
+    worker.app.startup()
+    try:
+        server.serve_forever(poll_interval=0.5)
+    finally:
+        if worker.threads:
+            server.stop_pool()
+        worker.app.shutdown()
+
+
+def serve_http(app, sock, worker):
+    if worker.threads:
+        server = ThreadPoolHTTPServer(
+            app=app, sock=sock, keep_alive_timeout=worker.keep_alive_timeout, **worker.threads,
+        )
+    else:
+        server = HTTPServer(app=app, sock=sock, keep_alive_timeout=worker.keep_alive_timeout)
+    server.service_hook = worker.notify
+
+    def stop():
+        worker.stopping.wait()
+        server.shutdown()
+
+    threading.Thread(target=stop, daemon=True).start()
+    worker.app.startup()
+    try:
+        server.serve_forever(poll_interval=0.5)
+    finally:
+        server.server_close()
+        worker.app.shutdown()
+
+
+def serve_asyncio(app, sock, worker):
+    async def main():
+        await worker.app.startup_async()
+        try:
+            server = AsyncServer(app, sock=sock, keep_alive_timeout=worker.keep_alive_timeout)
+            await server.start()
+            while not worker.stopping.is_set():
+                worker.notify()
+                await asyncio.sleep(0.5)
+            await server.close(timeout=worker.graceful_timeout)
+        finally:
+            await worker.app.shutdown_async()
+
+    asyncio.run(main())
+
+
+ARBITER_SIGNALS = (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD)
+
+SERVERS = {
+    'http': serve_http,
+    'wsgiref': serve_wsgiref,
+    'asyncio': serve_asyncio,
+}
+
+
+class Worker:
+    def __init__(self, app, sock, server, max_requests=0, graceful_timeout=30, threads=None, keep_alive_timeout=5.0):
+        self.app = app
+        self.sock = sock
+        self.serve = SERVERS[server]
+        self.max_requests = max_requests
+        self.graceful_timeout = graceful_timeout
+        self.threads = threads
+        self.keep_alive_timeout = keep_alive_timeout
+        self.requests = 0
+        self.pid = None
+        self.heartbeat = tempfile.TemporaryFile()
+        self._spin = 0
+        self.stopping = threading.Event()
+
+    def notify(self):
+        self._spin = 1 - self._spin
+        os.fchmod(self.heartbeat.fileno(), self._spin)
+
+    def last_update(self):
+        return os.fstat(self.heartbeat.fileno()).st_ctime
+
+    def count_request(self):
+        self.requests += 1
+        if self.max_requests and self.requests >= self.max_requests:
+            self.stopping.set()
+
+    def wsgi(self, environ, start_response):
+        self.count_request()
+        return self.app(environ, start_response)
+
+    async def asgi(self, scope, receive, send):
+        if scope['type'] == 'http':
+            self.count_request()
+        await self.app.asgi(scope, receive, send)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stopping.set())
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, ARBITER_SIGNALS)
+        self.notify()
+        app = self if self.serve is serve_asyncio else self.wsgi
+        self.serve(app, self.sock, self)
+
+
+class Arbiter:
+    def __init__(self, app, host='127.0.0.1', port=8000, workers=1, server='http', max_requests=0,
+                 timeout=30, graceful_timeout=30, sock=None, threads=None, keep_alive_timeout=5.0):
+        if server not in SERVERS:
+            raise ValueError(f'Unknown server: {server}')
+        self.app = app
+        self.host = host
+        self.port = port
+        self.num_workers = workers
+        self.server = server
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.graceful_timeout = graceful_timeout
+        self.sock = sock
+        self.threads = threads
+        self.keep_alive_timeout = keep_alive_timeout
+        self.workers = {}
+        self.signals = []
+        self._pipe = None
+
+    def run(self):
+        if self.sock is None:
+            self.sock = create_socket(self.host, self.port)
+        self._pipe = os.pipe()
+        for fd in self._pipe:
+            os.set_blocking(fd, False)
+        for signum in ARBITER_SIGNALS:
+            signal.signal(signum, self._on_signal)
+
+        self.spawn_workers()
+        try:
+            while True:
+                signum = self._wait_signal(1.0)
+                if signum in (signal.SIGTERM, signal.SIGINT):
+                    break
+                if signum == signal.SIGHUP:
+                    self._try_spawn(self.reload)
+                self.reap_workers()
+                self.kill_stale_workers()
+                self._try_spawn(self.spawn_workers)
+        finally:
+            self.stop()
+
+    def _try_spawn(self, spawn):
+        # нехватка памяти или лимит процессов проходят сами: недостающих воркеров доберём на следующем тике
+        try:
+            spawn()
+        except OSError:
+            logger.exception('Failed to spawn worker, retrying')
+
+    def _on_signal(self, signum, frame):
+        self.signals.append(signum)
+        try:
+            os.write(self._pipe[1], b'.')
+        except OSError:
+            pass
+
+    def _wait_signal(self, timeout):
+        if not self.signals:
+            try:
+                select.select([self._pipe[0]], [], [], timeout)
+            except InterruptedError:
+                pass
+            try:
+                while os.read(self._pipe[0], 1024):
+                    pass
+            except BlockingIOError:
+                pass
+        return self.signals.pop(0) if self.signals else None
+
+    def spawn_workers(self):
+        while len(self.workers) < self.num_workers:
+            self.spawn_worker()
+
+    def spawn_worker(self):
+        worker = Worker(
+            self.app, self.sock, self.server, self.max_requests, self.graceful_timeout, self.threads,
+            self.keep_alive_timeout,
+        )
+        # до установки своих обработчиков потомок унаследовал бы обработчики арбитра и потерял бы SIGTERM
+        signal.pthread_sigmask(signal.SIG_BLOCK, ARBITER_SIGNALS)
+        pid = None
+        try:
+            pid = os.fork()
+        except OSError:
+            worker.heartbeat.close()
+            raise
+        finally:
+            # в родителе снимаем блокировку и при неудачном fork, иначе арбитр перестанет слышать сигналы
+            if pid != 0:
+                signal.pthread_sigmask(signal.SIG_UNBLOCK, ARBITER_SIGNALS)
+        if pid:
+            worker.pid = pid
+            self.workers[pid] = worker
+            return worker
+
+        for other in self.workers.values():
+            other.heartbeat.close()
+        for fd in self._pipe:
+            os.close(fd)
+        exit_code = 0
+        try:
+            worker.run()
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(exit_code)
+
+    def reap_workers(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            worker = self.workers.pop(pid, None)
+            if worker is not None:
+                worker.heartbeat.close()
+
+    def kill_stale_workers(self):
+        if not self.timeout:
+            return
+        limit = time.time() - self.timeout
+        for pid, worker in list(self.workers.items()):
+            if worker.last_update() < limit:
+                self.kill_worker(pid, signal.SIGKILL)
+
+    def kill_worker(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except OSError as e:
+            if e.errno == errno.ESRCH:
+                worker = self.workers.pop(pid, None)
+                if worker is not None:
+                    worker.heartbeat.close()
+
+    def reload(self):
+        old = list(self.workers)
+        spawned = 0
+        try:
+            for _ in range(self.num_workers):
+                self.spawn_worker()
+                spawned += 1
+        finally:
+            # при неудачном fork гасим столько старых воркеров, сколько новых успели запустить
+            for pid in old if spawned == self.num_workers else old[:spawned]:
+                self.kill_worker(pid, signal.SIGTERM)
+
+    def stop(self, graceful=True):
+        for pid in list(self.workers):
+            self.kill_worker(pid, signal.SIGTERM if graceful else signal.SIGKILL)
+        deadline = time.time() + self.graceful_timeout
+        while self.workers and time.time() < deadline:
+            self.reap_workers()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            self.kill_worker(pid, signal.SIGKILL)
+        self.reap_workers()
+        self.sock.close()
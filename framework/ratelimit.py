@@ -0,0 +1,177 @@
+import hashlib
+import math
+import mmap
+import multiprocessing
+import struct
+import threading
+import time
+
+from .middleware import Middleware
+from .response import Response
+
+SLOT = struct.Struct('<Qd')
+PROBES = 8
+
+
+def gcra(tat, now, interval, tolerance):
+    tat = max(tat, now)
+    new_tat = tat + interval
+    allow_at = new_tat - tolerance
+    if now < allow_at:
+        return tat, allow_at - now
+    return new_tat, 0.0
+
+
+class MemoryStore:
+    def __init__(self, stripes=16, max_keys=100000):
+        self.max_keys = max_keys
+        self._tats = {}
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._prune_lock = threading.Lock()
+
+    def update(self, key, now, interval, tolerance):
+        with self._locks[hash(key) % len(self._locks)]:
+            tat, retry_after = gcra(self._tats.get(key, now), now, interval, tolerance)
+            self._tats[key] = tat
+        if len(self._tats) > self.max_keys:
+            self.prune(now)
+        return retry_after
+
+    def prune(self, now):
+        if not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            for key, tat in list(self._tats.items()):
+                if tat <= now:
+                    self._tats.pop(key, None)
+        finally:
+            self._prune_lock.release()
+
+    def __len__(self):
+        return len(self._tats)
+
+
+class SharedStore:
+    def __init__(self, slots=65536, stripes=64):
+        self.region = max(PROBES, slots // stripes)
+        self.slots = self.region * stripes
+        self.buffer = mmap.mmap(-1, self.slots * SLOT.size)
+        self._locks = [multiprocessing.Lock() for _ in range(stripes)]
+
+    def _hash(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8', 'surrogateescape'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little') | 1
+
+    def update(self, key, now, interval, tolerance):
+        h = self._hash(key)
+        start = h % self.slots
+        stripe, base = divmod(start, self.region)
+        region_start = stripe * self.region
+        buffer = self.buffer
+        with self._locks[stripe]:
+            match = free = victim = None
+            victim_tat = float('inf')
+            for probe in range(PROBES):
+                index = region_start + (base + probe) % self.region
+                stored, tat = SLOT.unpack_from(buffer, index * SLOT.size)
+                if stored == h:
+                    match, current = index, tat
+                    break
+                if free is None and (stored == 0 or tat <= now):
+                    free = index
+                if tat < victim_tat:
+                    victim, victim_tat = index, tat
+            if match is None:
+                match = free if free is not None else victim
+                current = now
+            tat, retry_after = gcra(current, now, interval, tolerance)
+            SLOT.pack_into(buffer, match * SLOT.size, h, tat)
+        return retry_after
+
+
+def client_ip(request):
+    return request.environ.get('REMOTE_ADDR', '')
+
+
+def route_key(request):
+    route = request.route
+    return f'{request.method} {route.pattern if route is not None else request.path}'
+
+
+def header_key(name):
+    environ_key = 'HTTP_' + name.upper().replace('-', '_')
+
+    def key(request):
+        value = request.environ.get(environ_key)
+        return f'{name}:{value}' if value else client_ip(request)
+
+    return key
+
+
+KEY_FUNCTIONS = {'ip': client_ip, 'route': route_key}
+
+
+def _key_function(key):
+    if callable(key):
+        return key
+    if key in KEY_FUNCTIONS:
+        return KEY_FUNCTIONS[key]
+    if key.startswith('header:'):
+        return header_key(key[7:])
+    raise ValueError(f'Unknown rate limit key: {key}')
+
+
+class RateLimiter(Middleware):
+    def __init__(self, rate, period=1.0, burst=None, key='ip', store=None, shared=False, name=None):
+        self.interval = period / rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self.tolerance = self.interval * self.burst
+        self.key = _key_function(key)
+        self.store = store if store is not None else (SharedStore() if shared else MemoryStore())
+        self.name = name or str(id(self))
+        self.limited = 0
+
+    def before(self, request):
+        retry_after = self.store.update(
+            f'{self.name}:{self.key(request)}', time.monotonic(), self.interval, self.tolerance,
+        )
+        if retry_after:
+            self.limited += 1
+            return Response(
+                body='429 Too Many Requests', status=429, headers={'Retry-After': str(math.ceil(retry_after))},
+            )
+        return None
+
+
+class LoadShedder:
+    def __init__(self, max_in_flight=None, max_queue_latency=None, retry_after=1):
+        self.max_in_flight = max_in_flight
+        self.max_queue_latency = max_queue_latency
+        self.in_flight = 0
+        self.shed = 0
+        self.response = Response(
+            body='503 Service Unavailable', status=503, headers={'Retry-After': str(retry_after)},
+        )
+        self._lock = threading.Lock()
+
+    def enter(self, environ):
+        if self.max_queue_latency is not None:
+            queued_at = environ.get('framework.queued_at')
+            if queued_at is not None and time.monotonic() - queued_at > self.max_queue_latency:
+                with self._lock:
+                    self.shed += 1
+                return self.response
+        with self._lock:
+            if self.max_in_flight is not None and self.in_flight >= self.max_in_flight:
+                self.shed += 1
+                return self.response
+            self.in_flight += 1
+        return None
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': self.in_flight, 'shed': self.shed}
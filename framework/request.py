@@ -1,27 +1,206 @@
-import json
+import time
+from io import BytesIO
+from collections.abc import Mapping
+from types import MappingProxyType
 from urllib.parse import parse_qs
 
+from .background import BackgroundTask
+from .exceptions import RequestEntityTooLarge
+from .multipart import parse_form
+from .serializers import default_backend
+
+EMPTY_PARAMS = MappingProxyType({})
+
+UNPREFIXED = ('CONTENT_TYPE', 'CONTENT_LENGTH')
+# Значения этих заголовков сами содержат запятые, поэтому get_all их не делит
+SINGLE_VALUE = frozenset((
+    'HTTP_AUTHORIZATION', 'HTTP_DATE', 'HTTP_EXPIRES', 'HTTP_IF_MODIFIED_SINCE',
+    'HTTP_IF_UNMODIFIED_SINCE', 'HTTP_IF_RANGE', 'HTTP_RETRY_AFTER', 'HTTP_USER_AGENT',
+))
+MAX_CACHED_NAMES = 4096
+
+_environ_keys = {}
+_header_names = {}
+
+
+def environ_key(name):
+    key = _environ_keys.get(name)
+    if key is None:
+        key = name.upper().replace('-', '_')
+        if key not in UNPREFIXED:
+            key = 'HTTP_' + key
+        if len(_environ_keys) < MAX_CACHED_NAMES:
+            _environ_keys[name] = key
+    return key
+
+
+def header_name(key):
+    name = _header_names.get(key)
+    if name is None:
+        if key.startswith('HTTP_'):
+            name = key[5:].replace('_', '-').title()
+        elif key in UNPREFIXED:
+            name = key.replace('_', '-').title()
+        else:
+            return None
+        if len(_header_names) < MAX_CACHED_NAMES:
+            _header_names[key] = name
+    return name
+
+
+class EnvironHeaders(Mapping):
+    __slots__ = ('environ',)
 
-class Request:
     def __init__(self, environ):
         self.environ = environ
+
+    def __getitem__(self, name):
+        try:
+            return self.environ[environ_key(name)]
+        except KeyError:
+            raise KeyError(name) from None
+
+    def get(self, name, default=None):
+        return self.environ.get(environ_key(name), default)
+
+    def __contains__(self, name):
+        return isinstance(name, str) and environ_key(name) in self.environ
+
+    def __iter__(self):
+        for key in self.environ:
+            if key.startswith('HTTP_') or key in UNPREFIXED:
+                yield header_name(key)
+
+    def __len__(self):
+        return sum(1 for key in self.environ if key.startswith('HTTP_') or key in UNPREFIXED)
+
+    def get_all(self, name):
+        key = environ_key(name)
+        value = self.environ.get(key)
+        if value is None:
+            return []
+        if key == 'HTTP_COOKIE':
+            return [part.strip() for part in value.split(';') if part.strip()]
+        if key in SINGLE_VALUE:
+            return [value]
+        return [part.strip() for part in value.split(',') if part.strip()]
+
+    def __repr__(self):
+        return f'{type(self).__name__}({dict(self.items())!r})'
+
+
+class BodyStream:
+    chunk_size = 64 * 1024
+
+    def __init__(self, wsgi_input, length=None, limit=None):
+        self._input = wsgi_input
+        self._remaining = length
+        self._limit = limit
+        self.bytes_read = 0
+
+    def _check(self, data):
+        self.bytes_read += len(data)
+        if self._remaining is not None:
+            self._remaining = self._remaining - len(data) if data else 0
+        if self._limit is not None and self.bytes_read > self._limit:
+            raise RequestEntityTooLarge()
+        return data
+
+    def _size(self, size):
+        if self._remaining is not None and (size < 0 or size > self._remaining):
+            return self._remaining
+        return size
+
+    def read(self, size=-1):
+        if self._input is None:
+            return b''
+        if size is None or size < 0:
+            return b''.join(self)
+        size = self._size(size)
+        if size == 0:
+            return b''
+        return self._check(self._input.read(size))
+
+    def readline(self, size=-1):
+        if self._input is None:
+            return b''
+        size = self._size(self.chunk_size if size is None or size < 0 else size)
+        if size == 0:
+            return b''
+        return self._check(self._input.readline(size))
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class Request:
+    __slots__ = (
+        'environ', 'path', 'method', 'path_params', 'route', 'deadline', 'max_body_size', 'json_backend', 'tasks',
+        '_headers', '_query', '_body', '_stream', '_form', '_files',
+    )
+
+    def __init__(self, environ, max_body_size=None, json_backend=None):
+        self.environ = environ
         self.path = environ.get('PATH_INFO', '/')
         self.method = environ.get('REQUEST_METHOD', 'GET')
-        self.headers = self._parse_headers()
-        self.query = self._parse_query()
-        self.body = self._read_body()
-
-    def _parse_headers(self):
-        headers = {}
-        for key, value in self.environ.items():
-            if key.startswith('HTTP_'):
-                header_name = key[5:].replace('_', '-').title()
-                headers[header_name] = value
-        if 'CONTENT_TYPE' in self.environ:
-            headers['Content-Type'] = self.environ['CONTENT_TYPE']
-        if 'CONTENT_LENGTH' in self.environ:
-            headers['Content-Length'] = self.environ['CONTENT_LENGTH']
-        return headers
+        self.path_params = EMPTY_PARAMS
+        self.route = None
+        self.deadline = None
+        self.tasks = None
+        self.max_body_size = max_body_size
+        self.json_backend = json_backend or default_backend
+        self._headers = None
+        self._query = None
+        self._body = None
+        self._stream = None
+        self._form = None
+        self._files = None
+
+    @property
+    def headers(self):
+        if self._headers is None:
+            self._headers = EnvironHeaders(self.environ)
+        return self._headers
+
+    @property
+    def query(self):
+        if self._query is None:
+            self._query = self._parse_query()
+        return self._query
+
+    @property
+    def remaining(self):
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def content_length(self):
+        try:
+            return int(self.environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return 0
+
+    @property
+    def stream(self):
+        if self._stream is None:
+            self._stream = self._open_stream()
+        return self._stream
+
+    @property
+    def body(self):
+        if self._body is None:
+            self._body = self.stream.read()
+        return self._body
+
+    def add_background_task(self, fn, *args, **kwargs):
+        if self.tasks is None:
+            self.tasks = []
+        self.tasks.append(BackgroundTask(fn, args, kwargs))
 
     def _parse_query(self):
         query_string = self.environ.get('QUERY_STRING', '')
@@ -36,22 +215,39 @@ class Request:
                 query[key] = value_list
         return query
 
-    def _read_body(self):
-        try:
-            content_length = int(self.environ.get('CONTENT_LENGTH', 0))
-        except ValueError:
-            content_length = 0
+    def _open_stream(self):
+        content_length = self.content_length
+        wsgi_input = self.environ.get('wsgi.input')
         if content_length > 0:
-            wsgi_input = self.environ.get('wsgi.input')
-            if wsgi_input:
-                return wsgi_input.read(content_length)
-        return b''
+            if self.max_body_size is not None and content_length > self.max_body_size:
+                raise RequestEntityTooLarge()
+            return BodyStream(wsgi_input, content_length, self.max_body_size)
+        if self.environ.get('wsgi.input_terminated'):
+            return BodyStream(wsgi_input, None, self.max_body_size)
+        return BodyStream(None)
+
+    def _parse_form(self):
+        if self._body is not None:
+            stream = BytesIO(self._body)
+        else:
+            stream = self.stream
+        self._form, self._files = parse_form(stream, self.environ.get('CONTENT_TYPE'))
+
+    def form(self):
+        if self._form is None:
+            self._parse_form()
+        return self._form
+
+    def files(self):
+        if self._files is None:
+            self._parse_form()
+        return self._files
 
     def json(self):
-        if not self.body:
+        body = self.body
+        if not body:
             return {}
         try:
-            body_str = self.body.decode('utf-8')
-            return json.loads(body_str)
+            return self.json_backend.loads(body)
         except UnicodeDecodeError:
             raise ValueError("Request body is not UTF-8 encoded")
@@ -0,0 +1,147 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from .exceptions import HTTPError
+
+
+class PoolTimeout(HTTPError):
+    status = 503
+    message = 'Service Unavailable'
+
+
+class PoolClosed(RuntimeError):
+    pass
+
+
+class Pool:
+    def __init__(self, factory, size=10, timeout=5.0, check=None, close=None, name=None):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.check = check
+        self.dispose = close
+        self.name = name
+        self.closed = False
+        self.created = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._idle = []
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        with self._cond:
+            while True:
+                if self.closed:
+                    raise PoolClosed(f'Pool {self.name!r} is closed')
+                if self._idle:
+                    resource = self._idle.pop()
+                    break
+                if self._in_use < self.size:
+                    resource = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(f'Timed out waiting for resource {self.name!r}')
+                self._cond.wait(remaining)
+            self._in_use += 1
+            waited = time.monotonic() - start
+            self.acquired += 1
+            self.wait_total += waited
+            if waited > self.wait_max:
+                self.wait_max = waited
+
+        try:
+            if resource is not None and self.check is not None and not self.check(resource):
+                self._discard(resource)
+                resource = None
+            if resource is None:
+                resource = self.factory()
+                with self._cond:
+                    self.created += 1
+        except BaseException:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return resource
+
+    def release(self, resource, discard=False):
+        if discard or self.closed:
+            self._discard(resource)
+        with self._cond:
+            self._in_use -= 1
+            if not discard and not self.closed:
+                self._idle.append(resource)
+            self._cond.notify()
+
+    def _discard(self, resource):
+        with self._cond:
+            self.discarded += 1
+        if self.dispose is not None:
+            try:
+                self.dispose(resource)
+            except Exception:
+                pass
+
+    @contextmanager
+    def connection(self, timeout=None):
+        resource = self.acquire(timeout)
+        try:
+            yield resource
+        finally:
+            self.release(resource)
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for resource in idle:
+            self._discard(resource)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self.size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'created': self.created,
+                'acquired': self.acquired,
+                'timeouts': self.timeouts,
+                'discarded': self.discarded,
+                'wait_seconds_total': self.wait_total,
+                'wait_seconds_max': self.wait_max,
+            }
+
+
+class Resources:
+    def __init__(self):
+        self.pools = {}
+
+    def register(self, name, factory, **options):
+        if name in self.pools:
+            raise ValueError(f'Resource already registered: {name}')
+        pool = self.pools[name] = Pool(factory, name=name, **options)
+        return pool
+
+    def __getitem__(self, name):
+        return self.pools[name]
+
+    def __contains__(self, name):
+        return name in self.pools
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
+
+    def stats(self):
+        return {name: pool.stats() for name, pool in self.pools.items()}
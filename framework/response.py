@@ -1,36 +1,375 @@
+import mimetypes
+import os
+
+from .background import BackgroundTask
+from .serializers import default_backend, iterencode
+
+STATUS_CODES = {
+    100: 'Continue',
+    101: 'Switching Protocols',
+    102: 'Processing',
+    103: 'Early Hints',
+    200: 'OK',
+    201: 'Created',
+    202: 'Accepted',
+    203: 'Non-Authoritative Information',
+    204: 'No Content',
+    205: 'Reset Content',
+    206: 'Partial Content',
+    207: 'Multi-Status',
+    208: 'Already Reported',
+    226: 'IM Used',
+    300: 'Multiple Choices',
+    301: 'Moved Permanently',
+    302: 'Found',
+    303: 'See Other',
+    304: 'Not Modified',
+    305: 'Use Proxy',
+    307: 'Temporary Redirect',
+    308: 'Permanent Redirect',
+    400: 'Bad Request',
+    401: 'Unauthorized',
+    402: 'Payment Required',
+    403: 'Forbidden',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    406: 'Not Acceptable',
+    407: 'Proxy Authentication Required',
+    408: 'Request Timeout',
+    409: 'Conflict',
+    410: 'Gone',
+    411: 'Length Required',
+    412: 'Precondition Failed',
+    413: 'Content Too Large',
+    414: 'URI Too Long',
+    415: 'Unsupported Media Type',
+    416: 'Range Not Satisfiable',
+    417: 'Expectation Failed',
+    421: 'Misdirected Request',
+    422: 'Unprocessable Content',
+    423: 'Locked',
+    424: 'Failed Dependency',
+    425: 'Too Early',
+    426: 'Upgrade Required',
+    428: 'Precondition Required',
+    429: 'Too Many Requests',
+    431: 'Request Header Fields Too Large',
+    451: 'Unavailable For Legal Reasons',
+    500: 'Internal Server Error',
+    501: 'Not Implemented',
+    502: 'Bad Gateway',
+    503: 'Service Unavailable',
+    504: 'Gateway Timeout',
+    505: 'HTTP Version Not Supported',
+    506: 'Variant Also Negotiates',
+    507: 'Insufficient Storage',
+    508: 'Loop Detected',
+    510: 'Not Extended',
+    511: 'Network Authentication Required',
+}
+
+STATUS_LINES = {code: f'{code} {text}' for code, text in STATUS_CODES.items()}
+
+DEFAULT_CONTENT_TYPE = ('Content-Type', 'text/html; charset=utf-8')
+JSON_CONTENT_TYPE = ('Content-Type', 'application/json')
+
+
+class Headers(dict):
+    __slots__ = ('changed',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.changed = True
+
+    def __setitem__(self, key, value):
+        self.changed = True
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self.changed = True
+        super().__delitem__(key)
+
+    def update(self, *args, **kwargs):
+        self.changed = True
+        super().update(*args, **kwargs)
+
+    def setdefault(self, key, default=None):
+        self.changed = True
+        return super().setdefault(key, default)
+
+    def pop(self, *args):
+        self.changed = True
+        return super().pop(*args)
+
+    def popitem(self):
+        self.changed = True
+        return super().popitem()
+
+    def clear(self):
+        self.changed = True
+        super().clear()
+
+
+def _buffer_chunks(body):
+    chunks = []
+    length = 0
+    for chunk in body:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        elif isinstance(chunk, memoryview) and chunk.itemsize != 1:
+            chunk = chunk.cast('B')
+        if chunk:
+            chunks.append(chunk)
+            length += len(chunk)
+    return chunks, length
+
+
 class Response:
-    STATUS_CODES = {
-        200: 'OK',
-        201: 'Created',
-        204: 'No Content',
-        301: 'Moved Permanently',
-        302: 'Found',
-        400: 'Bad Request',
-        401: 'Unauthorized',
-        403: 'Forbidden',
-        404: 'Not Found',
-        405: 'Method Not Allowed',
-        500: 'Internal Server Error',
-        501: 'Not Implemented',
-    }
+    __slots__ = ('status', 'length', 'tasks', '_body', '_headers', '_header_list')
+
+    STATUS_CODES = STATUS_CODES
+    default_content_type = DEFAULT_CONTENT_TYPE
 
     def __init__(self, body='', status=200, headers=None):
         self.status = status
-        self.headers = headers or {}
+        self.tasks = None
+        self._header_list = None
 
-        if 'Content-Type' not in self.headers:
-            self.headers['Content-Type'] = 'text/html; charset=utf-8'
+        if isinstance(body, (list, tuple)):
+            self._body, self.length = _buffer_chunks(body)
+        elif isinstance(body, (bytearray, memoryview)):
+            self._body, self.length = _buffer_chunks((body,))
+        else:
+            if isinstance(body, str):
+                body = body.encode('utf-8')
+            elif not isinstance(body, bytes):
+                body = str(body).encode('utf-8')
+            self._body = body
+            self.length = len(body)
 
-        if isinstance(body, str):
-            self.body = body.encode('utf-8')
+        if headers:
+            self.headers = headers
+            if 'Content-Type' not in self._headers:
+                self._headers['Content-Type'] = self.default_content_type[1]
+            self._headers['Content-Length'] = str(self.length)
         else:
-            self.body = body if isinstance(body, bytes) else str(body).encode('utf-8')
+            self._headers = None
+
+    @property
+    def body(self):
+        body = self._body
+        if type(body) is list and self.length is not None:
+            # склеиваем куски только по требованию: серверу они уходят как есть
+            body = self._body = b''.join(body)
+        return body
+
+    @body.setter
+    def body(self, value):
+        self._body = value
+        self.length = len(value) if isinstance(value, (bytes, bytearray)) else None
+
+    def chunks(self):
+        body = self._body
+        return body if type(body) is list else [body]
 
-        self.headers['Content-Length'] = str(len(self.body))
+    @property
+    def headers(self):
+        if self._headers is None:
+            self._headers = Headers((self.default_content_type, ('Content-Length', str(self.length))))
+        return self._headers
+
+    @headers.setter
+    def headers(self, value):
+        self._headers = Headers(value)
+
+    def add_background_task(self, fn, *args, **kwargs):
+        if self.tasks is None:
+            self.tasks = []
+        self.tasks.append(BackgroundTask(fn, args, kwargs))
+        return self
 
     def status_line(self):
-        status_text = self.STATUS_CODES.get(self.status, 'Unknown')
-        return f"{self.status} {status_text}"
+        line = STATUS_LINES.get(self.status)
+        if line is None:
+            line = f"{self.status} {STATUS_CODES.get(self.status, 'Unknown')}"
+        return line
 
     def headers_list(self):
-        return [(key, str(value)) for key, value in self.headers.items()]
\ No newline at end of file
+        headers = self._headers
+        if headers is None:
+            if self._header_list is None:
+                self._header_list = [self.default_content_type, ('Content-Length', str(self.length))]
+        elif headers.changed or self._header_list is None:
+            self._header_list = [(key, str(value)) for key, value in headers.items()]
+            headers.changed = False
+        return self._header_list
+
+    def __call__(self, environ, start_response):
+        start_response(self.status_line(), self.headers_list())
+        body = self._body
+        if type(body) is not list:
+            return [body if type(body) is bytes else bytes(body)]
+        if environ.get('framework.buffer_chunks'):
+            return body
+        # PEP 3333 требует bytes: буферы копируем по одному, без общей склейки
+        return [chunk if type(chunk) is bytes else bytes(chunk) for chunk in body]
+
+
+class HeadResponse(Response):
+    __slots__ = ('response',)
+
+    def __init__(self, response):
+        self.response = response
+        self.status = response.status
+        self.body = b''
+        self.tasks = None
+        self._headers = response.headers
+        self._header_list = None
+
+    def __call__(self, environ, start_response):
+        iterable = self.response(environ, start_response)
+        close = getattr(iterable, 'close', None)
+        if close is not None:
+            close()
+        return []
+
+
+def _encode_chunks(chunks):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield chunk
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+class StreamingResponse(Response):
+    __slots__ = ()
+
+    def __init__(self, body, status=200, headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self.body = body
+        self.tasks = None
+        self._header_list = None
+
+        if 'Content-Type' not in self.headers:
+            self.headers['Content-Type'] = self.default_content_type[1]
+
+    def __call__(self, environ, start_response):
+        start_response(self.status_line(), self.headers_list())
+        return _encode_chunks(self.body)
+
+
+class JSONResponse(Response):
+    __slots__ = ()
+
+    default_content_type = JSON_CONTENT_TYPE
+
+    def __init__(self, data, status=200, headers=None, backend=None):
+        super().__init__((backend or default_backend).dumps(data), status, headers)
+
+
+class StreamingJSONResponse(StreamingResponse):
+    __slots__ = ()
+
+    default_content_type = JSON_CONTENT_TYPE
+
+    def __init__(self, items, status=200, headers=None, backend=None):
+        super().__init__(iterencode(items, backend), status, headers)
+
+
+class FileIterator:
+    def __init__(self, file, offset, length, chunk_size):
+        self.file = file
+        self.offset = offset
+        self.length = length
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        self.file.seek(self.offset)
+        remaining = self.length
+        while remaining > 0:
+            chunk = self.file.read(min(self.chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    start, sep, end = header[6:].strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if not start:
+            suffix = int(end)
+            if suffix <= 0:
+                return ()
+            return max(size - suffix, 0), size - 1
+        first = int(start)
+        last = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if first >= size:
+        return ()
+    if first > last:
+        return None
+    return first, min(last, size - 1)
+
+
+class FileResponse(Response):
+    __slots__ = ('file', 'size')
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, file, status=200, headers=None, content_type=None):
+        if isinstance(file, (str, os.PathLike)):
+            if content_type is None:
+                content_type = mimetypes.guess_type(os.fspath(file))[0]
+            file = open(file, 'rb')
+        self.status = status
+        self.headers = headers or {}
+        self._header_list = None
+        self.file = file
+        self.size = os.fstat(file.fileno()).st_size
+        self.body = b''
+        self.tasks = None
+
+        if 'Content-Type' not in self.headers:
+            self.headers['Content-Type'] = content_type or 'application/octet-stream'
+        self.headers['Content-Length'] = str(self.size)
+        self.headers['Accept-Ranges'] = 'bytes'
+
+    def __call__(self, environ, start_response):
+        offset, length = 0, self.size
+        if self.status == 200 and 'HTTP_RANGE' in environ:
+            byte_range = parse_range(environ['HTTP_RANGE'], self.size)
+            if byte_range == ():
+                self.file.close()
+                self.status = 416
+                self.headers['Content-Range'] = f'bytes */{self.size}'
+                self.headers['Content-Length'] = '0'
+                start_response(self.status_line(), self.headers_list())
+                return [b'']
+            if byte_range is not None:
+                first, last = byte_range
+                offset, length = first, last - first + 1
+                self.status = 206
+                self.headers['Content-Range'] = f'bytes {first}-{last}/{self.size}'
+                self.headers['Content-Length'] = str(length)
+
+        start_response(self.status_line(), self.headers_list())
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None and offset == 0 and length == self.size:
+            return file_wrapper(self.file, self.chunk_size)
+        return FileIterator(self.file, offset, length, self.chunk_size)
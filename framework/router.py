@@ -1,17 +1,287 @@
+import inspect
+from functools import partial
+
+from .exceptions import MethodNotAllowed
+from .response import Response
+
+
+def _to_int(value):
+    if not (value.isascii() and value.isdigit()):
+        raise ValueError(value)
+    return int(value)
+
+
+def _to_str(value):
+    if not value:
+        raise ValueError(value)
+    return value
+
+
+CONVERTERS = {
+    'int': _to_int,
+    'float': float,
+    'str': _to_str,
+    'path': _to_str,
+}
+
+# Более специфичные конвертеры проверяются раньше: /items/<int:id> раньше /items/<name>
+CONVERTER_PRIORITY = {'int': 0, 'float': 1}
+
+
+# Маршрут для отсутствующего метода: отвечает 405 с заголовком Allow
+ANY_METHOD = '*'
+
+
+class Route:
+    def __init__(self, pattern, method, handler, param_names=(), options=None, automatic=False):
+        self.pattern = pattern
+        self.method = method
+        self.handler = handler
+        self.param_names = param_names
+        self.options = options or {}
+        self.automatic = automatic
+        self.is_async = inspect.iscoroutinefunction(handler)
+        self.chain = None
+        self.chain_async = None
+
+    def __repr__(self):
+        return f'<Route {self.method} {self.pattern}>'
+
+
+def _options(allow, request, **params):
+    response = Response(b'', status=204, headers={'Allow': allow})
+    # RFC 9110: у 204 не бывает Content-Length, а без тела и Content-Type ни к чему
+    del response.headers['Content-Type']
+    del response.headers['Content-Length']
+    return response
+
+
+def _not_allowed(allow, request, **params):
+    raise MethodNotAllowed(headers={'Allow': allow})
+
+
+class MethodTable:
+    __slots__ = ('pattern', 'source', 'routes', 'allow', 'not_allowed')
+
+    def __init__(self, routes):
+        first = next(iter(routes.values()))
+        pattern, param_names = first.pattern, first.param_names
+        self.source = dict(routes)
+        routes = dict(routes)
+        get = routes.get('GET')
+        if get is not None and 'HEAD' not in routes:
+            routes['HEAD'] = Route(pattern, 'HEAD', get.handler, param_names, get.options, automatic=True)
+        allow = ', '.join(sorted(set(routes) | {'OPTIONS'}))
+        if 'OPTIONS' not in routes:
+            routes['OPTIONS'] = Route(pattern, 'OPTIONS', partial(_options, allow), param_names, automatic=True)
+        self.pattern = pattern
+        self.routes = routes
+        self.allow = allow
+        self.not_allowed = Route(pattern, ANY_METHOD, partial(_not_allowed, allow), param_names, automatic=True)
+
+    def __iter__(self):
+        yield from self.routes.values()
+        yield self.not_allowed
+
+
+def _rebuild(table, routes):
+    # неизменённые таблицы сохраняем вместе с уже скомпилированными автоматическими маршрутами
+    if table is not None and table.source == routes:
+        return table
+    return MethodTable(routes)
+
+
+class _Node:
+    __slots__ = ('static', 'dynamic', 'catchall', 'routes', 'table')
+
+    def __init__(self):
+        self.static = {}
+        self.dynamic = []
+        self.catchall = None
+        self.routes = None
+        self.table = None
+
+
+def _parse_segment(segment):
+    if not (segment.startswith('<') and segment.endswith('>')):
+        return None
+    spec = segment[1:-1]
+    if ':' in spec:
+        converter, name = spec.split(':', 1)
+    else:
+        converter, name = 'str', spec
+    if converter not in CONVERTERS:
+        raise ValueError(f'Unknown path converter: {converter}')
+    if not name.isidentifier():
+        raise ValueError(f'Invalid path parameter name: {name}')
+    return converter, name
+
+
+def _split(path):
+    if path.startswith('/'):
+        path = path[1:]
+    return path.split('/')
+
+
 class Router:
     def __init__(self):
         self.routes = {}
+        self.frozen = False
+        self._static = {}
+        self._tables = {}
+        self._static_routes = {}
+        self._root = _Node()
 
-    def add_route(self, path, methods, handler):
+    def add_route(self, path, methods, handler, **options):
         if isinstance(methods, str):
             methods = [methods]
 
+        segments = _split(path)
+        parsed = [_parse_segment(segment) for segment in segments]
+        param_names = tuple(p[1] for p in parsed if p is not None)
+
+        if not param_names:
+            table = self._static.setdefault(path, {})
+        else:
+            table = self._insert(path, segments, parsed)
+
         for method in methods:
             method_upper = method.upper()
             route_key = (path, method_upper)
             self.routes[route_key] = handler
+            table[method_upper] = Route(path, method_upper, handler, param_names, options)
+        self.frozen = False
 
-    def resolve(self, path, method):
+    def _insert(self, path, segments, parsed):
+        node = self._root
+        last = len(segments) - 1
+        for index, (segment, param) in enumerate(zip(segments, parsed)):
+            if param is None:
+                node = node.static.setdefault(segment, _Node())
+                continue
+            converter, _ = param
+            if converter == 'path':
+                if index != last:
+                    raise ValueError(f'<path:...> must be the last segment: {path}')
+                if node.catchall is None:
+                    node.catchall = _Node()
+                node = node.catchall
+                continue
+            for name, _, child in node.dynamic:
+                if name == converter:
+                    node = child
+                    break
+            else:
+                child = _Node()
+                node.dynamic.append((converter, CONVERTERS[converter], child))
+                node.dynamic.sort(key=lambda item: CONVERTER_PRIORITY.get(item[0], 2))
+                node = child
+        if node.routes is None:
+            node.routes = {}
+        return node.routes
+
+    def freeze(self):
+        tables = self._tables
+        self._tables = {path: _rebuild(tables.get(path), routes) for path, routes in self._static.items()}
+        self._static_routes = {path: table.routes for path, table in self._tables.items()}
+        for node in self._iter_nodes(self._root):
+            node.table = _rebuild(node.table, node.routes) if node.routes else None
+        self.frozen = True
+
+    def dispatch(self, path, method):
+        if not self.frozen:
+            self.freeze()
         method_upper = method.upper()
-        route_key = (path, method_upper)
-        return self.routes.get(route_key)
+
+        routes = self._static_routes.get(path)
+        if routes is not None:
+            route = routes.get(method_upper)
+            if route is not None:
+                return route, {}
+
+        values = []
+        missed = []
+        route = self._walk(self._root, _split(path), 0, method_upper, values, missed)
+        if route is None:
+            if routes is not None:
+                return self._tables[path].not_allowed, {}
+            if not missed:
+                return None
+            route, values = missed[0]
+        return route, dict(zip(route.param_names, values))
+
+    def match(self, path, method):
+        match = self.dispatch(path, method)
+        if match is None or match[0].method == ANY_METHOD:
+            return None
+        return match
+
+    def _walk(self, node, segments, index, method, values, missed):
+        if index == len(segments):
+            return self._pick(node.table, method, values, missed)
+
+        segment = segments[index]
+        child = node.static.get(segment)
+        if child is not None:
+            route = self._walk(child, segments, index + 1, method, values, missed)
+            if route is not None:
+                return route
+
+        if segment:
+            for _, convert, child in node.dynamic:
+                try:
+                    value = convert(segment)
+                except ValueError:
+                    continue
+                values.append(value)
+                route = self._walk(child, segments, index + 1, method, values, missed)
+                if route is not None:
+                    return route
+                values.pop()
+
+            if node.catchall is not None:
+                values.append('/'.join(segments[index:]))
+                route = self._pick(node.catchall.table, method, values, missed)
+                if route is not None:
+                    return route
+                values.pop()
+        return None
+
+    def _pick(self, table, method, values, missed):
+        if table is None:
+            return None
+        route = table.routes.get(method)
+        if route is None and not missed:
+            # путь совпал, метод нет: запоминаем первый такой маршрут для ответа 405
+            missed.append((table.not_allowed, list(values)))
+        return route
+
+    def tables(self):
+        if not self.frozen:
+            self.freeze()
+        yield from self._tables.values()
+        for node in self._iter_nodes(self._root):
+            if node.table is not None:
+                yield node.table
+
+    def iter_routes(self):
+        for table in self._static.values():
+            yield from table.values()
+        for node in self._iter_nodes(self._root):
+            if node.routes is not None:
+                yield from node.routes.values()
+
+    def _iter_nodes(self, node):
+        yield node
+        for child in node.static.values():
+            yield from self._iter_nodes(child)
+        for _, _, child in node.dynamic:
+            yield from self._iter_nodes(child)
+        if node.catchall is not None:
+            yield from self._iter_nodes(node.catchall)
+
+    def resolve(self, path, method):
+        match = self.match(path, method)
+        if match is None:
+            return None
+        return match[0].handler
@@ -0,0 +1,94 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JSONBackend:
+    name = 'json'
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    def dumps(self, data):
+        return self._encoder.encode(data).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonBackend(JSONBackend):
+    name = 'orjson'
+
+    def dumps(self, data):
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # числа шире 64 бит и прочее, что orjson не умеет: отдаём stdlib ради одинакового поведения
+            return super().dumps(data)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class UjsonBackend(JSONBackend):
+    name = 'ujson'
+
+    def dumps(self, data):
+        return ujson.dumps(data, ensure_ascii=False).encode('utf-8')
+
+    def loads(self, data):
+        try:
+            return ujson.loads(data)
+        except ValueError as e:
+            raise json.JSONDecodeError(str(e), data.decode('utf-8', 'replace'), 0) from None
+
+
+BACKENDS = {
+    'orjson': (OrjsonBackend, orjson),
+    'ujson': (UjsonBackend, ujson),
+    'json': (JSONBackend, json),
+}
+
+
+def available_backends():
+    return [name for name, (_, module) in BACKENDS.items() if module is not None]
+
+
+def get_backend(backend=None):
+    if isinstance(backend, JSONBackend):
+        return backend
+    if backend is None:
+        backend = available_backends()[0]
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown JSON backend: {backend}')
+    cls, module = BACKENDS[backend]
+    if module is None:
+        raise ValueError(f'JSON backend {backend!r} is not installed')
+    return cls()
+
+
+default_backend = get_backend()
+
+
+def iterencode(items, backend=None, chunk_size=64 * 1024):
+    backend = backend or default_backend
+    buffer = bytearray(b'[')
+    first = True
+    for item in items:
+        if not first:
+            buffer += b','
+        first = False
+        buffer += backend.dumps(item)
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b']'
+    yield bytes(buffer)
@@ -0,0 +1,637 @@
+import queue
+import selectors
+import socket
+import sys
+import threading
+import time
+import traceback
+
+from .background import TaskIterable
+from .http import (
+    LAST_CHUNK, MAX_HEAD_SIZE, ProtocolError, build_environ, encode_chunk, error_response, parse_head, response_head,
+    wants_keep_alive,
+)
+from .response import FileIterator
+from .threadpool import ThreadPoolMixIn
+
+READ_SIZE = 16 * 1024
+MAX_DRAIN = 1024 * 1024
+MAX_LINE = 8 * 1024
+CONTINUE = b'HTTP/1.1 100 Continue\r\n\r\n'
+HOP_BY_HOP = frozenset(('connection', 'keep-alive', 'transfer-encoding'))
+_ACCEPT = object()
+_WAKEUP = object()
+
+
+class Connection:
+    __slots__ = ('sock', 'address', 'buffer', 'scratch', 'requests', 'keep_alive', 'idle_since', 'timeout', 'deadline')
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.buffer = bytearray()
+        self.scratch = memoryview(bytearray(READ_SIZE))
+        self.requests = 0
+        self.keep_alive = False
+        self.idle_since = time.monotonic()
+        self.timeout = None
+        self.deadline = None
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+        self.sock.settimeout(timeout)
+
+    def start_deadline(self):
+        # таймаут на один recv не спасает от slowloris: на чтение всего запроса даём один общий срок
+        self.deadline = None if self.timeout is None else time.monotonic() + self.timeout
+
+    def sendall(self, data):
+        self.sock.sendall(data)
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def fill(self):
+        if self.deadline is None:
+            count = self.sock.recv_into(self.scratch)
+        else:
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError('Request was not received in time')
+            self.sock.settimeout(remaining)
+            try:
+                count = self.sock.recv_into(self.scratch)
+            finally:
+                self.sock.settimeout(self.timeout)
+        if count:
+            self.buffer += self.scratch[:count]
+        return count
+
+    def read_line(self):
+        start = 0
+        while True:
+            end = self.buffer.find(b'\r\n', start)
+            if end >= 0:
+                line = bytes(self.buffer[:end])
+                del self.buffer[:end + 2]
+                return line
+            if len(self.buffer) > MAX_LINE:
+                raise ProtocolError('Line too long')
+            start = max(0, len(self.buffer) - 1)
+            if not self.fill():
+                raise ProtocolError('Connection closed mid-line')
+
+    def read_head(self, limit):
+        start = 0
+        while True:
+            while self.buffer.startswith(b'\r\n'):
+                del self.buffer[:2]
+            end = self.buffer.find(b'\r\n\r\n', start)
+            if end >= 0:
+                head = bytes(self.buffer[:end])
+                del self.buffer[:end + 4]
+                return head
+            if len(self.buffer) > limit:
+                raise ProtocolError('Request head too large')
+            start = max(0, len(self.buffer) - 3)
+            if not self.fill():
+                if self.buffer:
+                    raise ProtocolError('Incomplete request head')
+                return None
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class BodyReader:
+    def __init__(self, conn, length, expect_continue=False):
+        self.conn = conn
+        self.remaining = length
+        self.expect_continue = expect_continue and length > 0
+
+    def _ready(self):
+        if self.expect_continue:
+            self.expect_continue = False
+            self.conn.sendall(CONTINUE)
+        buffer = self.conn.buffer
+        if not buffer and not self.conn.fill():
+            raise ConnectionError('Client closed connection while sending body')
+        return buffer
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.remaining
+        chunks = []
+        while size > 0 and self.remaining > 0:
+            buffer = self._ready()
+            chunk = bytes(buffer[:min(size, self.remaining)])
+            del buffer[:len(chunk)]
+            self.remaining -= len(chunk)
+            size -= len(chunk)
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def readline(self, size=-1):
+        if size is None or size < 0:
+            size = self.remaining
+        size = min(size, self.remaining)
+        line = bytearray()
+        while size > 0:
+            buffer = self._ready()
+            end = buffer.find(b'\n', 0, size)
+            take = end + 1 if end >= 0 else min(len(buffer), size)
+            line += buffer[:take]
+            del buffer[:take]
+            self.remaining -= take
+            size -= take
+            if end >= 0:
+                break
+        return bytes(line)
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def drain(self):
+        if self.expect_continue:
+            return False
+        if self.remaining > MAX_DRAIN:
+            return False
+        while self.remaining > 0:
+            self.read(READ_SIZE)
+        return True
+
+
+class ChunkedReader:
+    def __init__(self, conn, expect_continue=False):
+        self.conn = conn
+        self.expect_continue = expect_continue
+        self.chunk_left = 0
+        self.done = False
+        self.received = 0
+
+    def _next_chunk(self):
+        if self.expect_continue:
+            self.expect_continue = False
+            self.conn.sendall(CONTINUE)
+        line = self.conn.read_line().split(b';', 1)[0].strip()
+        try:
+            size = int(line, 16)
+        except ValueError:
+            raise ProtocolError(f'Invalid chunk size: {line!r}') from None
+        if size == 0:
+            while self.conn.read_line():
+                pass
+            self.done = True
+        self.chunk_left = size
+
+    def read(self, size=-1):
+        out = bytearray()
+        while not self.done and (size is None or size < 0 or len(out) < size):
+            if self.chunk_left == 0:
+                self._next_chunk()
+                continue
+            buffer = self.conn.buffer
+            if not buffer and not self.conn.fill():
+                raise ConnectionError('Client closed connection while sending body')
+            want = self.chunk_left if size is None or size < 0 else min(self.chunk_left, size - len(out))
+            piece = buffer[:want]
+            del buffer[:len(piece)]
+            out += piece
+            self.chunk_left -= len(piece)
+            if self.chunk_left == 0 and self.conn.read_line():
+                raise ProtocolError('Missing CRLF after chunk')
+        self.received += len(out)
+        return bytes(out)
+
+    def readline(self, size=-1):
+        line = bytearray()
+        while size is None or size < 0 or len(line) < size:
+            char = self.read(1)
+            if not char:
+                break
+            line += char
+            if char == b'\n':
+                break
+        return bytes(line)
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def drain(self):
+        if self.expect_continue:
+            return False
+        while not self.done:
+            if self.received > MAX_DRAIN:
+                return False
+            self.read(READ_SIZE)
+        return True
+
+
+class FileWrapper:
+    def __init__(self, file, block_size=64 * 1024):
+        self.file = file
+        self.block_size = block_size
+
+    def __iter__(self):
+        while True:
+            block = self.file.read(self.block_size)
+            if not block:
+                return
+            yield block
+
+    def close(self):
+        self.file.close()
+
+
+def _no_body(method, status):
+    code = int(status[:3])
+    return method == 'HEAD' or code < 200 or code in (204, 304)
+
+
+class HTTPServer:
+    multithread = False
+
+    def __init__(self, server_address=None, app=None, sock=None, keep_alive_timeout=5.0, max_keepalive_requests=1000,
+                 connection_timeout=30.0, max_head_size=MAX_HEAD_SIZE, backlog=2048):
+        if sock is None:
+            sock = socket.create_server(server_address, backlog=backlog)
+        sock.setblocking(False)
+        self.socket = sock
+        self.server_address = sock.getsockname()[:2]
+        self.server_port = self.server_address[1]
+        self.application = app
+        self.keep_alive_timeout = keep_alive_timeout
+        self.max_keepalive_requests = max_keepalive_requests
+        self.connection_timeout = connection_timeout
+        self.max_head_size = max_head_size
+        self.service_hook = None
+        self.requests_served = 0
+        self.selector = selectors.DefaultSelector()
+        self._parked = {}
+        self._pending = queue.SimpleQueue()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self._loop_ident = None
+        self._stopping = False
+        self._stopped = threading.Event()
+
+    def set_app(self, app):
+        self.application = app
+
+    def get_app(self):
+        return self.application
+
+    def fileno(self):
+        return self.socket.fileno()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.server_close()
+
+    def serve_forever(self, poll_interval=0.5):
+        self._stopped.clear()
+        self._loop_ident = threading.get_ident()
+        selector = self.selector
+        selector.register(self.socket, selectors.EVENT_READ, _ACCEPT)
+        selector.register(self._wakeup_r, selectors.EVENT_READ, _WAKEUP)
+        timeout = min(poll_interval, self.keep_alive_timeout)
+        try:
+            while not self._stopping:
+                for key, _ in selector.select(timeout):
+                    if key.data is _ACCEPT:
+                        self._accept()
+                    elif key.data is _WAKEUP:
+                        self._drain_wakeup()
+                    else:
+                        self._unpark(key.data)
+                        self.dispatch(key.data)
+                self._expire_idle()
+                self.service_actions()
+        finally:
+            selector.unregister(self.socket)
+            selector.unregister(self._wakeup_r)
+            self._drain_wakeup()
+            self._close_parked()
+            self._loop_ident = None
+            self._stopping = False
+            self._stopped.set()
+            self._drain_wakeup()
+
+    def _close_parked(self):
+        # принятые, но ещё не обслуженные соединения и уже пришедшие запросы
+        # дообслуживаем, иначе клиент получит обрыв при перезапуске воркера
+        ready = {key.data for key, _ in self.selector.select(0)}
+        for conn in list(self._parked.values()):
+            self._unpark(conn)
+            if conn.requests == 0 or conn in ready:
+                self.dispatch(conn)
+            else:
+                conn.close()
+
+    @property
+    def serving(self):
+        return self._loop_ident is not None and not self._stopping
+
+    def shutdown(self):
+        self._stopping = True
+        self._wakeup()
+        self._stopped.wait()
+
+    def server_close(self):
+        self.socket.close()
+        self.selector.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+
+    def service_actions(self):
+        if self.service_hook is not None:
+            self.service_hook()
+
+    def _accept(self):
+        for _ in range(64):
+            try:
+                sock, address = self.socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            sock.setblocking(True)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.park(Connection(sock, address))
+
+    def _wakeup(self):
+        try:
+            self._wakeup_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass
+
+    def _drain_wakeup(self):
+        try:
+            while self._wakeup_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        while True:
+            try:
+                conn = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            self._register(conn)
+
+    def park(self, conn):
+        conn.idle_since = time.monotonic()
+        if threading.get_ident() == self._loop_ident:
+            self._register(conn)
+        elif self._stopped.is_set():
+            conn.close()
+        else:
+            self._pending.put(conn)
+            self._wakeup()
+
+    def _register(self, conn):
+        if self._stopped.is_set():
+            conn.close()
+            return
+        try:
+            self.selector.register(conn.sock, selectors.EVENT_READ, conn)
+        except (ValueError, OSError):
+            conn.close()
+            return
+        self._parked[conn.sock] = conn
+
+    def _unpark(self, conn):
+        if self._parked.pop(conn.sock, None) is not None:
+            try:
+                self.selector.unregister(conn.sock)
+            except (KeyError, ValueError):
+                pass
+
+    def _expire_idle(self):
+        if not self._parked:
+            return
+        deadline = time.monotonic() - self.keep_alive_timeout
+        for conn in [conn for conn in self._parked.values() if conn.idle_since < deadline]:
+            self._unpark(conn)
+            conn.close()
+
+    def dispatch(self, conn):
+        conn.keep_alive = False
+        self.process_request(conn, conn.address)
+
+    def process_request(self, conn, client_address):
+        conn.settimeout(self.connection_timeout)
+        try:
+            self.finish_request(conn, client_address)
+        except (TimeoutError, ConnectionError, ProtocolError):
+            conn.keep_alive = False
+        except Exception:
+            conn.keep_alive = False
+            self.handle_error(conn, client_address)
+        finally:
+            self.shutdown_request(conn)
+
+    def shutdown_request(self, conn):
+        if conn.keep_alive and self.serving:
+            self.park(conn)
+        else:
+            conn.close()
+
+    def handle_error(self, conn, client_address):
+        print(f'Error handling request from {client_address}', file=sys.stderr)
+        traceback.print_exc()
+
+    def finish_request(self, conn, client_address):
+        conn.keep_alive = False
+        while True:
+            try:
+                keep_alive = self.handle_one(conn)
+            except ProtocolError:
+                conn.sendall(error_response('400 Bad Request'))
+                return
+            if not keep_alive:
+                return
+            if not conn.buffer:
+                conn.keep_alive = True
+                return
+
+    def handle_one(self, conn):
+        conn.start_deadline()
+        head = conn.read_head(self.max_head_size)
+        if head is None:
+            return False
+        method, target, version, headers = parse_head(head)
+        environ = build_environ(
+            method, target, version, headers, None, self.server_address, conn.address, multithread=self.multithread,
+        )
+        environ['wsgi.file_wrapper'] = FileWrapper
+        environ['framework.buffer_chunks'] = True
+        local = getattr(self, '_local', None)
+        if local is not None and getattr(local, 'queued_at', None) is not None:
+            # только первый запрос соединения реально ждал в очереди
+            environ['framework.queued_at'] = local.queued_at
+            local.queued_at = None
+
+        expect_continue = version == 'HTTP/1.1' and environ.get('HTTP_EXPECT', '').lower() == '100-continue'
+        transfer_encoding = environ.get('HTTP_TRANSFER_ENCODING', '').lower()
+        if transfer_encoding:
+            if transfer_encoding != 'chunked':
+                conn.sendall(error_response('501 Not Implemented'))
+                return False
+            body = ChunkedReader(conn, expect_continue)
+            environ.pop('CONTENT_LENGTH', None)
+            environ['wsgi.input_terminated'] = True
+        else:
+            try:
+                length = int(environ.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                raise ProtocolError('Invalid Content-Length') from None
+            if length < 0:
+                raise ProtocolError('Invalid Content-Length')
+            body = BodyReader(conn, length, expect_continue)
+        environ['wsgi.input'] = body
+
+        conn.requests += 1
+        keep_alive = (
+            wants_keep_alive(environ) and conn.requests < self.max_keepalive_requests and self.serving
+        )
+        keep_alive = self.run_app(conn, environ, method, version, keep_alive)
+        self.requests_served += 1
+        return keep_alive and body.drain()
+
+    def run_app(self, conn, environ, method, version, keep_alive):
+        state = {'status': None, 'headers': None, 'sent': False, 'chunked': False, 'keep_alive': keep_alive}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info:
+                try:
+                    if state['sent']:
+                        raise exc_info[1].with_traceback(exc_info[2])
+                finally:
+                    exc_info = None
+            elif state['status'] is not None:
+                raise AssertionError('start_response called twice')
+            state['status'] = status
+            state['headers'] = headers
+            return write
+
+        def head():
+            status = state['status']
+            headers = []
+            length = None
+            for name, value in state['headers']:
+                lower = name.lower()
+                if lower in HOP_BY_HOP:
+                    if lower == 'connection' and 'close' in value.lower():
+                        state['keep_alive'] = False
+                    continue
+                if lower == 'content-length':
+                    length = value
+                headers.append((name, value))
+            if environ.get('framework.abandoned'):
+                # обработчик бросили по таймауту, а он ещё может читать тело из этого же соединения
+                state['keep_alive'] = False
+            no_body = _no_body(method, status)
+            if length is None and not no_body:
+                if version == 'HTTP/1.1':
+                    state['chunked'] = True
+                else:
+                    state['keep_alive'] = False
+            state['sent'] = True
+            state['no_body'] = no_body
+            return response_head(version, status, headers, state['keep_alive'], state['chunked'])
+
+        def write(data):
+            if state['status'] is None:
+                raise AssertionError('write() before start_response()')
+            prefix = b'' if state['sent'] else head()
+            if state['no_body'] or not data:
+                if prefix:
+                    conn.sendall(prefix)
+                return
+            if state['chunked']:
+                data = encode_chunk(data)
+            conn.sendall(prefix + data if prefix else data)
+
+        try:
+            iterable = self.application(environ, start_response)
+        except Exception:
+            conn.sendall(error_response('500 Internal Server Error'))
+            traceback.print_exc()
+            return False
+        try:
+            # фоновые задачи заворачивают ответ: под обёрткой может быть файл для sendfile
+            source = iterable.iterable if isinstance(iterable, TaskIterable) else iterable
+            if isinstance(source, (FileWrapper, FileIterator)) and state['status'] is not None:
+                self._send_file(conn, source, write, head, state)
+            else:
+                for chunk in iterable:
+                    if chunk:
+                        write(chunk)
+            if state['status'] is None:
+                raise AssertionError('Application did not call start_response()')
+            if not state['sent']:
+                conn.sendall(head())
+            if state['chunked'] and not state['no_body']:
+                conn.sendall(LAST_CHUNK)
+        except (TimeoutError, ConnectionError):
+            return False
+        except Exception:
+            if not state['sent']:
+                conn.sendall(error_response('500 Internal Server Error'))
+            traceback.print_exc()
+            return False
+        finally:
+            close = getattr(iterable, 'close', None)
+            if close is not None:
+                close()
+        return state['keep_alive']
+
+    def _send_file(self, conn, iterable, write, head, state):
+        if isinstance(iterable, FileIterator):
+            file, offset, count = iterable.file, iterable.offset, iterable.length
+        else:
+            file, offset, count = iterable.file, None, None
+        if not hasattr(file, 'fileno') or state['sent']:
+            for chunk in iterable:
+                write(chunk)
+            return
+        prefix = head()
+        if state['no_body'] or state['chunked']:
+            conn.sendall(prefix)
+            if not state['no_body']:
+                for chunk in iterable:
+                    write(chunk)
+            return
+        conn.sendall(prefix)
+        if offset is None:
+            offset = file.tell()
+        if count != 0:
+            conn.sock.sendfile(file, offset, count)
+
+
+class ThreadPoolHTTPServer(ThreadPoolMixIn, HTTPServer):
+    multithread = True
+
+    def __init__(self, server_address=None, app=None, sock=None, threads=None, queue_size=None,
+                 connection_timeout=None, retry_after=None, **options):
+        self.configure_pool(threads, queue_size, connection_timeout, retry_after)
+        HTTPServer.__init__(self, server_address, app, sock, connection_timeout=self.connection_timeout, **options)
+        self.start_pool()
+
+    def server_close(self):
+        super().server_close()
+        self.stop_pool()
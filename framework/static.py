@@ -0,0 +1,142 @@
+import mimetypes
+import os
+import stat
+import time
+from email.utils import formatdate
+
+from .cache import LRUCache, not_modified
+from .exceptions import NotFound
+from .response import FileResponse, Response, parse_range
+
+ENTRY_OVERHEAD = 512
+
+
+class StaticFile:
+    __slots__ = (
+        'path', 'length', 'size', 'mtime_ns', 'modified_at', 'etag', 'last_modified', 'content_type', 'headers',
+        'body', 'response', 'checked', 'expires',
+    )
+
+    def __init__(self, path, st, content_type, cache_control, body, now):
+        self.path = path
+        self.length = st.st_size
+        self.mtime_ns = st.st_mtime_ns
+        self.modified_at = st.st_mtime
+        self.etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        self.last_modified = formatdate(st.st_mtime, usegmt=True)
+        self.content_type = content_type
+        self.headers = {
+            'Content-Type': content_type,
+            'ETag': self.etag,
+            'Last-Modified': self.last_modified,
+            'Accept-Ranges': 'bytes',
+        }
+        if cache_control is not None:
+            self.headers['Cache-Control'] = cache_control
+        self.body = body
+        self.size = ENTRY_OVERHEAD + (len(body) if body is not None else 0)
+        self.response = Response(body, headers=dict(self.headers)) if body is not None else None
+        self.checked = now
+        self.expires = float('inf')
+
+    def changed(self, st):
+        return st.st_mtime_ns != self.mtime_ns or st.st_size != self.length
+
+
+def guess_type(path):
+    content_type, encoding = mimetypes.guess_type(path)
+    if content_type is None or encoding is not None:
+        return 'application/octet-stream'
+    if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+        return content_type + '; charset=utf-8'
+    return content_type
+
+
+class StaticFiles:
+    def __init__(self, directory, max_cached_size=256 * 1024, cache_entries=1024, cache_max_bytes=32 * 1024 * 1024,
+                 check_interval=1.0, cache_control=None):
+        self.directory = os.path.realpath(directory)
+        self.max_cached_size = max_cached_size
+        self.check_interval = check_interval
+        self.cache_control = cache_control
+        self.cache = LRUCache(cache_entries, cache_max_bytes)
+
+    def __call__(self, request, filename):
+        now = time.monotonic()
+        entry = self.cache.get(filename, now)
+        if entry is None or now - entry.checked >= self.check_interval:
+            entry = self.refresh(filename, entry, now)
+
+        environ = request.environ
+        if not_modified(environ, entry):
+            return self.not_modified(entry)
+        if entry.response is None:
+            try:
+                return FileResponse(entry.path, headers=dict(entry.headers))
+            except OSError:
+                self.cache.delete(filename)
+                raise NotFound() from None
+        if 'HTTP_RANGE' in environ:
+            return self.partial(entry, environ['HTTP_RANGE'])
+        return entry.response
+
+    def resolve(self, filename):
+        parts = filename.split('/')
+        if '..' in parts or '\x00' in filename or '\\' in filename:
+            raise NotFound()
+        path = os.path.join(self.directory, *parts)
+        real = os.path.realpath(path)
+        if os.path.commonpath((real, self.directory)) != self.directory:
+            raise NotFound()
+        return real
+
+    def refresh(self, filename, entry, now):
+        path = entry.path if entry is not None else self.resolve(filename)
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode):
+            self.cache.delete(filename)
+            raise NotFound()
+        if entry is not None and not entry.changed(st):
+            entry.checked = now
+            return entry
+
+        body = None
+        if st.st_size <= self.max_cached_size:
+            try:
+                with open(path, 'rb') as f:
+                    st = os.fstat(f.fileno())
+                    body = f.read()
+            except OSError:
+                self.cache.delete(filename)
+                raise NotFound() from None
+            if len(body) != st.st_size:
+                body = None
+        entry = StaticFile(path, st, guess_type(path), self.cache_control, body, now)
+        self.cache.set(filename, entry)
+        return entry
+
+    def not_modified(self, entry):
+        response = Response(status=304, headers={'ETag': entry.etag, 'Last-Modified': entry.last_modified})
+        del response.headers['Content-Type']
+        del response.headers['Content-Length']
+        if self.cache_control is not None:
+            response.headers['Cache-Control'] = self.cache_control
+        return response
+
+    def partial(self, entry, header):
+        byte_range = parse_range(header, entry.length)
+        if byte_range is None:
+            return entry.response
+        headers = dict(entry.headers)
+        if byte_range == ():
+            headers['Content-Range'] = f'bytes */{entry.length}'
+            return Response(b'', status=416, headers=headers)
+        first, last = byte_range
+        headers['Content-Range'] = f'bytes {first}-{last}/{entry.length}'
+        return Response(entry.body[first:last + 1], status=206, headers=headers)
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,157 @@
+import io
+import queue
+import threading
+import time
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from .http import error_response
+
+
+class ThreadPoolMixIn:
+    threads = 8
+    queue_size = None
+    connection_timeout = 30.0
+    retry_after = 1
+    reject_status = '503 Service Unavailable'
+
+    def configure_pool(self, threads=None, queue_size=None, connection_timeout=None, retry_after=None):
+        if threads is not None:
+            self.threads = threads
+        if queue_size is not None:
+            self.queue_size = queue_size
+        if connection_timeout is not None:
+            self.connection_timeout = connection_timeout
+        if retry_after is not None:
+            self.retry_after = retry_after
+        self._queue = queue.Queue(self.queue_size if self.queue_size is not None else self.threads * 4)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._workers = []
+        self.accepted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.active = 0
+        self.max_queue_wait = 0.0
+
+    def start_pool(self):
+        for index in range(self.threads):
+            thread = threading.Thread(target=self._work, name=f'worker-{index}', daemon=True)
+            thread.start()
+            self._workers.append(thread)
+
+    def process_request(self, request, client_address):
+        request.settimeout(self.connection_timeout)
+        try:
+            self._queue.put_nowait((request, client_address, time.monotonic()))
+        except queue.Full:
+            self.reject(request)
+            return
+        with self._lock:
+            self.accepted += 1
+
+    def reject(self, request):
+        with self._lock:
+            self.rejected += 1
+        try:
+            request.sendall(error_response(self.reject_status, headers=[('Retry-After', str(self.retry_after))]))
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            request, client_address, queued_at = item
+            self._local.queued_at = queued_at
+            waited = time.monotonic() - queued_at
+            with self._lock:
+                self.active += 1
+                if waited > self.max_queue_wait:
+                    self.max_queue_wait = waited
+            try:
+                self.finish_request(request, client_address)
+            except TimeoutError:
+                with self._lock:
+                    self.timeouts += 1
+            except ConnectionError:
+                pass
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+
+    def stop_pool(self):
+        for _ in self._workers:
+            self._queue.put(None)
+        for thread in self._workers:
+            thread.join()
+        self._workers = []
+
+    def stats(self):
+        with self._lock:
+            return {
+                'threads': self.threads,
+                'queue_depth': self._queue.qsize(),
+                'queue_size': self._queue.maxsize,
+                'active': self.active,
+                'accepted': self.accepted,
+                'rejected': self.rejected,
+                'completed': self.completed,
+                'timeouts': self.timeouts,
+                'max_queue_wait': self.max_queue_wait,
+            }
+
+
+class DeadlineReader(io.RawIOBase):
+    def __init__(self, sock, timeout):
+        self.sock = sock
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError('Request was not received in time')
+        self.sock.settimeout(remaining)
+        try:
+            return self.sock.recv_into(buffer)
+        finally:
+            self.sock.settimeout(self.timeout)
+
+
+class PoolRequestHandler(WSGIRequestHandler):
+    def setup(self):
+        super().setup()
+        timeout = self.server.connection_timeout
+        if timeout is not None:
+            # общий срок на чтение заголовков и тела, а не на каждый recv: иначе slowloris держит поток
+            self.rfile.close()
+            self.rfile = io.BufferedReader(DeadlineReader(self.connection, timeout))
+
+    def get_environ(self):
+        environ = super().get_environ()
+        queued_at = getattr(self.server._local, 'queued_at', None)
+        if queued_at is not None:
+            environ['framework.queued_at'] = queued_at
+        return environ
+
+
+class ThreadPoolWSGIServer(ThreadPoolMixIn, WSGIServer):
+    def __init__(self, server_address, handler_class=PoolRequestHandler, threads=None, queue_size=None,
+                 connection_timeout=None, retry_after=None, bind_and_activate=True):
+        self.configure_pool(threads, queue_size, connection_timeout, retry_after)
+        super().__init__(server_address, handler_class, bind_and_activate)
+        self.start_pool()
+
+    def server_close(self):
+        super().server_close()
+        self.stop_pool()
@@ -0,0 +1,127 @@
+import logging
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from time import perf_counter
+
+logger = logging.getLogger('framework.tracing')
+
+
+class Trace:
+    __slots__ = ('started', 'last', 'phases')
+
+    def __init__(self):
+        self.started = self.last = perf_counter()
+        self.phases = []
+
+    def mark(self, phase):
+        now = perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    @property
+    def total(self):
+        return self.last - self.started
+
+    def format(self):
+        return ' '.join(f'{phase}={duration * 1000:.2f}ms' for phase, duration in self.phases)
+
+
+class Tracer:
+    def __init__(self, threshold=0.5, keep=100, logger=logger):
+        self.threshold = threshold
+        self.logger = logger
+        self.slow = deque(maxlen=keep)
+
+    def start(self):
+        return Trace()
+
+    def finish(self, request, response, trace):
+        total = trace.total
+        if total < self.threshold:
+            return
+        route = request.route.pattern if request.route is not None else None
+        self.slow.append({
+            'method': request.method,
+            'path': request.path,
+            'route': route,
+            'status': response.status if response is not None else None,
+            'total': total,
+            'phases': dict(trace.phases),
+        })
+        self.logger.warning(
+            'Slow request %s %s (%s) %.2fms: %s', request.method, request.path, route, total * 1000, trace.format(),
+        )
+
+
+def collapse(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+class Sampler:
+    def __init__(self, interval=0.005, directory=None):
+        self.interval = interval
+        self.directory = directory or tempfile.gettempdir()
+        self.stacks = Counter()
+        self.last_output = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration):
+        if self.running:
+            return False
+        self.stacks = Counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(duration,), name='framework-sampler', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def toggle(self, duration):
+        if self.running:
+            self._stop.set()
+        else:
+            self.start(duration)
+
+    def sample(self):
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident != own:
+                self.stacks[collapse(frame)] += 1
+
+    def _run(self, duration):
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline and not self._stop.wait(self.interval):
+            self.sample()
+        self.dump()
+
+    def dump(self, path=None):
+        if path is None:
+            name = f'framework-profile-{os.getpid()}-{int(time.time())}.folded'
+            path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        self.last_output = path
+        logger.warning('Wrote %d sampled stacks to %s', sum(self.stacks.values()), path)
+        return path
+
+    def install(self, signum=signal.SIGUSR2, duration=10.0):
+        signal.signal(signum, lambda signum, frame: self.toggle(duration))
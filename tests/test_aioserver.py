@@ -0,0 +1,86 @@
+import asyncio
+import unittest
+
+from framework.aioserver import AsyncServer
+from framework.app import App
+from framework.response import Response, StreamingResponse
+
+
+class TestAsyncServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.app = App()
+
+        @self.app.route('/hi')
+        def hi(request):
+            return Response(body='hi')
+
+        @self.app.route('/echo', methods=['POST'])
+        async def echo(request):
+            return Response(body=request.body)
+
+        @self.app.route('/stream')
+        def stream(request):
+            return StreamingResponse(iter(['a', 'bb']))
+
+        self.server = AsyncServer(self.app, port=0, keep_alive_timeout=1)
+        await self.server.start()
+        self.port = self.server.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def exchange(self, payload):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(payload)
+        await writer.drain()
+        data = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return data
+
+    async def test_pipelined_keep_alive_requests(self):
+        data = await self.exchange(
+            b'GET /hi HTTP/1.1\r\nHost: x\r\n\r\n'
+            b'POST /echo HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello'
+            b'GET /stream HTTP/1.1\r\n\r\n'
+            b'GET /hi HTTP/1.1\r\nConnection: close\r\n\r\n'
+        )
+        self.assertEqual(data.count(b'HTTP/1.1 200 OK'), 4)
+        self.assertLess(data.index(b'\r\n\r\nhi'), data.index(b'hello'))
+        self.assertIn(b'Transfer-Encoding: chunked', data)
+        self.assertIn(b'1\r\na\r\n2\r\nbb\r\n0\r\n\r\n', data)
+        self.assertTrue(data.endswith(b'hi'))
+        self.assertIn(b'Connection: close', data)
+
+    async def test_chunked_request_body(self):
+        data = await self.exchange(
+            b'POST /echo HTTP/1.1\r\nTransfer-Encoding: chunked\r\nConnection: close\r\n\r\n'
+            b'3\r\nabc\r\n2\r\nde\r\n0\r\n\r\n'
+        )
+        self.assertTrue(data.endswith(b'\r\n\r\nabcde'))
+
+    async def test_http10_closes_connection(self):
+        data = await self.exchange(b'GET /hi HTTP/1.0\r\n\r\n')
+        self.assertIn(b'Connection: close', data)
+
+    async def test_bad_request(self):
+        data = await self.exchange(b'NONSENSE\r\n\r\n')
+        self.assertTrue(data.startswith(b'HTTP/1.1 400 Bad Request'))
+
+    async def test_negative_content_length(self):
+        data = await self.exchange(b'POST /echo HTTP/1.1\r\nContent-Length: -5\r\n\r\nhello')
+        self.assertTrue(data.startswith(b'HTTP/1.1 400 Bad Request'))
+
+    async def test_unsupported_transfer_encoding(self):
+        data = await self.exchange(b'POST /echo HTTP/1.1\r\nTransfer-Encoding: gzip, chunked\r\n\r\n0\r\n\r\n')
+        self.assertTrue(data.startswith(b'HTTP/1.1 501 Not Implemented'))
+
+    async def test_idle_connection_closed(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        data = await asyncio.wait_for(reader.read(), 5)
+        self.assertEqual(data, b'')
+        writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import json
 import unittest
 from io import BytesIO
 
@@ -118,6 +119,236 @@ class TestApp(unittest.TestCase):
         self.assertIsInstance(received_request, Request)
         self.assertEqual(received_request.query['key'], 'value')
 
+    def test_path_parameters_passed_to_handler(self):
+        received = {}
+
+        @self.app.route('/users/<int:id>')
+        def user_handler(request, id):
+            received['id'] = id
+            received['params'] = request.path_params
+            return Response(body=f'user {id}')
+
+        environ = self.base_environ.copy()
+        environ['PATH_INFO'] = '/users/42'
+
+        def start_response(status, headers):
+            self.assertEqual(status, '200 OK')
+
+        response_body = self.app(environ, start_response)
+        self.assertEqual(response_body, [b'user 42'])
+        self.assertEqual(received, {'id': 42, 'params': {'id': 42}})
+
+    def test_body_over_limit_rejected_before_handler(self):
+        app = App(max_body_size=10)
+        called = []
+
+        @app.route('/upload', methods=['POST'])
+        def upload(request):
+            called.append(True)
+            return Response(body='OK')
+
+        environ = self.base_environ.copy()
+        environ['REQUEST_METHOD'] = 'POST'
+        environ['PATH_INFO'] = '/upload'
+        environ['CONTENT_LENGTH'] = '100'
+        environ['wsgi.input'] = BytesIO(b'x' * 100)
+
+        def start_response(status, headers):
+            self.assertEqual(status, '413 Content Too Large')
+
+        app(environ, start_response)
+        self.assertEqual(called, [])
+        self.assertEqual(environ['wsgi.input'].tell(), 0)
+
+    def test_streamed_body_over_limit(self):
+        app = App(max_body_size=10)
+
+        @app.route('/upload', methods=['POST'])
+        def upload(request):
+            return Response(body=str(sum(len(chunk) for chunk in request.stream)))
+
+        environ = self.base_environ.copy()
+        environ['REQUEST_METHOD'] = 'POST'
+        environ['PATH_INFO'] = '/upload'
+        del environ['CONTENT_LENGTH']
+        environ['wsgi.input_terminated'] = True
+        environ['wsgi.input'] = BytesIO(b'x' * 100)
+
+        def start_response(status, headers):
+            self.assertEqual(status, '413 Content Too Large')
+
+        app(environ, start_response)
+
+    def test_async_handler_under_wsgi(self):
+        @self.app.route('/async')
+        async def async_handler(request):
+            return Response(body='from coroutine')
+
+        environ = self.base_environ.copy()
+        environ['PATH_INFO'] = '/async'
+
+        def start_response(status, headers):
+            self.assertEqual(status, '200 OK')
+
+        self.assertEqual(self.app(environ, start_response), [b'from coroutine'])
+
+    def test_handler_returning_dict_becomes_json(self):
+        @self.app.route('/data')
+        def data_handler(request):
+            return {'ok': True}
+
+        environ = self.base_environ.copy()
+        environ['PATH_INFO'] = '/data'
+        captured = {}
+
+        def start_response(status, headers):
+            captured.update(headers)
+
+        body = b''.join(self.app(environ, start_response))
+        self.assertEqual(json.loads(body), {'ok': True})
+        self.assertEqual(captured['Content-Type'], 'application/json')
+
+    def test_json_backend_configurable(self):
+        app = App(json_backend='json')
+        self.assertEqual(app.json.name, 'json')
+        received = {}
+
+        @app.route('/post', methods=['POST'])
+        def post_handler(request):
+            received['backend'] = request.json_backend
+            return request.json()
+
+        environ = self.base_environ.copy()
+        environ['REQUEST_METHOD'] = 'POST'
+        environ['PATH_INFO'] = '/post'
+        environ['CONTENT_LENGTH'] = '8'
+        environ['wsgi.input'] = BytesIO(b'{"a": 1}')
+        body = b''.join(app(environ, lambda status, headers: None))
+        self.assertEqual(json.loads(body), {'a': 1})
+        self.assertIs(received['backend'], app.json)
+
+    def call(self, method, path):
+        environ = dict(self.base_environ, REQUEST_METHOD=method, PATH_INFO=path)
+        result = {}
+
+        def start_response(status, headers, exc_info=None):
+            result['status'] = status
+            result['headers'] = dict(headers)
+
+        result['body'] = b''.join(self.app(environ, start_response))
+        return result
+
+    def test_wrong_method_returns_405_with_allow(self):
+        @self.app.route('/items', methods=['GET', 'POST'])
+        def items(request):
+            return 'items'
+
+        result = self.call('DELETE', '/items')
+        self.assertEqual(result['status'], '405 Method Not Allowed')
+        self.assertEqual(result['headers']['Allow'], 'GET, HEAD, OPTIONS, POST')
+        self.assertEqual(self.call('GET', '/nothing')['status'], '404 Not Found')
+
+    def test_automatic_head_strips_body(self):
+        @self.app.route('/page')
+        def page(request):
+            return 'hello'
+
+        result = self.call('HEAD', '/page')
+        self.assertEqual(result['status'], '200 OK')
+        self.assertEqual(result['headers']['Content-Length'], '5')
+        self.assertEqual(result['body'], b'')
+
+    def test_automatic_options(self):
+        @self.app.route('/page/<int:id>', methods=['GET', 'PUT'])
+        def page(request, id):
+            return 'page'
+
+        result = self.call('OPTIONS', '/page/1')
+        self.assertEqual(result['status'], '204 No Content')
+        self.assertEqual(result['headers']['Allow'], 'GET, HEAD, OPTIONS, PUT')
+        self.assertNotIn('Content-Length', result['headers'])
+        self.assertNotIn('Content-Type', result['headers'])
+
+    def test_route_added_after_first_request(self):
+        @self.app.route('/a', methods=['GET'])
+        def a(request):
+            return 'a'
+
+        self.assertEqual(self.call('GET', '/a')['status'], '200 OK')
+        self.app.router.add_route('/b', 'GET', lambda request: 'b')
+        result = self.call('GET', '/b')
+        self.assertEqual(result['status'], '200 OK')
+        self.assertEqual(result['body'], b'b')
+        self.assertEqual(self.call('HEAD', '/a')['status'], '200 OK')
+        self.assertEqual(self.call('OPTIONS', '/a')['status'], '204 No Content')
+        self.assertEqual(self.call('POST', '/a')['status'], '405 Method Not Allowed')
+
+    def test_routes_introspection(self):
+        @self.app.route('/users/<int:id>', methods=['GET'], timeout=2)
+        def user(request, id):
+            return {}
+
+        routes = {(info['pattern'], info['method']): info for info in self.app.routes()}
+        info = routes[('/users/<int:id>', 'GET')]
+        self.assertEqual(info['handler'], user.__qualname__)
+        self.assertEqual(info['params'], ['id'])
+        self.assertEqual(info['timeout'], 2)
+        self.assertFalse(info['automatic'])
+        self.assertTrue(routes[('/users/<int:id>', 'HEAD')]['automatic'])
+        self.assertIn(('/users/<int:id>', 'OPTIONS'), routes)
+
+    def test_warm_up_exercises_get_routes(self):
+        calls = []
+
+        @self.app.route('/ready')
+        def ready(request):
+            calls.append(request.path)
+            return 'ok'
+
+        @self.app.route('/users/<int:id>')
+        def user(request, id):
+            calls.append(request.path)
+            return {}
+
+        @self.app.route('/submit', methods=['POST'])
+        def submit(request):
+            calls.append(request.path)
+            return 'done'
+
+        metrics = self.app.enable_metrics()
+        self.assertEqual(self.app.warm_up(), {'/ready': 200, '/metrics': 200})
+        self.assertEqual(calls, ['/ready'])
+        self.assertEqual(self.app.warm_up(['/users/1']), {'/users/1': 200})
+        self.assertEqual(metrics.snapshot()['requests'], [])
+
+    def test_warm_up_on_startup(self):
+        calls = []
+
+        @self.app.route('/ready')
+        def ready(request):
+            calls.append(1)
+            return 'ok'
+
+        self.app.enable_warm_up()
+        self.app.startup()
+        self.addCleanup(self.app.shutdown)
+        self.assertEqual(calls, [1])
+
+    def test_startup_runs_on_first_wsgi_call(self):
+        calls = []
+        self.app.on_startup(lambda: calls.append('startup'))
+
+        @self.app.route('/page')
+        def page(request):
+            calls.append('page')
+            return 'ok'
+
+        self.addCleanup(self.app.shutdown)
+        self.assertEqual(self.call('GET', '/page')['status'], '200 OK')
+        self.call('GET', '/page')
+        self.assertTrue(self.app.started)
+        self.assertEqual(calls, ['startup', 'page', 'page'])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,153 @@
+import asyncio
+import unittest
+
+from framework.app import App
+from framework.response import Response, StreamingResponse
+
+
+class TestASGI(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.app = App()
+        self.sent = []
+
+    async def call(self, method='GET', path='/', body_chunks=(b'',), headers=()):
+        scope = {
+            'type': 'http',
+            'http_version': '1.1',
+            'method': method,
+            'path': path,
+            'query_string': b'name=World',
+            'headers': list(headers),
+        }
+        messages = [
+            {'type': 'http.request', 'body': chunk, 'more_body': index < len(body_chunks) - 1}
+            for index, chunk in enumerate(body_chunks)
+        ]
+
+        self.remaining = len(messages)
+
+        async def receive():
+            message = messages.pop(0)
+            self.remaining = len(messages)
+            return message
+
+        async def send(message):
+            self.sent.append(message)
+
+        await self.app.asgi(scope, receive, send)
+        start = self.sent[0]
+        body = b''.join(message.get('body', b'') for message in self.sent[1:])
+        return start['status'], dict(start['headers']), body
+
+    async def test_sync_handler(self):
+        @self.app.route('/hello')
+        def hello(request):
+            return Response(body=f"Hello, {request.query['name']}!")
+
+        status, headers, body = await self.call(path='/hello')
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'Hello, World!')
+        self.assertEqual(headers[b'content-length'], b'13')
+
+    async def test_async_handler_with_body(self):
+        @self.app.route('/echo', methods=['POST'])
+        async def echo(request):
+            await asyncio.sleep(0)
+            return Response(body=request.body)
+
+        status, _, body = await self.call('POST', '/echo', body_chunks=(b'abc', b'def'))
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'abcdef')
+
+    async def test_sync_handler_streams_body(self):
+        chunks = [b'x' * 10] * 10
+        pending = []
+
+        @self.app.route('/upload', methods=['POST'])
+        def upload(request):
+            first = request.stream.read(10)
+            pending.append(self.remaining)
+            return Response(body=str(len(first) + len(request.stream.read())))
+
+        status, _, body = await self.call('POST', '/upload', body_chunks=chunks)
+        self.assertEqual(body, b'100')
+        self.assertGreater(pending[0], 5)
+
+    async def test_sync_handler_form(self):
+        @self.app.route('/form', methods=['POST'])
+        def form(request):
+            return Response(body=request.form()['name'])
+
+        headers = [(b'content-type', b'application/x-www-form-urlencoded')]
+        status, _, body = await self.call('POST', '/form', body_chunks=(b'na', b'me=Al', b'ice'), headers=headers)
+        self.assertEqual(body, b'Alice')
+
+    async def test_async_handler_body_spooled_to_disk(self):
+        rolled = []
+
+        @self.app.route('/big', methods=['POST'])
+        async def big(request):
+            rolled.append(request.environ['wsgi.input'].file._rolled)
+            return Response(body=str(len(request.body)))
+
+        chunks = [b'x' * 256 * 1024] * 8
+        status, _, body = await self.call('POST', '/big', body_chunks=chunks)
+        self.assertEqual(body, str(2 * 1024 * 1024).encode())
+        self.assertEqual(rolled, [True])
+
+    async def test_disconnect_while_reading(self):
+        @self.app.route('/upload', methods=['POST'])
+        async def upload(request):
+            return Response(body=request.body)
+
+        messages = [{'type': 'http.request', 'body': b'abc', 'more_body': True}, {'type': 'http.disconnect'}]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            self.sent.append(message)
+
+        scope = {'type': 'http', 'method': 'POST', 'path': '/upload', 'query_string': b'', 'headers': []}
+        await self.app.asgi(scope, receive, send)
+        self.assertEqual(self.sent, [])
+
+    async def test_streaming_response(self):
+        @self.app.route('/stream')
+        def stream(request):
+            return StreamingResponse(iter(['a', 'b']))
+
+        status, headers, body = await self.call(path='/stream')
+        self.assertEqual(body, b'ab')
+        self.assertNotIn(b'content-length', headers)
+
+    async def test_not_found(self):
+        status, _, _ = await self.call(path='/missing')
+        self.assertEqual(status, 404)
+
+    async def test_body_limit(self):
+        self.app.max_body_size = 4
+
+        @self.app.route('/upload', methods=['POST'])
+        async def upload(request):
+            return Response(body='OK')
+
+        status, _, _ = await self.call('POST', '/upload', body_chunks=(b'abc', b'def'))
+        self.assertEqual(status, 413)
+
+    async def test_lifespan(self):
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            self.sent.append(message['type'])
+
+        await self.app.asgi({'type': 'lifespan'}, receive, send)
+        self.assertEqual(self.sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+
+
+if __name__ == '__main__':
+    unittest.main()
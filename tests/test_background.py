@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+import unittest
+from io import BytesIO
+
+from framework.app import App
+from framework.background import TaskQueue
+from framework.response import Response
+
+
+def environ(path, method='GET'):
+    return {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'wsgi.input': BytesIO(b''),
+        'CONTENT_LENGTH': '0',
+    }
+
+
+class TestTaskQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = TaskQueue(workers=2, max_queue=10, retry_delay=0.01)
+        self.addCleanup(self.queue.close, 5)
+
+    def test_runs_tasks(self):
+        done = []
+        for i in range(5):
+            self.assertTrue(self.queue.add(done.append, i))
+        self.assertTrue(self.queue.drain(5))
+        self.assertEqual(sorted(done), [0, 1, 2, 3, 4])
+        stats = self.queue.stats()
+        self.assertEqual(stats['completed'], 5)
+        self.assertEqual(stats['pending'], 0)
+        self.assertGreater(stats['latency_max'], 0)
+
+    def test_runs_coroutines(self):
+        done = []
+
+        async def task(value):
+            await asyncio.sleep(0)
+            done.append(value)
+
+        self.queue.add(task, 'async')
+        self.queue.drain(5)
+        self.assertEqual(done, ['async'])
+
+    def test_retries_failed_task(self):
+        self.queue.retries = 2
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise RuntimeError('try again')
+
+        self.queue.add(flaky)
+        self.assertTrue(self.queue.drain(5))
+        self.assertEqual(len(attempts), 3)
+        stats = self.queue.stats()
+        self.assertEqual((stats['retried'], stats['completed'], stats['failed']), (2, 1, 0))
+
+    def test_gives_up_after_retries(self):
+        self.queue.retries = 1
+
+        def broken():
+            raise RuntimeError('broken')
+
+        with self.assertLogs('framework.background', 'ERROR'):
+            self.queue.add(broken)
+            self.queue.drain(5)
+        self.assertEqual(self.queue.stats()['failed'], 1)
+
+    def test_full_queue_rejects(self):
+        queue = TaskQueue(workers=1, max_queue=1)
+        release = threading.Event()
+        queue.add(release.wait, 5)
+        deadline = time.time() + 5
+        while queue.stats()['active'] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(queue.add(print))
+        with self.assertLogs('framework.background', 'WARNING'):
+            self.assertFalse(queue.add(print))
+        self.assertEqual(queue.stats()['rejected'], 1)
+        release.set()
+        self.assertTrue(queue.close(5))
+
+    def test_close_drains_pending_tasks(self):
+        done = []
+        for i in range(10):
+            self.queue.add(lambda i=i: (time.sleep(0.01), done.append(i)))
+        self.assertTrue(self.queue.close(5))
+        self.assertEqual(len(done), 10)
+        self.queue.add(done.append, 'after')
+        self.queue.drain(5)
+        self.assertEqual(done[-1], 'after')
+
+
+class TestAppBackgroundTasks(unittest.TestCase):
+
+    def setUp(self):
+        self.app = App()
+        self.events = []
+        self.app.startup()
+        self.addCleanup(self.app.shutdown)
+
+    def call(self, path, method='GET'):
+        iterable = self.app(environ(path, method), lambda status, headers, exc_info=None: None)
+        body = b''.join(iterable)
+        self.events.append('sent')
+        if hasattr(iterable, 'close'):
+            iterable.close()
+        self.app.background.drain(5)
+        return body
+
+    def test_request_tasks_run_after_body_is_sent(self):
+        @self.app.route('/users', methods=['POST'])
+        def create(request):
+            request.add_background_task(self.events.append, 'audit')
+            return 'created'
+
+        self.assertEqual(self.call('/users', 'POST'), b'created')
+        self.assertEqual(self.events, ['sent', 'audit'])
+
+    def test_response_tasks_run_once_even_when_cached(self):
+        @self.app.route('/page', cache=60)
+        def page(request):
+            return Response('page').add_background_task(self.events.append, 'rendered')
+
+        self.call('/page')
+        self.call('/page')
+        self.assertEqual(self.events, ['sent', 'rendered', 'sent'])
+
+    def test_tasks_survive_compression(self):
+        self.app.enable_compression(min_size=1)
+
+        @self.app.route('/big')
+        def big(request):
+            return Response('x' * 1000).add_background_task(self.events.append, 'done')
+
+        environ_ = dict(environ('/big'), HTTP_ACCEPT_ENCODING='gzip')
+        iterable = self.app(environ_, lambda status, headers, exc_info=None: None)
+        b''.join(iterable)
+        iterable.close()
+        self.app.background.drain(5)
+        self.assertEqual(self.events, ['done'])
+
+    def test_no_tasks_returns_plain_iterable(self):
+        @self.app.route('/plain')
+        def plain(request):
+            return 'plain'
+
+        iterable = self.app(environ('/plain'), lambda status, headers, exc_info=None: None)
+        self.assertIsInstance(iterable, list)
+
+    def test_shutdown_drains_queue(self):
+        app = App()
+        app.enable_background_tasks(workers=1)
+        done = []
+
+        @app.route('/slow')
+        def slow(request):
+            request.add_background_task(lambda: (time.sleep(0.05), done.append(1)))
+            return 'ok'
+
+        app.startup()
+        for _ in range(3):
+            app(environ('/slow'), lambda status, headers, exc_info=None: None).close()
+        app.shutdown()
+        self.assertEqual(done, [1, 1, 1])
+
+    def test_asgi_runs_tasks_after_send(self):
+        @self.app.route('/asgi')
+        async def handler(request):
+            request.add_background_task(self.events.append, 'task')
+            return 'ok'
+
+        async def run():
+            messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+            async def receive():
+                return messages.pop(0)
+
+            async def send(message):
+                if message['type'] == 'http.response.body' and not message.get('more_body'):
+                    self.events.append('sent')
+
+            scope = {'type': 'http', 'method': 'GET', 'path': '/asgi', 'query_string': b'', 'headers': []}
+            await self.app.asgi(scope, receive, send)
+
+        asyncio.run(run())
+        self.app.background.drain(5)
+        self.assertEqual(self.events, ['sent', 'task'])
+
+    def test_metrics_expose_queue(self):
+        self.app.enable_metrics()
+
+        @self.app.route('/work')
+        def work(request):
+            request.add_background_task(lambda: None)
+            return 'ok'
+
+        self.call('/work')
+        body = self.call('/metrics').decode()
+        self.assertIn('framework_background_completed_total 1', body)
+        self.assertIn('framework_background_queue_depth 0', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
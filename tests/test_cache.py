@@ -0,0 +1,155 @@
+import unittest
+from io import BytesIO
+
+from framework.app import App
+from framework.cache import CacheEntry, LRUCache, etag_matches, make_etag
+from framework.response import Response, StreamingResponse
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def entry(self, body=b'x', expires=100.0):
+        return CacheEntry(Response(body=body), '"tag"', 0, expires)
+
+    def test_hit_and_miss(self):
+        cache = LRUCache()
+        cache.set('a', self.entry())
+        self.assertIsNotNone(cache.get('a', 0))
+        self.assertIsNone(cache.get('b', 0))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_ttl_expiry(self):
+        cache = LRUCache()
+        cache.set('a', self.entry(expires=10))
+        self.assertIsNone(cache.get('a', 10))
+        self.assertEqual(cache.stats()['expirations'], 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction_by_count(self):
+        cache = LRUCache(max_entries=2)
+        cache.set('a', self.entry())
+        cache.set('b', self.entry())
+        cache.get('a', 0)
+        cache.set('c', self.entry())
+        self.assertIsNotNone(cache.get('a', 0))
+        self.assertIsNone(cache.get('b', 0))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_eviction_by_memory(self):
+        big = self.entry(body=b'x' * 1000)
+        cache = LRUCache(max_bytes=big.size * 2)
+        for key in 'abc':
+            cache.set(key, self.entry(body=b'x' * 1000))
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.size, cache.max_bytes)
+
+    def test_chunked_entry_not_joined(self):
+        response = Response(body=[b'x' * 500, b'y' * 500])
+        entry = CacheEntry(response, make_etag(*response.chunks()), 0, 60)
+        self.assertEqual(entry.size, self.entry(body=b'z' * 1000).size)
+        self.assertEqual(entry.etag, make_etag(b'x' * 500 + b'y' * 500))
+        self.assertIsInstance(response.chunks(), list)
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"a", "b"', '"b"'))
+        self.assertTrue(etag_matches('W/"a"', '"a"'))
+        self.assertTrue(etag_matches('*', '"a"'))
+        self.assertFalse(etag_matches('"c"', '"a"'))
+
+
+class TestResponseCaching(unittest.TestCase):
+
+    def setUp(self):
+        self.app = App()
+        self.calls = 0
+
+        @self.app.route('/users', cache=60, vary=['Accept-Language'])
+        def users(request):
+            self.calls += 1
+            return Response(body=f"users {request.query.get('page', '1')}")
+
+        @self.app.route('/stream', cache=60)
+        def stream(request):
+            self.calls += 1
+            return StreamingResponse(iter(['a']))
+
+    def request(self, path='/users', query='', **headers):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'wsgi.input': BytesIO(b''),
+        }
+        environ.update(headers)
+        captured = {}
+
+        def start_response(status, headers):
+            captured['status'] = status
+            captured['headers'] = dict(headers)
+
+        body = b''.join(self.app(environ, start_response))
+        return captured['status'], captured['headers'], body
+
+    def test_second_request_served_from_cache(self):
+        first = self.request()
+        second = self.request()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(first, second)
+        self.assertIn('ETag', first[1])
+        self.assertIn('Last-Modified', first[1])
+        self.assertEqual(first[1]['Cache-Control'], 'max-age=60')
+        self.assertEqual(first[1]['Vary'], 'Accept-Language')
+        stats = self.app.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_query_normalized(self):
+        self.request(query='page=2&sort=name')
+        _, _, body = self.request(query='sort=name&page=2')
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(body, b'users 2')
+        self.request(query='page=3')
+        self.assertEqual(self.calls, 2)
+
+    def test_vary_header_part_of_key(self):
+        self.request(HTTP_ACCEPT_LANGUAGE='en')
+        self.request(HTTP_ACCEPT_LANGUAGE='ru')
+        self.request(HTTP_ACCEPT_LANGUAGE='en')
+        self.assertEqual(self.calls, 2)
+
+    def test_if_none_match_returns_304_without_handler(self):
+        _, headers, _ = self.request()
+        status, not_modified_headers, body = self.request(HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+        self.assertEqual(not_modified_headers['ETag'], headers['ETag'])
+        self.assertNotIn('Content-Type', not_modified_headers)
+        self.assertEqual(self.calls, 1)
+
+    def test_if_modified_since(self):
+        _, headers, _ = self.request()
+        status, _, _ = self.request(HTTP_IF_MODIFIED_SINCE=headers['Last-Modified'])
+        self.assertEqual(status, '304 Not Modified')
+        status, _, _ = self.request(HTTP_IF_MODIFIED_SINCE='Thu, 01 Jan 1970 00:00:00 GMT')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(self.calls, 1)
+
+    def test_streaming_responses_not_cached(self):
+        self.request('/stream')
+        self.request('/stream')
+        self.assertEqual(self.calls, 2)
+
+    def test_non_get_not_cached(self):
+        @self.app.route('/users', methods=['POST'], cache=60)
+        def create(request):
+            self.calls += 1
+            return Response(body='created')
+
+        environ = {'REQUEST_METHOD': 'POST', 'PATH_INFO': '/users', 'wsgi.input': BytesIO(b'')}
+        self.app(dict(environ), lambda status, headers: None)
+        self.app(dict(environ), lambda status, headers: None)
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import gzip
+import unittest
+from io import BytesIO
+
+from framework.app import App
+from framework.compression import Compressor, parse_accept_encoding
+from framework.response import Response, StreamingResponse
+
+LARGE = 'x' * 2000
+
+
+class TestCompressor(unittest.TestCase):
+
+    def test_parse_accept_encoding(self):
+        self.assertEqual(
+            parse_accept_encoding('gzip;q=0.5, br, identity;q=0'),
+            {'gzip': 0.5, 'br': 1.0, 'identity': 0.0},
+        )
+
+    def test_negotiate(self):
+        compressor = Compressor()
+        compressor.encodings = ('gzip',)
+        self.assertEqual(compressor.negotiate('gzip, deflate'), 'gzip')
+        self.assertEqual(compressor.negotiate('*'), 'gzip')
+        self.assertIsNone(compressor.negotiate('gzip;q=0'))
+        self.assertIsNone(compressor.negotiate('deflate'))
+        self.assertIsNone(compressor.negotiate(None))
+
+
+class TestCompressionInApp(unittest.TestCase):
+
+    def setUp(self):
+        self.app = App()
+        self.compressor = self.app.enable_compression(min_size=100)
+        self.compressor.encodings = ('gzip',)
+
+        @self.app.route('/large')
+        def large(request):
+            return Response(body=LARGE)
+
+        @self.app.route('/small')
+        def small(request):
+            return Response(body='tiny')
+
+        @self.app.route('/image')
+        def image(request):
+            return Response(body=b'\x89PNG' * 500, headers={'Content-Type': 'image/png'})
+
+        @self.app.route('/stream')
+        def stream(request):
+            return StreamingResponse(iter(['a' * 1000, 'b' * 1000]))
+
+        @self.app.route('/chunks')
+        def chunks(request):
+            return Response(body=[LARGE[:100], LARGE[100:].encode()])
+
+        @self.app.route('/cached', cache=60)
+        def cached(request):
+            return Response(body=LARGE)
+
+    def get(self, path, accept_encoding='gzip'):
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'wsgi.input': BytesIO(b'')}
+        if accept_encoding:
+            environ['HTTP_ACCEPT_ENCODING'] = accept_encoding
+        captured = {}
+
+        def start_response(status, headers):
+            captured['headers'] = dict(headers)
+
+        body = b''.join(self.app(environ, start_response))
+        return captured['headers'], body
+
+    def test_large_body_compressed(self):
+        headers, body = self.get('/large')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(headers['Content-Length'], str(len(body)))
+        self.assertEqual(gzip.decompress(body), LARGE.encode())
+
+    def test_chunked_body_compressed(self):
+        headers, body = self.get('/chunks')
+        self.assertEqual(headers['Content-Length'], str(len(body)))
+        self.assertEqual(gzip.decompress(body), LARGE.encode())
+
+    def test_client_without_gzip(self):
+        headers, body = self.get('/large', accept_encoding=None)
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(body, LARGE.encode())
+
+    def test_below_threshold_not_compressed(self):
+        headers, body = self.get('/small')
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(body, b'tiny')
+
+    def test_already_compressed_type_skipped(self):
+        headers, _ = self.get('/image')
+        self.assertNotIn('Content-Encoding', headers)
+
+    def test_streaming_body_compressed(self):
+        headers, body = self.get('/stream')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', headers)
+        self.assertEqual(gzip.decompress(body), b'a' * 1000 + b'b' * 1000)
+
+    def test_cacheable_response_compressed_once(self):
+        first_headers, first = self.get('/cached')
+        _, second = self.get('/cached')
+        self.assertEqual(first, second)
+        self.assertTrue(first_headers['ETag'].startswith('W/"'))
+        stats = self.compressor.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+
+    def test_shared_etag_on_different_routes(self):
+        for path, letter in (('/first', 'a'), ('/second', 'b')):
+            self.app.route(path)(lambda request, letter=letter: Response(
+                body=letter * 1000, headers={'ETag': '"same"'},
+            ))
+        _, first = self.get('/first')
+        _, second = self.get('/second')
+        self.assertEqual(gzip.decompress(first), b'a' * 1000)
+        self.assertEqual(gzip.decompress(second), b'b' * 1000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+from io import BytesIO
+
+from framework.http import ProtocolError, build_environ, parse_head, wants_keep_alive
+
+
+class TestHTTP(unittest.TestCase):
+
+    def test_parse_head(self):
+        method, target, version, headers = parse_head(
+            b'GET /a%20b?x=1 HTTP/1.1\r\nHost: example.com\r\nX-Tag: one\r\nX-Tag: two'
+        )
+        self.assertEqual((method, target, version), ('GET', '/a%20b?x=1', 'HTTP/1.1'))
+        self.assertEqual(headers, [('Host', 'example.com'), ('X-Tag', 'one'), ('X-Tag', 'two')])
+
+    def test_parse_head_rejects_garbage(self):
+        with self.assertRaises(ProtocolError):
+            parse_head(b'GET /')
+        with self.assertRaises(ProtocolError):
+            parse_head(b'GET / HTTP/2.0')
+        with self.assertRaises(ProtocolError):
+            parse_head(b'GET / HTTP/1.1\r\nno colon here')
+
+    def test_build_environ(self):
+        headers = [('Host', 'example.com'), ('Content-Type', 'text/plain'), ('X-Tag', 'one'), ('X-Tag', 'two')]
+        environ = build_environ('GET', '/a%20b?x=1', 'HTTP/1.1', headers, BytesIO(), ('0.0.0.0', 80), ('1.2.3.4', 5))
+        self.assertEqual(environ['PATH_INFO'], '/a b')
+        self.assertEqual(environ['QUERY_STRING'], 'x=1')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_X_TAG'], 'one,two')
+        self.assertEqual(environ['REMOTE_ADDR'], '1.2.3.4')
+
+    def test_keep_alive(self):
+        self.assertTrue(wants_keep_alive({'SERVER_PROTOCOL': 'HTTP/1.1'}))
+        self.assertFalse(wants_keep_alive({'SERVER_PROTOCOL': 'HTTP/1.1', 'HTTP_CONNECTION': 'close'}))
+        self.assertFalse(wants_keep_alive({'SERVER_PROTOCOL': 'HTTP/1.0'}))
+        self.assertTrue(wants_keep_alive({'SERVER_PROTOCOL': 'HTTP/1.0', 'HTTP_CONNECTION': 'Keep-Alive'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
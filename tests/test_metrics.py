@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from io import BytesIO
+
+from framework.app import App
+from framework.metrics import Metrics, merge, render
+from framework.request import Request
+from framework.response import StreamingResponse
+
+
+def environ(path, method='GET', body=b''):
+    return {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'wsgi.input': BytesIO(body),
+        'CONTENT_LENGTH': str(len(body)),
+    }
+
+
+def call(app, env):
+    result = {}
+
+    def start_response(status, headers):
+        result['status'] = status
+
+    result['body'] = b''.join(app(env, start_response))
+    return result
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram_buckets(self):
+        metrics = Metrics(buckets=(0.1, 1.0))
+        for duration in (0.05, 0.1, 0.5, 2.0):
+            metrics.started()
+            metrics.observe('/a', 'GET', 200, duration)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['latency'], [['/a', 'GET', [2, 1, 1], 2.65]])
+        self.assertEqual(snapshot['requests'], [['/a', 'GET', 200, 4]])
+        self.assertEqual(snapshot['in_flight'], 0)
+
+    def test_render_prometheus(self):
+        metrics = Metrics(buckets=(0.1,))
+        metrics.started()
+        metrics.observe('/a', 'GET', 200, 0.01, bytes_in=3, bytes_out=5)
+        text = metrics.render()
+        self.assertIn('framework_requests_total{route="/a",method="GET",status="200"} 1', text)
+        self.assertIn('framework_request_duration_seconds_bucket{route="/a",method="GET",le="0.1"} 1', text)
+        self.assertIn('framework_request_duration_seconds_bucket{route="/a",method="GET",le="+Inf"} 1', text)
+        self.assertIn('framework_request_bytes_total 3', text)
+        self.assertIn('framework_response_bytes_total 5', text)
+
+    def test_label_escaping(self):
+        snapshot = merge([Metrics().snapshot()])
+        snapshot['requests'] = [['/a"b', 'GET', 200, 1]]
+        self.assertIn('route="/a\\"b"', render(snapshot))
+
+    def test_merge_worker_snapshots(self):
+        with tempfile.TemporaryDirectory() as directory:
+            worker = Metrics(buckets=(0.1,), directory=directory)
+            worker.started()
+            worker.observe('/a', 'GET', 200, 0.01)
+            os.rename(worker._path(os.getpid()), os.path.join(directory, 'metrics-1.json'))
+
+            metrics = Metrics(buckets=(0.1,), directory=directory)
+            metrics.started()
+            metrics.observe('/a', 'GET', 200, 0.5)
+            merged = metrics.collect()
+            self.assertEqual(merged['requests'], [['/a', 'GET', 200, 2]])
+            self.assertEqual(merged['latency'][0][2], [1, 1])
+            with open(os.path.join(directory, 'metrics-1.json')) as f:
+                self.assertEqual(json.load(f)['requests'], [['/a', 'GET', 200, 1]])
+
+    def test_concurrent_flushes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            metrics = Metrics(directory=directory, flush_interval=0)
+            errors = []
+
+            def observe():
+                try:
+                    for _ in range(50):
+                        metrics.started()
+                        metrics.observe('/a', 'GET', 200, 0.01)
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=observe) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(errors, [])
+            metrics.flush()
+            with open(metrics._path(os.getpid())) as f:
+                self.assertEqual(json.load(f)['requests'], [['/a', 'GET', 200, 400]])
+
+    def test_flush_error_does_not_raise(self):
+        metrics = Metrics(directory='/nonexistent/metrics', flush_interval=0)
+        metrics.started()
+        with self.assertLogs('framework.metrics', 'WARNING'):
+            metrics.observe('/a', 'GET', 200, 0.01)
+
+class TestAppMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.app = App()
+        self.metrics = self.app.enable_metrics()
+
+        @self.app.route('/items/<int:item_id>', methods=['GET', 'POST'])
+        def item(request, item_id):
+            return 'item'
+
+        @self.app.route('/stream')
+        def stream(request):
+            return StreamingResponse(iter([b'ab', b'cd']))
+
+    def test_records_route_pattern(self):
+        call(self.app, environ('/items/1'))
+        call(self.app, environ('/items/2', 'POST', b'data'))
+        call(self.app, environ('/missing'))
+        requests = {tuple(row[:3]): row[3] for row in self.metrics.snapshot()['requests']}
+        self.assertEqual(requests[('/items/<int:item_id>', 'GET', 200)], 1)
+        self.assertEqual(requests[('/items/<int:item_id>', 'POST', 200)], 1)
+        self.assertEqual(requests[('<unmatched>', 'GET', 404)], 1)
+        self.assertEqual(self.metrics.bytes_in, 4)
+
+    def test_streaming_bytes_counted_when_sent(self):
+        self.assertEqual(call(self.app, environ('/stream'))['body'], b'abcd')
+        self.assertEqual(self.metrics.bytes_out, 4)
+
+    def test_metrics_endpoint(self):
+        call(self.app, environ('/items/1'))
+        result = call(self.app, environ('/metrics'))
+        self.assertEqual(result['status'], '200 OK')
+        self.assertIn(b'route="/items/<int:item_id>"', result['body'])
+
+    def test_async_dispatch_recorded(self):
+        asyncio.run(self.app.handle_async(Request(environ('/items/1'))))
+        self.assertEqual(self.metrics.snapshot()['requests'], [['/items/<int:item_id>', 'GET', 200, 1]])
+        self.assertEqual(self.metrics.in_flight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import asyncio
+import unittest
+from io import BytesIO
+
+from framework.app import App
+from framework.middleware import Middleware, compile_chain, compile_chain_async
+from framework.request import Request
+from framework.response import Response
+
+
+class Recorder(Middleware):
+    def __init__(self, name, log, stop=False):
+        self.name = name
+        self.log = log
+        self.stop = stop
+
+    def before(self, request):
+        self.log.append(('before', self.name))
+        if self.stop:
+            return Response(body=self.name, status=429)
+
+    def after(self, request, response):
+        self.log.append(('after', self.name))
+        response.headers['X-' + self.name] = '1'
+        return response
+
+
+class AfterOnly(Middleware):
+    def after(self, request, response):
+        response.headers['X-After'] = '1'
+        return response
+
+
+def make_request(path='/', method='GET'):
+    return Request({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'wsgi.input': BytesIO(b''),
+        'CONTENT_LENGTH': '0',
+    })
+
+
+class TestCompileChain(unittest.TestCase):
+
+    def test_no_middleware_returns_endpoint(self):
+        endpoint = lambda request: Response(body='ok')
+        self.assertIs(compile_chain([], endpoint), endpoint)
+        self.assertIs(compile_chain_async([], endpoint), endpoint)
+
+    def test_order(self):
+        log = []
+        chain = compile_chain([Recorder('a', log), Recorder('b', log)], lambda request: Response(body='ok'))
+        chain(make_request())
+        self.assertEqual(log, [('before', 'a'), ('before', 'b'), ('after', 'b'), ('after', 'a')])
+
+    def test_short_circuit_skips_inner_layers(self):
+        log = []
+        called = []
+        chain = compile_chain(
+            [Recorder('a', log), Recorder('b', log, stop=True), Recorder('c', log)],
+            lambda request: called.append(1),
+        )
+        response = chain(make_request())
+        self.assertEqual(response.status, 429)
+        self.assertEqual(called, [])
+        self.assertEqual(log, [('before', 'a'), ('before', 'b'), ('after', 'a')])
+
+    def test_after_only(self):
+        chain = compile_chain([AfterOnly()], lambda request: Response(body='ok'))
+        self.assertEqual(chain(make_request()).headers['X-After'], '1')
+
+    def test_async_chain(self):
+        log = []
+
+        async def endpoint(request):
+            log.append('endpoint')
+            return Response(body='ok')
+
+        chain = compile_chain_async([Recorder('a', log)], endpoint)
+        response = asyncio.run(chain(make_request()))
+        self.assertEqual(response.headers['X-a'], '1')
+        self.assertEqual(log, [('before', 'a'), 'endpoint', ('after', 'a')])
+
+
+class TestAppMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        self.app = App()
+        self.log = []
+
+        @self.app.route('/plain')
+        def plain(request):
+            return 'plain'
+
+        @self.app.route('/guarded', middleware=[Recorder('route', self.log, stop=True)])
+        def guarded(request):
+            return 'never'
+
+    def test_route_without_middleware_uses_endpoint_directly(self):
+        self.app.compile()
+        route, _ = self.app.router.match('/plain', 'GET')
+        self.assertEqual(route.chain.func, self.app._invoke)
+
+    def test_app_and_route_middleware(self):
+        self.app.use(Recorder('app', self.log))
+        response = self.app.handle(make_request('/guarded'))
+        self.assertEqual(response.status, 429)
+        self.assertEqual(response.headers['X-app'], '1')
+        self.assertEqual(self.log, [('before', 'app'), ('before', 'route'), ('after', 'app')])
+
+    def test_app_middleware_sees_404(self):
+        self.app.use(AfterOnly())
+        response = self.app.handle(make_request('/missing'))
+        self.assertEqual(response.status, 404)
+        self.assertEqual(response.headers['X-After'], '1')
+
+    def test_use_after_compile_recompiles(self):
+        self.app.handle(make_request('/plain'))
+        self.app.use(AfterOnly())
+        self.assertEqual(self.app.handle(make_request('/plain')).headers['X-After'], '1')
+
+    def test_middleware_error_becomes_500(self):
+        class Broken(Middleware):
+            def before(self, request):
+                raise RuntimeError('boom')
+
+        self.app.use(Broken())
+        self.assertEqual(self.app.handle(make_request('/plain')).status, 500)
+
+    def test_async_dispatch(self):
+        self.app.use(Recorder('app', self.log))
+        response = asyncio.run(self.app.handle_async(make_request('/plain')))
+        self.assertEqual(response.body, b'plain')
+        self.assertEqual(response.headers['X-app'], '1')
+
+
+if __name__ == '__main__':
+    unittest.main()
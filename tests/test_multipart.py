@@ -0,0 +1,172 @@
+import os
+import tempfile
+import unittest
+from io import BytesIO
+
+from framework.exceptions import BadRequest, RequestEntityTooLarge
+from framework.multipart import MultipartParser, parse_options_header, parse_urlencoded
+from framework.request import Request
+
+BOUNDARY = '----boundary42'
+
+
+def multipart(*parts, boundary=BOUNDARY):
+    body = b''
+    for headers, data in parts:
+        body += f'--{boundary}\r\n'.encode() + headers.encode() + b'\r\n\r\n' + data + b'\r\n'
+    return body + f'--{boundary}--\r\n'.encode()
+
+
+def field(name, value):
+    return f'Content-Disposition: form-data; name="{name}"', value.encode()
+
+
+def upload(name, filename, data, content_type='application/octet-stream'):
+    return f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\nContent-Type: {content_type}', data
+
+
+class CountingStream(BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.max_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.max_read = max(self.max_read, len(chunk))
+        return chunk
+
+
+class TestMultipartParser(unittest.TestCase):
+
+    def parse(self, body, **options):
+        return MultipartParser(BytesIO(body), BOUNDARY, **options).parse()
+
+    def test_fields_and_files(self):
+        form, files = self.parse(multipart(
+            field('name', 'Alice'),
+            field('tag', 'a'),
+            field('tag', 'b'),
+            upload('doc', 'notes.txt', b'line one\r\nline two', 'text/plain'),
+        ))
+        self.assertEqual(form, {'name': 'Alice', 'tag': ['a', 'b']})
+        doc = files['doc']
+        self.assertEqual(doc.filename, 'notes.txt')
+        self.assertEqual(doc.content_type, 'text/plain')
+        self.assertEqual(doc.size, 18)
+        self.assertEqual(doc.read(), b'line one\r\nline two')
+
+    def test_boundary_split_across_reads(self):
+        data = os.urandom(5000)
+        body = multipart(upload('blob', 'b.bin', data), field('after', 'yes'))
+        for chunk_size in (1, 7, 64, 4096):
+            with self.subTest(chunk_size=chunk_size):
+                form, files = self.parse(body, chunk_size=chunk_size)
+                self.assertEqual(files['blob'].read(), data)
+                self.assertEqual(form['after'], 'yes')
+
+    def test_preamble_and_empty_values(self):
+        body = b'preamble text\r\n' + multipart(field('empty', ''), upload('nofile', '', b''))
+        form, files = self.parse(body)
+        self.assertEqual(form, {'empty': ''})
+        self.assertEqual(files['nofile'].size, 0)
+
+    def test_large_upload_spools_to_disk_with_bounded_reads(self):
+        data = b'x' * (3 * 1024 * 1024)
+        stream = CountingStream(multipart(upload('big', 'big.bin', data)))
+        _, files = MultipartParser(stream, BOUNDARY, chunk_size=8192, spool_size=64 * 1024).parse()
+        big = files['big']
+        self.assertTrue(big.file._rolled)
+        self.assertEqual(big.size, len(data))
+        self.assertLessEqual(stream.max_read, 8192)
+
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.unlink, path)
+        big.save(path)
+        self.assertEqual(os.path.getsize(path), len(data))
+
+    def test_small_upload_stays_in_memory(self):
+        _, files = self.parse(multipart(upload('small', 's.txt', b'tiny')))
+        self.assertFalse(files['small'].file._rolled)
+
+    def test_field_size_limit(self):
+        with self.assertRaises(RequestEntityTooLarge):
+            self.parse(multipart(field('big', 'x' * 100)), max_field_size=10)
+
+    def test_part_limit(self):
+        with self.assertRaises(RequestEntityTooLarge):
+            self.parse(multipart(*[field('f', 'v')] * 5), max_parts=3)
+
+    def test_truncated_body(self):
+        body = multipart(field('name', 'Alice'))
+        with self.assertRaises(BadRequest):
+            self.parse(body[:-20])
+
+    def test_missing_boundary(self):
+        with self.assertRaises(BadRequest):
+            self.parse(b'no boundary here')
+
+    def test_utf8_filename(self):
+        headers = ("Content-Disposition: form-data; name=\"f\"; filename=\"a.txt\"; "
+                   "filename*=UTF-8''%D1%84%D0%B0%D0%B9%D0%BB.txt")
+        _, files = self.parse(multipart((headers, b'data')))
+        self.assertEqual(files['f'].filename, 'файл.txt')
+
+
+class TestFormParsing(unittest.TestCase):
+
+    def test_parse_options_header(self):
+        self.assertEqual(
+            parse_options_header('multipart/form-data; boundary="a;b"; charset=utf-8'),
+            ('multipart/form-data', {'boundary': 'a;b', 'charset': 'utf-8'}),
+        )
+        self.assertEqual(parse_options_header('form-data; name="q\\"x"'), ('form-data', {'name': 'q"x'}))
+
+    def test_urlencoded_across_chunks(self):
+        body = b'name=J%C3%BCrgen+M&tag=a&tag=b&empty=&flag'
+        for chunk_size in (1, 5, 1024):
+            with self.subTest(chunk_size=chunk_size):
+                form = parse_urlencoded(BytesIO(body), chunk_size=chunk_size)
+                self.assertEqual(form, {'name': 'Jürgen M', 'tag': ['a', 'b'], 'empty': '', 'flag': ''})
+
+    def test_urlencoded_field_limit(self):
+        with self.assertRaises(RequestEntityTooLarge):
+            parse_urlencoded(BytesIO(b'a=' + b'x' * 100), chunk_size=10, max_field_size=50)
+
+    def request(self, body, content_type, **options):
+        environ = {
+            'REQUEST_METHOD': 'POST',
+            'PATH_INFO': '/form',
+            'CONTENT_TYPE': content_type,
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': BytesIO(body),
+        }
+        return Request(environ, **options)
+
+    def test_request_form_urlencoded(self):
+        request = self.request(b'name=Alice&email=a%40example.com', 'application/x-www-form-urlencoded')
+        self.assertEqual(request.form(), {'name': 'Alice', 'email': 'a@example.com'})
+        self.assertEqual(request.files(), {})
+
+    def test_request_multipart(self):
+        body = multipart(field('name', 'Alice'), upload('avatar', 'a.png', b'\x89PNG', 'image/png'))
+        request = self.request(body, f'multipart/form-data; boundary={BOUNDARY}')
+        self.assertEqual(request.files()['avatar'].read(), b'\x89PNG')
+        self.assertEqual(request.form(), {'name': 'Alice'})
+
+    def test_request_form_after_body(self):
+        request = self.request(b'a=1', 'application/x-www-form-urlencoded')
+        self.assertEqual(request.body, b'a=1')
+        self.assertEqual(request.form(), {'a': '1'})
+
+    def test_request_form_respects_body_limit(self):
+        request = self.request(b'a=' + b'x' * 100, 'application/x-www-form-urlencoded', max_body_size=10)
+        with self.assertRaises(RequestEntityTooLarge):
+            request.form()
+
+    def test_other_content_type(self):
+        self.assertEqual(self.request(b'{}', 'application/json').form(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
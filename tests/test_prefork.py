@@ -0,0 +1,182 @@
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+import unittest
+import urllib.request
+
+from framework import App
+from framework.metrics import merge
+from framework.prefork import ARBITER_SIGNALS, Arbiter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVER_SCRIPT = textwrap.dedent('''
+    import os
+    import sys
+
+    from framework import App
+    from framework.prefork import Arbiter, create_socket
+
+    app = App()
+    app.enable_metrics(directory=sys.argv[4], flush_interval=3600)
+
+    @app.route('/pid')
+    def pid(request):
+        return str(os.getpid())
+
+    @app.route('/crash')
+    def crash(request):
+        os._exit(1)
+
+    sock = create_socket('127.0.0.1', 0)
+    print(sock.getsockname()[1], flush=True)
+    Arbiter(
+        app, workers=2, server=sys.argv[1], max_requests=int(sys.argv[2]), timeout=10, sock=sock,
+        keep_alive_timeout=float(sys.argv[3]),
+    ).run()
+''')
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'pre-fork mode requires os.fork')
+class TestPrefork(unittest.TestCase):
+
+    def start(self, server='http', max_requests=0, keep_alive_timeout=5.0):
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir, True)
+        self.process = subprocess.Popen(
+            [sys.executable, '-c', SERVER_SCRIPT, server, str(max_requests), str(keep_alive_timeout), self.metrics_dir],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env,
+        )
+        self.addCleanup(self.stop)
+        self.port = int(self.process.stdout.readline())
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait(10)
+        self.process.stdout.close()
+
+    def get(self, path='/pid'):
+        with urllib.request.urlopen(f'http://127.0.0.1:{self.port}{path}', timeout=5) as response:
+            return response.read()
+
+    def collect_pids(self, count):
+        return {self.get() for _ in range(count)}
+
+    def test_requests_spread_over_workers(self):
+        self.start()
+        deadline = time.time() + 5
+        pids = set()
+        while len(pids) < 2 and time.time() < deadline:
+            pids |= self.collect_pids(10)
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(str(self.process.pid).encode(), pids)
+
+    def test_max_requests_recycles_workers(self):
+        self.start(max_requests=3)
+        pids = self.collect_pids(20)
+        self.assertGreater(len(pids), 2)
+
+    def test_workers_flush_metrics_on_exit(self):
+        self.start(max_requests=3)
+        self.collect_pids(20)
+        self.stop()
+        snapshots = []
+        for name in os.listdir(self.metrics_dir):
+            with open(os.path.join(self.metrics_dir, name)) as f:
+                snapshots.append(json.load(f))
+        self.assertEqual(merge(snapshots)['requests'], [['/pid', 'GET', 200, 20]])
+
+    def test_crashed_worker_is_respawned(self):
+        self.start()
+        with self.assertRaises(Exception):
+            self.get('/crash')
+        time.sleep(1.5)
+        for _ in range(10):
+            self.get()
+
+    def test_keep_alive_timeout(self):
+        for server in ('http', 'asyncio'):
+            with self.subTest(server=server):
+                self.start(server, keep_alive_timeout=0.2)
+                with socket.create_connection(('127.0.0.1', self.port), timeout=5) as sock:
+                    sock.sendall(b'GET /pid HTTP/1.1\r\nHost: x\r\n\r\n')
+                    self.assertIn(b'200 OK', sock.recv(65536))
+                    started = time.monotonic()
+                    self.assertEqual(sock.recv(1), b'')
+                    self.assertLess(time.monotonic() - started, 2)
+                self.stop()
+
+    def test_sighup_replaces_workers_without_errors(self):
+        for server in ('http', 'wsgiref', 'asyncio'):
+            with self.subTest(server=server):
+                self.start(server)
+                before = self.collect_pids(10)
+                self.process.send_signal(signal.SIGHUP)
+                deadline = time.time() + 5
+                after = set()
+                while time.time() < deadline and not (after - before):
+                    after.add(self.get())
+                self.assertTrue(after - before)
+                self.stop()
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'pre-fork mode requires os.fork')
+class TestArbiterFork(unittest.TestCase):
+
+    def test_failed_fork_unblocks_signals(self):
+        arbiter = Arbiter(App(), workers=1)
+
+        def fork():
+            raise BlockingIOError('Resource temporarily unavailable')
+
+        original, os.fork = os.fork, fork
+        try:
+            with self.assertRaises(OSError):
+                arbiter.spawn_worker()
+        finally:
+            os.fork = original
+        self.assertFalse(signal.pthread_sigmask(signal.SIG_BLOCK, []) & set(ARBITER_SIGNALS))
+
+    def test_failed_respawn_is_retried(self):
+        for signum in ARBITER_SIGNALS:
+            self.addCleanup(signal.signal, signum, signal.getsignal(signum))
+        sock = socket.socket()
+        self.addCleanup(sock.close)
+        arbiter = Arbiter(App(), workers=1, timeout=0, sock=sock)
+        attempts = []
+        ticks = iter([None, None, signal.SIGTERM])
+
+        def spawn_worker():
+            attempts.append(len(attempts))
+            if len(attempts) == 2:
+                raise BlockingIOError('Resource temporarily unavailable')
+            arbiter.workers[len(attempts)] = None
+
+        def wait_signal(timeout):
+            # первый воркер умирает, и его замену не удаётся запустить с первой попытки
+            arbiter.workers.pop(1, None)
+            return next(ticks)
+
+        arbiter.spawn_worker = spawn_worker
+        arbiter._wait_signal = wait_signal
+        arbiter.reap_workers = lambda: None
+        arbiter.stop = lambda: None
+        with self.assertLogs('framework.prefork', 'ERROR'):
+            arbiter.run()
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(list(arbiter.workers), [3])
+        for fd in arbiter._pipe:
+            os.close(fd)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import os
+import time
+import unittest
+from io import BytesIO
+
+from framework.app import App
+from framework.ratelimit import LoadShedder, MemoryStore, RateLimiter, SharedStore, gcra
+
+
+def environ(path='/', **extra):
+    env = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'REMOTE_ADDR': '10.0.0.1',
+        'wsgi.input': BytesIO(b''),
+        'CONTENT_LENGTH': '0',
+    }
+    env.update(extra)
+    return env
+
+
+class TestGCRA(unittest.TestCase):
+
+    def test_burst_then_limited(self):
+        tat = 0.0
+        results = []
+        for _ in range(4):
+            tat, retry_after = gcra(tat, 10.0, 1.0, 3.0)
+            results.append(retry_after)
+        self.assertEqual(results[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(results[3], 1.0)
+
+    def test_refills_over_time(self):
+        tat, _ = gcra(0.0, 10.0, 1.0, 1.0)
+        self.assertGreater(gcra(tat, 10.5, 1.0, 1.0)[1], 0)
+        self.assertEqual(gcra(tat, 11.0, 1.0, 1.0)[1], 0.0)
+
+
+class StoreTests:
+
+    def test_keys_are_independent(self):
+        store = self.make_store()
+        self.assertEqual(store.update('a', 100.0, 1.0, 1.0), 0.0)
+        self.assertGreater(store.update('a', 100.0, 1.0, 1.0), 0)
+        self.assertEqual(store.update('b', 100.0, 1.0, 1.0), 0.0)
+
+
+class TestMemoryStore(StoreTests, unittest.TestCase):
+
+    def make_store(self):
+        return MemoryStore()
+
+    def test_prunes_expired_keys(self):
+        store = MemoryStore(max_keys=2)
+        for key in 'abc':
+            store.update(key, 100.0, 1.0, 1.0)
+        store.update('d', 200.0, 1.0, 1.0)
+        self.assertEqual(len(store), 1)
+
+
+class TestSharedStore(StoreTests, unittest.TestCase):
+
+    def make_store(self):
+        return SharedStore(slots=1024, stripes=8)
+
+    def test_state_shared_with_forked_child(self):
+        store = self.make_store()
+        now = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if store.update('client', now, 10.0, 10.0) == 0.0 else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertGreater(store.update('client', now, 10.0, 10.0), 0)
+
+    def test_full_region_evicts_oldest(self):
+        store = SharedStore(slots=8, stripes=1)
+        for i in range(20):
+            self.assertEqual(store.update(f'k{i}', 100.0 + i, 1.0, 1.0), 0.0)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.app = App()
+
+        @self.app.route('/a')
+        def a(request):
+            return 'a'
+
+        @self.app.route('/b')
+        def b(request):
+            return 'b'
+
+    def statuses(self, *environs):
+        result = []
+        for env in environs:
+            self.app(env, lambda status, headers: result.append((status, dict(headers))))
+        return result
+
+    def test_limit_by_ip(self):
+        self.app.use(RateLimiter(rate=2, period=60))
+        result = self.statuses(environ('/a'), environ('/b'), environ('/a'), environ('/a', REMOTE_ADDR='10.0.0.2'))
+        self.assertEqual([status for status, _ in result], ['200 OK', '200 OK', '429 Too Many Requests', '200 OK'])
+        self.assertEqual(result[2][1]['Retry-After'], '30')
+
+    def test_limit_by_route(self):
+        self.app.use(RateLimiter(rate=1, period=60, key='route'))
+        result = self.statuses(environ('/a'), environ('/b'), environ('/a', REMOTE_ADDR='10.0.0.2'))
+        self.assertEqual([status for status, _ in result], ['200 OK', '200 OK', '429 Too Many Requests'])
+
+    def test_limit_by_header(self):
+        self.app.use(RateLimiter(rate=1, period=60, key='header:X-Api-Key'))
+        result = self.statuses(environ('/a', HTTP_X_API_KEY='k1'), environ('/a', HTTP_X_API_KEY='k2'),
+                               environ('/a', HTTP_X_API_KEY='k1', REMOTE_ADDR='10.0.0.9'))
+        self.assertEqual([status for status, _ in result], ['200 OK', '200 OK', '429 Too Many Requests'])
+
+    def test_per_route_limiter(self):
+        @self.app.route('/limited', middleware=[RateLimiter(rate=1, period=60)])
+        def limited(request):
+            return 'limited'
+
+        result = self.statuses(environ('/limited'), environ('/limited'), environ('/a'))
+        self.assertEqual([status for status, _ in result], ['200 OK', '429 Too Many Requests', '200 OK'])
+
+    def test_unknown_key(self):
+        with self.assertRaises(ValueError):
+            RateLimiter(rate=1, key='cookie')
+
+
+class TestLoadShedding(unittest.TestCase):
+
+    def test_in_flight_limit(self):
+        shedder = LoadShedder(max_in_flight=1)
+        self.assertIsNone(shedder.enter({}))
+        self.assertEqual(shedder.enter({}).status, 503)
+        shedder.leave()
+        self.assertIsNone(shedder.enter({}))
+        self.assertEqual(shedder.stats(), {'in_flight': 1, 'shed': 1})
+
+    def test_queue_latency(self):
+        shedder = LoadShedder(max_queue_latency=0.1)
+        self.assertEqual(shedder.enter({'framework.queued_at': time.monotonic() - 1}).status, 503)
+        self.assertIsNone(shedder.enter({'framework.queued_at': time.monotonic()}))
+
+    def test_app_sheds_before_dispatch(self):
+        app = App()
+        calls = []
+
+        @app.route('/')
+        def index(request):
+            calls.append(1)
+            return 'ok'
+
+        shedder = app.enable_load_shedding(max_queue_latency=0.1)
+        statuses = []
+        body = app(environ(**{'framework.queued_at': time.monotonic() - 1}),
+                   lambda status, headers: statuses.append((status, dict(headers))))
+        self.assertEqual(statuses[0][0], '503 Service Unavailable')
+        self.assertEqual(statuses[0][1]['Retry-After'], '1')
+        self.assertEqual(b''.join(body), b'503 Service Unavailable')
+        self.assertEqual(calls, [])
+        app(environ(), lambda status, headers: None)
+        self.assertEqual(calls, [1])
+        self.assertEqual(shedder.stats()['in_flight'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
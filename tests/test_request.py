@@ -2,6 +2,7 @@ import json
 import unittest
 from io import BytesIO
 
+from framework.exceptions import RequestEntityTooLarge
 from framework.request import Request
 
 
@@ -47,6 +48,46 @@ class TestRequest(unittest.TestCase):
         self.assertEqual(request.headers['User-Agent'], 'TestAgent')
         self.assertEqual(request.headers['Content-Type'], 'application/json')
 
+    def test_headers_case_insensitive(self):
+        environ = self.base_environ.copy()
+        environ['HTTP_X_REQUEST_ID'] = 'abc'
+        environ['CONTENT_TYPE'] = 'text/plain'
+        headers = Request(environ).headers
+        self.assertEqual(headers['x-request-id'], 'abc')
+        self.assertEqual(headers['X-REQUEST-ID'], 'abc')
+        self.assertEqual(headers['content-type'], 'text/plain')
+        self.assertIn('x-request-id', headers)
+        self.assertNotIn('accept', headers)
+        self.assertIsNone(headers.get('accept'))
+        with self.assertRaises(KeyError):
+            headers['accept']
+
+    def test_headers_view_reads_environ(self):
+        environ = self.base_environ.copy()
+        request = Request(environ)
+        headers = request.headers
+        environ['HTTP_ACCEPT'] = 'text/html'
+        self.assertEqual(headers['Accept'], 'text/html')
+
+    def test_headers_iteration(self):
+        environ = self.base_environ.copy()
+        environ['HTTP_HOST'] = 'localhost'
+        environ['HTTP_ACCEPT_ENCODING'] = 'gzip'
+        headers = Request(environ).headers
+        self.assertEqual(dict(headers), {'Content-Length': '0', 'Host': 'localhost', 'Accept-Encoding': 'gzip'})
+        self.assertEqual(len(headers), 3)
+
+    def test_headers_get_all(self):
+        environ = self.base_environ.copy()
+        environ['HTTP_ACCEPT'] = 'text/html, application/json'
+        environ['HTTP_COOKIE'] = 'a=1; b=2'
+        environ['HTTP_IF_MODIFIED_SINCE'] = 'Wed, 21 Oct 2015 07:28:00 GMT'
+        headers = Request(environ).headers
+        self.assertEqual(headers.get_all('accept'), ['text/html', 'application/json'])
+        self.assertEqual(headers.get_all('cookie'), ['a=1', 'b=2'])
+        self.assertEqual(headers.get_all('If-Modified-Since'), ['Wed, 21 Oct 2015 07:28:00 GMT'])
+        self.assertEqual(headers.get_all('x-missing'), [])
+
     def test_request_body(self):
         body_content = b'Hello, World!'
         environ = self.base_environ.copy()
@@ -86,6 +127,74 @@ class TestRequest(unittest.TestCase):
         self.assertEqual(request.method, 'POST')
         self.assertEqual(request.path, '/users')
 
+    def test_body_read_lazily(self):
+        body_content = b'lazy'
+        stream = BytesIO(body_content)
+        environ = self.base_environ.copy()
+        environ['CONTENT_LENGTH'] = str(len(body_content))
+        environ['wsgi.input'] = stream
+        request = Request(environ)
+        self.assertEqual(stream.tell(), 0)
+        self.assertEqual(request.body, body_content)
+        self.assertIs(request.body, request.body)
+
+    def test_query_and_headers_cached(self):
+        environ = self.base_environ.copy()
+        environ['QUERY_STRING'] = 'a=1'
+        environ['HTTP_HOST'] = 'example.com'
+        request = Request(environ)
+        self.assertIs(request.query, request.query)
+        self.assertIs(request.headers, request.headers)
+
+    def test_slots(self):
+        request = Request(self.base_environ)
+        with self.assertRaises(AttributeError):
+            request.unknown_attribute = 1
+
+    def test_stream_reads_in_chunks(self):
+        body_content = b'x' * 200000
+        environ = self.base_environ.copy()
+        environ['CONTENT_LENGTH'] = str(len(body_content))
+        environ['wsgi.input'] = BytesIO(body_content + b'trailing garbage')
+        request = Request(environ)
+        chunks = list(request.stream)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= request.stream.chunk_size for chunk in chunks))
+        self.assertEqual(b''.join(chunks), body_content)
+
+    def test_stream_read_respects_content_length(self):
+        environ = self.base_environ.copy()
+        environ['CONTENT_LENGTH'] = '5'
+        environ['wsgi.input'] = BytesIO(b'hello world')
+        request = Request(environ)
+        self.assertEqual(request.stream.read(3), b'hel')
+        self.assertEqual(request.stream.read(), b'lo')
+        self.assertEqual(request.stream.read(), b'')
+
+    def test_declared_body_over_limit(self):
+        environ = self.base_environ.copy()
+        environ['CONTENT_LENGTH'] = '100'
+        environ['wsgi.input'] = BytesIO(b'x' * 100)
+        request = Request(environ, max_body_size=10)
+        with self.assertRaises(RequestEntityTooLarge):
+            request.body
+
+    def test_terminated_input_over_limit(self):
+        environ = self.base_environ.copy()
+        del environ['CONTENT_LENGTH']
+        environ['wsgi.input_terminated'] = True
+        environ['wsgi.input'] = BytesIO(b'x' * 100)
+        request = Request(environ, max_body_size=10)
+        with self.assertRaises(RequestEntityTooLarge):
+            request.body
+
+    def test_no_content_length_means_empty_body(self):
+        environ = self.base_environ.copy()
+        del environ['CONTENT_LENGTH']
+        environ['wsgi.input'] = BytesIO(b'ignored')
+        request = Request(environ)
+        self.assertEqual(request.body, b'')
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
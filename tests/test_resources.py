@@ -0,0 +1,194 @@
+import asyncio
+import threading
+import unittest
+from io import BytesIO
+
+from framework.app import App
+from framework.request import Request
+from framework.resources import Pool, PoolClosed, PoolTimeout
+
+
+class Connection:
+    def __init__(self, number):
+        self.number = number
+        self.healthy = True
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class Factory:
+    def __init__(self):
+        self.created = []
+
+    def __call__(self):
+        connection = Connection(len(self.created))
+        self.created.append(connection)
+        return connection
+
+
+def environ(path):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'wsgi.input': BytesIO(b''),
+        'CONTENT_LENGTH': '0',
+    }
+
+
+class TestPool(unittest.TestCase):
+
+    def test_reuses_released_resource(self):
+        factory = Factory()
+        pool = Pool(factory, size=2)
+        first = pool.acquire()
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(len(factory.created), 1)
+
+    def test_timeout_when_exhausted(self):
+        pool = Pool(Factory(), size=1, timeout=0.01)
+        pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_waiter_wakes_on_release(self):
+        pool = Pool(Factory(), size=1, timeout=2)
+        held = pool.acquire()
+        timer = threading.Timer(0.02, pool.release, (held,))
+        timer.start()
+        self.assertIs(pool.acquire(), held)
+        timer.join()
+        self.assertGreater(pool.stats()['wait_seconds_max'], 0)
+
+    def test_health_check_replaces_broken(self):
+        factory = Factory()
+        pool = Pool(factory, size=1, check=lambda c: c.healthy, close=Connection.close)
+        first = pool.acquire()
+        first.healthy = False
+        pool.release(first)
+        second = pool.acquire()
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats()['discarded'], 1)
+
+    def test_factory_error_frees_slot(self):
+        def broken():
+            raise ConnectionError('down')
+
+        pool = Pool(broken, size=1, timeout=0.01)
+        with self.assertRaises(ConnectionError):
+            pool.acquire()
+        self.assertEqual(pool.stats()['in_use'], 0)
+
+    def test_close(self):
+        pool = Pool(Factory(), close=Connection.close)
+        with pool.connection() as connection:
+            pass
+        pool.close()
+        self.assertTrue(connection.closed)
+        with self.assertRaises(PoolClosed):
+            pool.acquire()
+
+
+class TestAppResources(unittest.TestCase):
+
+    def setUp(self):
+        self.app = App()
+        self.factory = Factory()
+        self.pool = self.app.resource('db', self.factory, size=1, timeout=0.01, close=Connection.close)
+
+        @self.app.route('/user/<int:user_id>', resources=['db'])
+        def user(request, user_id, db):
+            return f'{user_id}:{db.number}'
+
+        @self.app.route('/async', resources=['db'])
+        async def async_user(request, db):
+            return f'async:{db.number}'
+
+    def call(self, path):
+        return b''.join(self.app(environ(path), lambda status, headers: None))
+
+    def test_injected_and_released(self):
+        self.assertEqual(self.call('/user/1'), b'1:0')
+        self.assertEqual(self.call('/user/2'), b'2:0')
+        self.assertEqual(self.pool.stats()['in_use'], 0)
+
+    def test_async_handler(self):
+        response = asyncio.run(self.app.handle_async(Request(environ('/async'))))
+        self.assertEqual(response.body, b'async:0')
+        self.assertEqual(self.pool.stats()['in_use'], 0)
+
+    def test_exhausted_pool_returns_503(self):
+        held = self.pool.acquire()
+        statuses = []
+        self.app(environ('/user/1'), lambda status, headers: statuses.append(status))
+        self.pool.release(held)
+        self.assertEqual(statuses, ['503 Service Unavailable'])
+
+    def test_async_deadline_does_not_leak_slot(self):
+        pool = self.app.resource('slow', Factory(), size=1, timeout=5)
+
+        @self.app.route('/slow', resources=['slow'], timeout=0.05)
+        async def slow(request, slow):
+            return 'unreachable'
+
+        held = pool.acquire()
+        threading.Timer(0.2, pool.release, (held,)).start()
+        response = asyncio.run(self.app.handle_async(Request(environ('/slow'))))
+        self.assertEqual(response.status, 504)
+        self.assertEqual(pool.stats()['in_use'], 0)
+
+    def test_unknown_resource(self):
+        @self.app.route('/broken', resources=['cache'])
+        def broken(request, cache):
+            return ''
+
+        with self.assertRaises(ValueError):
+            self.app.compile()
+
+    def test_lifecycle_hooks(self):
+        events = []
+        self.app.on_startup(lambda: events.append('start'))
+
+        @self.app.on_shutdown
+        async def stop():
+            events.append('stop')
+
+        self.app.startup()
+        self.app.startup()
+        self.call('/user/1')
+        self.app.shutdown()
+        self.assertEqual(events, ['start', 'stop'])
+        self.assertTrue(self.factory.created[0].closed)
+
+    def test_asgi_lifespan_runs_hooks(self):
+        events = []
+        self.app.on_startup(lambda: events.append('start'))
+        self.app.on_shutdown(lambda: events.append('stop'))
+        incoming = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(self.app.asgi({'type': 'lifespan'}, receive, send))
+        self.assertEqual(events, ['start', 'stop'])
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+
+    def test_pool_metrics(self):
+        self.app.enable_metrics()
+        self.call('/user/1')
+        body = self.call('/metrics')
+        self.assertIn(b'framework_pool_acquired_total{pool="db"} 1', body)
+        self.assertIn(b'framework_pool_in_use{pool="db"} 0', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,13 @@
+import json
+import os
+import tempfile
 import unittest
-from framework.response import Response
+from wsgiref.util import FileWrapper, setup_testing_defaults
+from wsgiref.validate import validator
 
+from framework.response import (
+    FileResponse, JSONResponse, Response, StreamingJSONResponse, StreamingResponse, parse_range,
+)
 
 
 class TestResponse(unittest.TestCase):
@@ -74,6 +81,196 @@ class TestResponse(unittest.TestCase):
         self.assertEqual(response.body, b'')
         self.assertEqual(response.headers['Content-Length'], '0')
 
+    def test_full_status_table(self):
+        self.assertEqual(Response(status=429).status_line(), '429 Too Many Requests')
+        self.assertEqual(Response(status=503).status_line(), '503 Service Unavailable')
+        self.assertEqual(Response(status=299).status_line(), '299 Unknown')
+
+    def test_status_line_interned(self):
+        self.assertIs(Response(status=200).status_line(), Response(status=200).status_line())
+
+    def test_headers_list_reused_until_changed(self):
+        response = Response(body='Test', headers={'X-Custom': 'value'})
+        first = response.headers_list()
+        self.assertIs(response.headers_list(), first)
+        response.headers['X-Other'] = 1
+        second = response.headers_list()
+        self.assertIsNot(second, first)
+        self.assertIn(('X-Other', '1'), second)
+
+    def test_default_headers_not_materialized(self):
+        response = Response(body='abc')
+        self.assertEqual(
+            response.headers_list(),
+            [('Content-Type', 'text/html; charset=utf-8'), ('Content-Length', '3')],
+        )
+        response.headers['X-Late'] = 'yes'
+        self.assertIn(('X-Late', 'yes'), response.headers_list())
+
+    def test_caller_headers_not_mutated(self):
+        headers = {'X-Custom': 'value'}
+        Response(body='Test', headers=headers)
+        self.assertEqual(headers, {'X-Custom': 'value'})
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            Response().unknown_attribute = 1
+
+    def test_call_returns_wsgi_iterable(self):
+        captured = {}
+
+        def start_response(status, headers):
+            captured['status'] = status
+
+        response = Response(body='Hi', status=201)
+        self.assertEqual(response({}, start_response), [b'Hi'])
+        self.assertEqual(captured['status'], '201 Created')
+
+    def test_chunked_body_is_not_joined(self):
+        rows = [b'id,name\n', 'héllo\n', memoryview(b'row\n'), bytearray(b'end'), b'']
+        response = Response(body=rows)
+        self.assertEqual(response.headers['Content-Length'], '22')
+        iterable = response({}, lambda status, headers: None)
+        self.assertIs(iterable[0], rows[0])
+        self.assertEqual([type(chunk) for chunk in iterable], [bytes] * 4)
+        self.assertEqual(response.body, b''.join(iterable))
+        self.assertIsInstance(response.body, bytes)
+
+    def test_buffer_chunks_passed_through_when_server_accepts_them(self):
+        rows = [b'head', bytearray(b'tail')]
+        iterable = Response(body=rows)({'framework.buffer_chunks': True}, lambda status, headers: None)
+        self.assertIs(iterable[1], rows[1])
+
+    def test_chunked_body_is_valid_wsgi(self):
+        app = validator(Response(body=[b'a', bytearray(b'b'), memoryview(b'c')]))
+        environ = {'QUERY_STRING': ''}
+        setup_testing_defaults(environ)
+        iterable = app(environ, lambda status, headers: None)
+        self.assertEqual(b''.join(iterable), b'abc')
+        iterable.close()
+
+    def test_buffer_body(self):
+        data = bytearray(b'x' * 100)
+        response = Response(body=memoryview(data)[10:20])
+        self.assertEqual(response.headers_list()[1], ('Content-Length', '10'))
+        self.assertEqual(response.body, b'x' * 10)
+        self.assertEqual(Response(body=data).length, 100)
+
+    def test_wide_memoryview_counts_bytes(self):
+        response = Response(body=[memoryview(bytearray(16)).cast('I')])
+        self.assertEqual(response.length, 16)
+        self.assertEqual(response.body, bytes(16))
+
+
+class TestStreamingResponse(unittest.TestCase):
+
+    def test_generator_body(self):
+        def generate():
+            yield 'a'
+            yield b'b'
+            yield ''
+            yield 'c'
+
+        captured = {}
+
+        def start_response(status, headers):
+            captured['headers'] = dict(headers)
+
+        response = StreamingResponse(generate())
+        self.assertEqual(list(response({}, start_response)), [b'a', b'b', b'c'])
+        self.assertNotIn('Content-Length', captured['headers'])
+
+    def test_close_propagates_to_source(self):
+        closed = []
+
+        def generate():
+            try:
+                yield b'a'
+                yield b'b'
+            finally:
+                closed.append(True)
+
+        iterable = StreamingResponse(generate())({}, lambda status, headers: None)
+        next(iterable)
+        iterable.close()
+        self.assertEqual(closed, [True])
+
+
+class TestJSONResponse(unittest.TestCase):
+
+    def test_json_response(self):
+        response = JSONResponse({'id': 1, 'name': 'Alice'}, status=201)
+        self.assertEqual(json.loads(response.body), {'id': 1, 'name': 'Alice'})
+        self.assertEqual(response.status, 201)
+        self.assertEqual(response.headers['Content-Type'], 'application/json')
+        self.assertEqual(response.headers['Content-Length'], str(len(response.body)))
+
+    def test_custom_headers_keep_json_content_type(self):
+        response = JSONResponse([], headers={'X-Total': '0'})
+        self.assertEqual(dict(response.headers_list())['Content-Type'], 'application/json')
+
+    def test_streaming_json_response(self):
+        items = ({'id': i} for i in range(3))
+        response = StreamingJSONResponse(items)
+        body = b''.join(response({}, lambda status, headers: None))
+        self.assertEqual(json.loads(body), [{'id': 0}, {'id': 1}, {'id': 2}])
+        self.assertEqual(response.headers['Content-Type'], 'application/json')
+
+
+class TestFileResponse(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.txt')
+        with os.fdopen(handle, 'wb') as f:
+            f.write(b'0123456789')
+        self.captured = {}
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def start_response(self, status, headers):
+        self.captured['status'] = status
+        self.captured['headers'] = dict(headers)
+
+    def test_uses_file_wrapper(self):
+        response = FileResponse(self.path)
+        iterable = response({'wsgi.file_wrapper': FileWrapper}, self.start_response)
+        self.assertIsInstance(iterable, FileWrapper)
+        self.assertEqual(b''.join(iterable), b'0123456789')
+        iterable.close()
+        self.assertEqual(self.captured['status'], '200 OK')
+        self.assertEqual(self.captured['headers']['Content-Length'], '10')
+        self.assertEqual(self.captured['headers']['Content-Type'], 'text/plain')
+
+    def test_without_file_wrapper(self):
+        iterable = FileResponse(self.path)({}, self.start_response)
+        self.assertEqual(b''.join(iterable), b'0123456789')
+        iterable.close()
+
+    def test_range_request(self):
+        environ = {'HTTP_RANGE': 'bytes=2-5', 'wsgi.file_wrapper': FileWrapper}
+        iterable = FileResponse(self.path)(environ, self.start_response)
+        self.assertEqual(b''.join(iterable), b'2345')
+        iterable.close()
+        self.assertEqual(self.captured['status'], '206 Partial Content')
+        self.assertEqual(self.captured['headers']['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(self.captured['headers']['Content-Length'], '4')
+
+    def test_unsatisfiable_range(self):
+        iterable = FileResponse(self.path)({'HTTP_RANGE': 'bytes=20-'}, self.start_response)
+        self.assertEqual(b''.join(iterable), b'')
+        self.assertEqual(self.captured['status'], '416 Range Not Satisfiable')
+        self.assertEqual(self.captured['headers']['Content-Range'], 'bytes */10')
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=0-', 10), (0, 9))
+        self.assertEqual(parse_range('bytes=-3', 10), (7, 9))
+        self.assertEqual(parse_range('bytes=5-100', 10), (5, 9))
+        self.assertEqual(parse_range('bytes=10-', 10), ())
+        self.assertIsNone(parse_range('bytes=0-1,3-4', 10))
+        self.assertIsNone(parse_range('items=0-1', 10))
+        self.assertIsNone(parse_range('bytes=5-2', 10))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -73,6 +73,154 @@ class TestRouter(unittest.TestCase):
         self.assertEqual(self.router.resolve('/api', 'GET'), get_handler)
         self.assertEqual(self.router.resolve('/api', 'POST'), post_handler)
 
+    def test_int_parameter(self):
+        def handler(request, id):
+            pass
+
+        self.router.add_route('/users/<int:id>', 'GET', handler)
+        route, params = self.router.match('/users/123', 'GET')
+        self.assertEqual(route.handler, handler)
+        self.assertEqual(params, {'id': 123})
+        self.assertIsNone(self.router.match('/users/abc', 'GET'))
+
+    def test_str_parameter_default_converter(self):
+        def handler(request, order_id):
+            pass
+
+        self.router.add_route('/orders/<order_id>/items', 'GET', handler)
+        route, params = self.router.match('/orders/a1/items', 'GET')
+        self.assertEqual(params, {'order_id': 'a1'})
+        self.assertIsNone(self.router.match('/orders//items', 'GET'))
+
+    def test_path_parameter(self):
+        def handler(request, rest):
+            pass
+
+        self.router.add_route('/files/<path:rest>', 'GET', handler)
+        route, params = self.router.match('/files/docs/2024/report.pdf', 'GET')
+        self.assertEqual(params, {'rest': 'docs/2024/report.pdf'})
+        self.assertIsNone(self.router.match('/files', 'GET'))
+
+    def test_static_route_wins_over_parameter(self):
+        def me_handler(request):
+            pass
+
+        def user_handler(request, name):
+            pass
+
+        self.router.add_route('/users/<name>', 'GET', user_handler)
+        self.router.add_route('/users/me', 'GET', me_handler)
+
+        self.assertEqual(self.router.resolve('/users/me', 'GET'), me_handler)
+        self.assertEqual(self.router.resolve('/users/bob', 'GET'), user_handler)
+
+    def test_int_converter_checked_before_str(self):
+        def int_handler(request, id):
+            pass
+
+        def str_handler(request, slug):
+            pass
+
+        self.router.add_route('/items/<slug>', 'GET', str_handler)
+        self.router.add_route('/items/<int:id>', 'GET', int_handler)
+
+        self.assertEqual(self.router.resolve('/items/7', 'GET'), int_handler)
+        self.assertEqual(self.router.resolve('/items/seven', 'GET'), str_handler)
+
+    def test_backtracking_on_method(self):
+        def get_handler(request, id):
+            pass
+
+        def post_handler(request, name):
+            pass
+
+        self.router.add_route('/things/<int:id>', 'GET', get_handler)
+        self.router.add_route('/things/<name>', 'POST', post_handler)
+
+        route, params = self.router.match('/things/5', 'POST')
+        self.assertEqual(route.handler, post_handler)
+        self.assertEqual(params, {'name': '5'})
+
+    def test_parameter_names_per_route(self):
+        def user_handler(request, id):
+            pass
+
+        def posts_handler(request, uid):
+            pass
+
+        self.router.add_route('/users/<int:id>', 'GET', user_handler)
+        self.router.add_route('/users/<int:uid>/posts', 'GET', posts_handler)
+
+        self.assertEqual(self.router.match('/users/1', 'GET')[1], {'id': 1})
+        self.assertEqual(self.router.match('/users/1/posts', 'GET')[1], {'uid': 1})
+
+    def test_invalid_patterns(self):
+        def handler(request, **params):
+            pass
+
+        with self.assertRaises(ValueError):
+            self.router.add_route('/x/<uuid:id>', 'GET', handler)
+        with self.assertRaises(ValueError):
+            self.router.add_route('/x/<path:rest>/tail', 'GET', handler)
+
+    def test_dispatch_wrong_method_returns_not_allowed_route(self):
+        self.router.add_route('/users', ['GET', 'POST'], lambda request: None)
+        route, params = self.router.dispatch('/users', 'DELETE')
+        self.assertEqual(route.method, '*')
+        self.assertTrue(route.automatic)
+        self.assertIsNone(self.router.dispatch('/missing', 'GET'))
+
+    def test_dispatch_not_allowed_keeps_path_params(self):
+        self.router.add_route('/users/<int:id>', 'GET', lambda request, id: None)
+        route, params = self.router.dispatch('/users/7', 'PUT')
+        self.assertEqual(route.method, '*')
+        self.assertEqual(params, {'id': 7})
+        self.assertIsNone(self.router.dispatch('/users/abc', 'PUT'))
+
+    def test_dispatch_prefers_other_branch_with_method(self):
+        self.router.add_route('/items/<int:id>', 'GET', lambda request, id: None)
+        self.router.add_route('/items/<name>', 'POST', lambda request, name: None)
+        route, params = self.router.dispatch('/items/5', 'POST')
+        self.assertEqual(route.pattern, '/items/<name>')
+        self.assertEqual(params, {'name': '5'})
+
+    def test_automatic_head_and_options(self):
+        def handler(request):
+            pass
+
+        self.router.add_route('/page', 'GET', handler)
+        self.assertIs(self.router.resolve('/page', 'HEAD'), handler)
+        route, _ = self.router.match('/page', 'OPTIONS')
+        self.assertTrue(route.automatic)
+        table = next(self.router.tables())
+        self.assertEqual(table.allow, 'GET, HEAD, OPTIONS')
+
+    def test_explicit_head_not_replaced(self):
+        def head(request):
+            pass
+
+        self.router.add_route('/page', 'GET', lambda request: None)
+        self.router.add_route('/page', 'HEAD', head)
+        self.assertIs(self.router.resolve('/page', 'HEAD'), head)
+
+    def test_adding_route_refreezes(self):
+        self.router.add_route('/a', 'GET', lambda request: None)
+        self.router.dispatch('/a', 'GET')
+        self.assertTrue(self.router.frozen)
+        self.router.add_route('/a', 'PUT', lambda request: None)
+        self.assertFalse(self.router.frozen)
+        self.assertEqual(self.router.dispatch('/a', 'PUT')[0].method, 'PUT')
+        self.assertEqual(next(self.router.tables()).allow, 'GET, HEAD, OPTIONS, PUT')
+
+    def test_refreeze_keeps_unchanged_tables(self):
+        self.router.add_route('/a', 'GET', lambda request: None)
+        self.router.add_route('/items/<int:id>', 'GET', lambda request, id: None)
+        head, _ = self.router.dispatch('/a', 'HEAD')
+        options, _ = self.router.dispatch('/items/1', 'OPTIONS')
+        self.router.add_route('/b', 'GET', lambda request: None)
+        self.assertIs(self.router.dispatch('/a', 'HEAD')[0], head)
+        self.assertIs(self.router.dispatch('/items/1', 'OPTIONS')[0], options)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,53 @@
+import json
+import unittest
+
+from framework.serializers import JSONBackend, available_backends, get_backend, iterencode
+
+
+class TestSerializers(unittest.TestCase):
+
+    def test_stdlib_always_available(self):
+        self.assertIn('json', available_backends())
+        self.assertIsInstance(get_backend('json'), JSONBackend)
+
+    def test_default_prefers_fastest_installed(self):
+        self.assertEqual(get_backend().name, available_backends()[0])
+
+    def test_backend_instance_passed_through(self):
+        backend = JSONBackend()
+        self.assertIs(get_backend(backend), backend)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_backend('yaml')
+
+    def test_round_trip_all_backends(self):
+        data = {'name': 'Алиса', 'ids': [1, 2, 3], 'active': True, 'score': None}
+        for name in available_backends():
+            with self.subTest(backend=name):
+                backend = get_backend(name)
+                encoded = backend.dumps(data)
+                self.assertIsInstance(encoded, bytes)
+                self.assertEqual(backend.loads(encoded), data)
+                with self.assertRaises(json.JSONDecodeError):
+                    backend.loads(b'not json')
+
+    def test_backends_agree_on_output(self):
+        data = {1: 'one', 'nested': {2: [True, None]}, 'big': 2 ** 70, 'name': 'Алиса'}
+        expected = get_backend('json').dumps(data)
+        for name in available_backends():
+            with self.subTest(backend=name):
+                self.assertEqual(get_backend(name).dumps(data), expected)
+
+    def test_iterencode_chunks(self):
+        items = [{'id': i} for i in range(1000)]
+        chunks = list(iterencode(iter(items), get_backend('json'), chunk_size=1024))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(json.loads(b''.join(chunks)), items)
+
+    def test_iterencode_empty(self):
+        self.assertEqual(b''.join(iterencode([])), b'[]')
+
+
+if __name__ == '__main__':
+    unittest.main()
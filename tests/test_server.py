@@ -0,0 +1,280 @@
+import http.client
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from framework.app import App
+from framework.response import FileResponse, Response, StreamingResponse
+from framework.server import HTTPServer, ThreadPoolHTTPServer
+
+
+class TestHTTPServer(unittest.TestCase):
+    server_class = HTTPServer
+    options = {}
+
+    def setUp(self):
+        self.app = App()
+
+        @self.app.route('/hello', methods=['GET', 'HEAD'])
+        def hello(request):
+            return Response(body='hello')
+
+        @self.app.route('/echo', methods=['POST'])
+        def echo(request):
+            return Response(body=request.body)
+
+        @self.app.route('/stream')
+        def stream(request):
+            return StreamingResponse(iter([b'one', b'two', b'three']))
+
+        @self.app.route('/close')
+        def close(request):
+            return Response(body='bye', headers={'Connection': 'close'})
+
+        @self.app.route('/fail')
+        def fail(request):
+            raise RuntimeError('boom')
+
+    def start(self, **options):
+        self.server = self.server_class(('127.0.0.1', 0), self.app, **self.options, **options)
+        thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        thread.start()
+        self.addCleanup(self.stop, thread)
+        self.port = self.server.server_address[1]
+
+    def stop(self, thread):
+        self.server.shutdown()
+        self.server.server_close()
+        thread.join(5)
+
+    def connection(self):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+        self.addCleanup(connection.close)
+        return connection
+
+    def get(self, connection, path, method='GET', body=None, headers=None):
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response, response.read()
+
+    def raw(self, data):
+        sock = socket.create_connection(('127.0.0.1', self.port), timeout=5)
+        self.addCleanup(sock.close)
+        sock.sendall(data)
+        return sock
+
+    def read_until_closed(self, sock):
+        data = b''
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return data
+            data += chunk
+
+    def test_keep_alive_reuses_connection(self):
+        self.start()
+        connection = self.connection()
+        self.get(connection, '/hello')
+        sock = connection.sock
+        for _ in range(5):
+            response, body = self.get(connection, '/hello')
+            self.assertEqual(body, b'hello')
+            self.assertFalse(response.will_close)
+        self.assertIs(connection.sock, sock)
+        # счётчик растёт уже после отправки ответа, клиент может увидеть ответ раньше
+        deadline = time.time() + 5
+        while self.server.requests_served < 6 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.server.requests_served, 6)
+
+    def test_pipelined_requests_answered_in_order(self):
+        self.start()
+        sock = self.raw(
+            b'GET /hello HTTP/1.1\r\nHost: x\r\n\r\n'
+            b'POST /echo HTTP/1.1\r\nHost: x\r\nContent-Length: 4\r\n\r\nping'
+            b'GET /hello HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n'
+        )
+        data = self.read_until_closed(sock)
+        self.assertEqual(data.count(b'HTTP/1.1 200 OK'), 3)
+        self.assertLess(data.index(b'hello'), data.index(b'ping'))
+        self.assertLess(data.index(b'ping'), data.rindex(b'hello'))
+        self.assertTrue(data.endswith(b'hello'))
+
+    def test_idle_connection_closed_after_timeout(self):
+        self.start(keep_alive_timeout=0.2)
+        connection = self.connection()
+        self.get(connection, '/hello')
+        time.sleep(0.5)
+        self.assertEqual(connection.sock.recv(1), b'')
+
+    def test_max_keepalive_requests(self):
+        self.start(max_keepalive_requests=3)
+        connection = self.connection()
+        closes = [self.get(connection, '/hello')[0].will_close for _ in range(3)]
+        self.assertEqual(closes, [False, False, True])
+
+    def test_http10_closes_by_default(self):
+        self.start()
+        data = self.read_until_closed(self.raw(b'GET /hello HTTP/1.0\r\n\r\n'))
+        self.assertTrue(data.startswith(b'HTTP/1.0 200 OK'))
+        self.assertIn(b'Connection: close', data)
+
+    def test_http10_keep_alive(self):
+        self.start()
+        connection = self.connection()
+        connection._http_vsn, connection._http_vsn_str = 10, 'HTTP/1.0'
+        response, body = self.get(connection, '/hello', headers={'Connection': 'keep-alive'})
+        self.assertEqual(body, b'hello')
+        self.assertEqual(response.getheader('Connection'), 'keep-alive')
+
+    def test_application_can_close_connection(self):
+        self.start()
+        response, body = self.get(self.connection(), '/close')
+        self.assertEqual(body, b'bye')
+        self.assertTrue(response.will_close)
+
+    def test_streaming_response_is_chunked(self):
+        self.start()
+        connection = self.connection()
+        response, body = self.get(connection, '/stream')
+        self.assertEqual(response.getheader('Transfer-Encoding'), 'chunked')
+        self.assertEqual(body, b'onetwothree')
+        self.assertEqual(self.get(connection, '/hello')[1], b'hello')
+
+    def test_chunked_request_body(self):
+        self.start()
+        connection = self.connection()
+        response, body = self.get(connection, '/echo', 'POST', body=iter([b'abc', b'defg']))
+        self.assertEqual(body, b'abcdefg')
+        self.assertEqual(self.get(connection, '/hello')[1], b'hello')
+
+    def test_unread_body_is_drained(self):
+        self.start()
+        connection = self.connection()
+        self.get(connection, '/hello', 'GET', body=b'x' * 10000)
+        self.assertEqual(self.get(connection, '/hello')[1], b'hello')
+
+    def test_timed_out_request_closes_connection(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        @self.app.route('/slow', methods=['POST'], timeout=0.05)
+        def slow(request):
+            release.wait(2)
+            return 'late'
+
+        self.start()
+        response, _ = self.get(self.connection(), '/slow', 'POST', body=b'x' * 100)
+        self.assertEqual(response.status, 504)
+        self.assertTrue(response.will_close)
+
+    def test_expect_continue(self):
+        self.start()
+        sock = self.raw(b'POST /echo HTTP/1.1\r\nHost: x\r\nContent-Length: 4\r\nExpect: 100-continue\r\n\r\n')
+        self.assertEqual(sock.recv(1024), b'HTTP/1.1 100 Continue\r\n\r\n')
+        sock.sendall(b'data')
+        self.assertIn(b'data', sock.recv(1024))
+
+    def test_head_has_no_body(self):
+        self.start()
+        connection = self.connection()
+        connection.request('HEAD', '/hello')
+        response = connection.getresponse()
+        self.assertEqual(response.getheader('Content-Length'), '5')
+        self.assertEqual(response.read(), b'')
+        self.assertEqual(self.get(connection, '/hello')[1], b'hello')
+
+    def test_file_response(self):
+        fd, path = tempfile.mkstemp()
+        os.write(fd, b'0123456789' * 1000)
+        os.close(fd)
+        self.addCleanup(os.unlink, path)
+
+        @self.app.route('/file')
+        def file(request):
+            return FileResponse(path)
+
+        self.start()
+        connection = self.connection()
+        self.assertEqual(self.get(connection, '/file')[1], b'0123456789' * 1000)
+        response, body = self.get(connection, '/file', headers={'Range': 'bytes=5-14'})
+        self.assertEqual(response.status, 206)
+        self.assertEqual(body, b'5678901234')
+
+    def test_file_response_with_background_task_uses_sendfile(self):
+        fd, path = tempfile.mkstemp()
+        os.write(fd, b'payload')
+        os.close(fd)
+        self.addCleanup(os.unlink, path)
+        done = threading.Event()
+
+        @self.app.route('/report')
+        def report(request):
+            request.add_background_task(done.set)
+            return FileResponse(path)
+
+        self.start()
+        sent = []
+        send_file = self.server._send_file
+        self.server._send_file = lambda conn, iterable, *args: (sent.append(iterable), send_file(conn, iterable, *args))
+        self.assertEqual(self.get(self.connection(), '/report')[1], b'payload')
+        self.assertTrue(done.wait(5))
+        self.assertEqual(len(sent), 1)
+
+    def test_malformed_request(self):
+        self.start()
+        data = self.read_until_closed(self.raw(b'NONSENSE\r\n\r\n'))
+        self.assertTrue(data.startswith(b'HTTP/1.1 400 Bad Request'))
+
+    def test_application_error(self):
+        self.start()
+        response, _ = self.get(self.connection(), '/fail')
+        self.assertEqual(response.status, 500)
+
+
+class TestThreadPoolHTTPServer(TestHTTPServer):
+    server_class = ThreadPoolHTTPServer
+    options = {'threads': 2}
+
+    def test_idle_connections_do_not_hold_threads(self):
+        self.start()
+        idle = [self.connection() for _ in range(4)]
+        for connection in idle:
+            self.get(connection, '/hello')
+        self.assertEqual(self.get(self.connection(), '/hello')[1], b'hello')
+        deadline = time.time() + 5
+        while self.server.stats()['active'] and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.server.stats()['active'], 0)
+
+
+    def test_trickling_client_times_out(self):
+        self.options = {'threads': 1, 'connection_timeout': 0.5}
+        self.start()
+        slow = self.raw(b'')
+        stop = threading.Event()
+        self.addCleanup(stop.set)
+
+        def trickle():
+            for byte in b'GET /hello HTTP/1.1\r\nX-Slow: ' + b'x' * 100:
+                if stop.wait(0.1):
+                    return
+                try:
+                    slow.send(bytes([byte]))
+                except OSError:
+                    return
+
+        threading.Thread(target=trickle, daemon=True).start()
+        deadline = time.time() + 5
+        while self.server.stats()['active'] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        started = time.monotonic()
+        self.assertEqual(self.get(self.connection(), '/hello')[1], b'hello')
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(self.server.stats()['timeouts'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
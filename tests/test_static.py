@@ -0,0 +1,127 @@
+import os
+import tempfile
+import time
+import unittest
+from io import BytesIO
+
+from framework.app import App
+from framework.response import FileResponse
+
+
+class TestStaticFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'public')
+        os.makedirs(os.path.join(self.root, 'css'))
+        self.write('css/site.css', b'body { color: red; }')
+        self.write('big.bin', b'x' * 2048)
+        with open(os.path.join(self.tmp.name, 'secret.txt'), 'wb') as f:
+            f.write(b'secret')
+        self.app = App()
+        self.files = self.app.static('/assets', self.root, max_cached_size=1024, check_interval=0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        with open(os.path.join(self.root, name), 'wb') as f:
+            f.write(data)
+
+    def request(self, path, **headers):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'wsgi.input': BytesIO(b''),
+            'CONTENT_LENGTH': '0',
+        }
+        environ.update(headers)
+        result = {}
+
+        def start_response(status, headers):
+            result['status'] = status
+            result['headers'] = dict(headers)
+
+        iterable = self.app(environ, start_response)
+        result['body'] = b''.join(iterable)
+        close = getattr(iterable, 'close', None)
+        if close is not None:
+            close()
+        return result
+
+    def test_serves_small_file_from_memory(self):
+        result = self.request('/assets/css/site.css')
+        self.assertEqual(result['status'], '200 OK')
+        self.assertEqual(result['body'], b'body { color: red; }')
+        self.assertEqual(result['headers']['Content-Type'], 'text/css; charset=utf-8')
+        self.assertIn('ETag', result['headers'])
+        self.assertIn('Last-Modified', result['headers'])
+        self.assertEqual(self.files.stats()['entries'], 1)
+
+    def test_repeated_request_reuses_response(self):
+        self.files.check_interval = 60
+        self.request('/assets/css/site.css')
+        first = self.files.cache.get('css/site.css', 0).response
+        self.request('/assets/css/site.css')
+        self.assertIs(self.files.cache.get('css/site.css', 0).response, first)
+
+    def test_large_file_streamed(self):
+        response = self.files(_Request(), 'big.bin')
+        self.assertIsInstance(response, FileResponse)
+        response.file.close()
+        result = self.request('/assets/big.bin')
+        self.assertEqual(len(result['body']), 2048)
+        self.assertEqual(result['headers']['Content-Length'], '2048')
+
+    def test_conditional_request(self):
+        etag = self.request('/assets/css/site.css')['headers']['ETag']
+        result = self.request('/assets/css/site.css', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(result['status'], '304 Not Modified')
+        self.assertEqual(result['body'], b'')
+
+    def test_range_request_from_memory(self):
+        result = self.request('/assets/css/site.css', HTTP_RANGE='bytes=0-3')
+        self.assertEqual(result['status'], '206 Partial Content')
+        self.assertEqual(result['body'], b'body')
+        self.assertEqual(result['headers']['Content-Range'], 'bytes 0-3/20')
+
+    def test_unsatisfiable_range(self):
+        result = self.request('/assets/css/site.css', HTTP_RANGE='bytes=100-')
+        self.assertEqual(result['status'], '416 Range Not Satisfiable')
+
+    def test_change_detection(self):
+        old = self.request('/assets/css/site.css')['headers']['ETag']
+        time.sleep(0.01)
+        self.write('css/site.css', b'body { color: blue; }')
+        result = self.request('/assets/css/site.css')
+        self.assertEqual(result['body'], b'body { color: blue; }')
+        self.assertNotEqual(result['headers']['ETag'], old)
+
+    def test_revalidation_interval_skips_stat(self):
+        self.files.check_interval = 60
+        self.request('/assets/css/site.css')
+        os.remove(os.path.join(self.root, 'css/site.css'))
+        self.assertEqual(self.request('/assets/css/site.css')['status'], '200 OK')
+
+    def test_deleted_file_is_404(self):
+        self.request('/assets/css/site.css')
+        os.remove(os.path.join(self.root, 'css/site.css'))
+        self.assertEqual(self.request('/assets/css/site.css')['status'], '404 Not Found')
+        self.assertEqual(self.files.stats()['entries'], 0)
+
+    def test_traversal_rejected(self):
+        self.assertEqual(self.request('/assets/../secret.txt')['status'], '404 Not Found')
+        os.symlink(os.path.join(self.tmp.name, 'secret.txt'), os.path.join(self.root, 'link.txt'))
+        self.assertEqual(self.request('/assets/link.txt')['status'], '404 Not Found')
+
+    def test_directory_is_404(self):
+        self.assertEqual(self.request('/assets/css')['status'], '404 Not Found')
+
+
+class _Request:
+    environ = {}
+
+
+if __name__ == '__main__':
+    unittest.main()
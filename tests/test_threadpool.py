@@ -0,0 +1,123 @@
+import socket
+import threading
+import time
+import unittest
+
+from framework.app import App
+from framework.response import Response
+from framework.threadpool import PoolRequestHandler, ThreadPoolWSGIServer
+
+
+class QuietHandler(PoolRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class TestThreadPoolServer(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.app = App()
+
+        @self.app.route('/block')
+        def block(request):
+            self.release.wait(5)
+            return Response(body='released')
+
+        @self.app.route('/fast')
+        def fast(request):
+            return Response(body='fast')
+
+    def start(self, **options):
+        self.server = ThreadPoolWSGIServer(('127.0.0.1', 0), QuietHandler, **options)
+        self.server.set_app(self.app)
+        thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        thread.start()
+        self.addCleanup(self.stop, thread)
+        self.port = self.server.server_address[1]
+
+    def stop(self, thread):
+        self.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+        thread.join(5)
+
+    def connect(self, path=None):
+        sock = socket.create_connection(('127.0.0.1', self.port), timeout=5)
+        if path is not None:
+            sock.sendall(f'GET {path} HTTP/1.0\r\n\r\n'.encode())
+        return sock
+
+    def read_all(self, sock):
+        data = b''
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                sock.close()
+                return data
+            data += chunk
+
+    def wait_for(self, predicate):
+        deadline = time.time() + 5
+        while not predicate() and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_serves_requests(self):
+        self.start(threads=2)
+        self.assertTrue(self.read_all(self.connect('/fast')).endswith(b'fast'))
+
+    def test_full_queue_rejected_with_503(self):
+        self.start(threads=1, queue_size=1, retry_after=7)
+        busy = self.connect('/block')
+        self.wait_for(lambda: self.server.stats()['active'] == 1)
+        queued = self.connect('/fast')
+        self.wait_for(lambda: self.server.stats()['queue_depth'] == 1)
+
+        rejected = self.read_all(self.connect('/fast'))
+        self.assertTrue(rejected.startswith(b'HTTP/1.1 503 Service Unavailable'))
+        self.assertIn(b'Retry-After: 7', rejected)
+
+        stats = self.server.stats()
+        self.assertEqual(stats['rejected'], 1)
+        self.assertEqual(stats['accepted'], 2)
+        self.assertEqual(stats['queue_size'], 1)
+
+        self.release.set()
+        self.assertTrue(self.read_all(busy).endswith(b'released'))
+        self.assertTrue(self.read_all(queued).endswith(b'fast'))
+        self.wait_for(lambda: self.server.stats()['completed'] == 2)
+        self.assertEqual(self.server.stats()['completed'], 2)
+
+    def test_idle_connection_times_out(self):
+        self.start(threads=1, connection_timeout=0.2)
+        silent = self.connect()
+        self.assertTrue(self.read_all(self.connect('/fast')).endswith(b'fast'))
+        self.assertEqual(self.server.stats()['timeouts'], 1)
+        silent.close()
+
+
+    def test_trickling_client_times_out(self):
+        self.start(threads=1, connection_timeout=0.5)
+        slow = self.connect()
+        self.addCleanup(slow.close)
+        stop = threading.Event()
+        self.addCleanup(stop.set)
+
+        def trickle():
+            for byte in b'GET /fast HTTP/1.0\r\nX-Slow: ' + b'x' * 100:
+                if stop.wait(0.1):
+                    return
+                try:
+                    slow.send(bytes([byte]))
+                except OSError:
+                    return
+
+        threading.Thread(target=trickle, daemon=True).start()
+        self.wait_for(lambda: self.server.stats()['active'] == 1)
+        started = time.monotonic()
+        self.assertTrue(self.read_all(self.connect('/fast')).endswith(b'fast'))
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(self.server.stats()['timeouts'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+import unittest
+from io import BytesIO
+
+from framework.app import App
+from framework.request import Request
+
+
+def environ(path):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'wsgi.input': BytesIO(b''),
+        'CONTENT_LENGTH': '0',
+    }
+
+
+class TestTimeouts(unittest.TestCase):
+
+    def setUp(self):
+        self.app = App(timeout=5)
+        self.release = threading.Event()
+        self.cancelled = []
+        self.budgets = []
+
+        @self.app.route('/hang', timeout=0.05)
+        def hang(request):
+            self.release.wait(2)
+            return 'late'
+
+        @self.app.route('/async-hang', timeout=0.05)
+        async def async_hang(request):
+            try:
+                await asyncio.sleep(2)
+            except asyncio.CancelledError:
+                self.cancelled.append(request.path)
+                raise
+            return 'late'
+
+        @self.app.route('/budget')
+        def budget(request):
+            self.budgets.append(request.remaining)
+            return 'ok'
+
+        @self.app.route('/unlimited', timeout=0)
+        def unlimited(request):
+            self.budgets.append(request.remaining)
+            return 'ok'
+
+    def tearDown(self):
+        self.release.set()
+
+    def call(self, path):
+        result = {}
+
+        def start_response(status, headers):
+            result['status'] = status
+
+        result['body'] = b''.join(self.app(environ(path), start_response))
+        return result
+
+    def test_sync_handler_times_out(self):
+        started = time.monotonic()
+        result = self.call('/hang')
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(result['status'], '504 Gateway Timeout')
+        self.assertEqual(self.app.timeouts, {'/hang': 1})
+
+    def test_abandoned_request_flagged(self):
+        env = environ('/hang')
+        self.app(env, lambda status, headers: None)
+        self.assertTrue(env['framework.abandoned'])
+
+    def test_async_handler_cancelled(self):
+        result = self.call('/async-hang')
+        self.assertEqual(result['status'], '504 Gateway Timeout')
+        self.assertEqual(self.cancelled, ['/async-hang'])
+
+    def test_async_dispatch_cancels(self):
+        response = asyncio.run(self.app.handle_async(Request(environ('/async-hang'))))
+        self.assertEqual(response.status, 504)
+        self.assertEqual(self.cancelled, ['/async-hang'])
+
+    def test_deadline_exposed(self):
+        self.assertEqual(self.call('/budget')['status'], '200 OK')
+        self.assertTrue(0 < self.budgets[0] <= 5)
+
+    def test_route_can_disable_app_timeout(self):
+        self.call('/unlimited')
+        self.assertEqual(self.budgets, [None])
+
+    def test_timeouts_exported_in_metrics(self):
+        self.app.enable_metrics()
+        self.call('/hang')
+        body = self.call('/metrics')['body']
+        self.assertIn(b'framework_request_timeouts_total{route="/hang"} 1', body)
+
+    def test_remaining_without_deadline(self):
+        self.assertIsNone(Request(environ('/')).remaining)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from io import BytesIO
+
+from framework.app import App
+from framework.tracing import Sampler, Trace, collapse
+
+
+def environ(path):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'wsgi.input': BytesIO(b''),
+        'CONTENT_LENGTH': '0',
+    }
+
+
+class TestTrace(unittest.TestCase):
+
+    def test_phases(self):
+        trace = Trace()
+        trace.mark('route')
+        trace.mark('handler')
+        self.assertEqual([phase for phase, _ in trace.phases], ['route', 'handler'])
+        self.assertAlmostEqual(trace.total, sum(duration for _, duration in trace.phases))
+
+
+class TestAppTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.app = App()
+
+        @self.app.route('/slow/<int:delay>')
+        def slow(request, delay):
+            time.sleep(delay / 1000)
+            return 'done'
+
+    def test_slow_request_logged_with_phases(self):
+        tracer = self.app.enable_tracing(threshold=0.01)
+        with self.assertLogs('framework.tracing', 'WARNING') as logs:
+            body = self.app(environ('/slow/20'), lambda status, headers: None)
+        self.assertEqual(body, [b'done'])
+        self.assertIn('/slow/<int:delay>', logs.output[0])
+        entry = tracer.slow[0]
+        self.assertEqual(list(entry['phases']), ['parse', 'route', 'handler', 'serialize'])
+        self.assertGreaterEqual(entry['phases']['handler'], 0.02)
+
+    def test_fast_request_not_recorded(self):
+        tracer = self.app.enable_tracing(threshold=1.0)
+        self.app(environ('/slow/0'), lambda status, headers: None)
+        self.assertEqual(len(tracer.slow), 0)
+
+    def test_asgi_trace(self):
+        tracer = self.app.enable_tracing(threshold=0.0)
+        scope = {'type': 'http', 'method': 'GET', 'path': '/slow/0', 'headers': []}
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        with self.assertLogs('framework.tracing', 'WARNING'):
+            asyncio.run(self.app.asgi(scope, receive, send))
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertEqual(list(tracer.slow[0]['phases']), ['parse', 'route', 'handler', 'send'])
+
+
+class TestSampler(unittest.TestCase):
+
+    def test_collapse_outermost_first(self):
+        def inner():
+            return collapse(sys._getframe())
+
+        stack = inner()
+        self.assertTrue(stack.endswith('test_tracing.py:test_collapse_outermost_first;test_tracing.py:inner'))
+
+    def test_sampling_writes_folded_stacks(self):
+        stop = threading.Event()
+
+        def busy_worker():
+            while not stop.is_set():
+                sum(range(1000))
+
+        thread = threading.Thread(target=busy_worker)
+        thread.start()
+        with tempfile.TemporaryDirectory() as directory:
+            sampler = Sampler(interval=0.001, directory=directory)
+            try:
+                with self.assertLogs('framework.tracing', 'WARNING'):
+                    sampler.start(0.05)
+                    sampler._thread.join()
+            finally:
+                stop.set()
+                thread.join()
+            self.assertTrue(os.path.exists(sampler.last_output))
+            with open(sampler.last_output) as f:
+                lines = f.read().splitlines()
+        self.assertTrue(any('busy_worker' in line for line in lines))
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()